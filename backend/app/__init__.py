@@ -1,26 +1,52 @@
-from flask import Flask, jsonify, request
+from flask import Flask, Response, g, jsonify, request, stream_with_context
 from flask_cors import CORS
-import traceback
+import itertools
+import json
+import logging
+import threading
+import time
+import uuid
+import zlib
 from werkzeug.exceptions import HTTPException
 
 #Scanner functions
-from app.auto_scan_wifi import get_wifi_info
-from app.detect_arp_spoofing import detect_arp_spoofing
-from app.detect_dns_spoofing import start_dns_monitor
-from app.open_port_scanner import scan_open_ports, get_gateway_ip
-from app.detect_rogue_ap import detect_rogue_aps
-from app.threat_level_ai import calculate_threat_score
+from app.detect_arp_spoofing import detect_arp_spoofing, arp_monitor, get_arp_verdict
+from app.detect_dns_spoofing import dns_monitor, get_dns_verdict
+from app.open_port_scanner import scan_open_ports
+from app.gateway import get_gateway_ip
+from app.detect_rogue_ap import detect_rogue_aps, rogue_ap_monitor, get_rogue_ap_verdict
+from app.threat_level_ai import calculate_threat_score, calculate_threat_scores
+from app.threat_rules import reload_rules, rules_status
+from app.history_store import get_history_store
+from app.ndjson_stream import gzip_chunks, iter_lines
+from app.scan_orchestrator import run_all_scans, iter_scan_results
+from app.scan_scheduler import get_snapshot, scan_scheduler
+from app.lan_sweep import scan_lan
+from app.single_flight import single_flight
+from app.result_cache import result_cache
+from app.log_setup import configure_logging, LOG_REQUEST_BODIES
+from app.metrics import CONTENT_TYPE as METRICS_CONTENT_TYPE, HTTP_REQUEST_SECONDS, render_metrics
+from app.daemon_client import FORWARDED_HEADERS, RECORDED_PATHS, SCAN_ID_HEADER, get_client, is_forwarded
+from app import lazy_scapy
 
+# Upper bound on /scan/threat_score/batch; split larger archives client-side
+MAX_BATCH_ITEMS = 100_000
+# Request bodies larger than this (or of unknown length) are never logged
+LOG_BODY_LIMIT = 64 * 1024
 
-def create_app():
+logger = logging.getLogger(__name__)
+
+
+def create_app(record_history=True):
+    # The capture daemon passes False: the workers store the scans they forward
+    configure_logging()
     app = Flask(__name__)
     CORS(app)
 
     #Global error handler
     @app.errorhandler(Exception)
     def handle_error(e):
-        print("🔥 ERROR:", str(e))
-        traceback.print_exc()
+        logger.exception("🔥 ERROR: %s", e)
         return jsonify({"error": str(e)}), 500
     
     @app.errorhandler(HTTPException)
@@ -37,38 +63,191 @@ def create_app():
     #Debug request
     @app.before_request
     def log_request_info():
-        print("👉 Headers:", dict(request.headers))
-        print("👉 Body:", request.get_data())
+        if not logger.isEnabledFor(logging.DEBUG):
+            return
+        logger.debug("👉 %s %s headers=%s", request.method, request.path, dict(request.headers))
+        # Reading a large upload here would buffer it whole and starve streaming handlers
+        if LOG_REQUEST_BODIES and request.content_length is not None \
+                and request.content_length <= LOG_BODY_LIMIT:
+            logger.debug("👉 Body: %r", request.get_data())
+
+    @app.before_request
+    def start_request_timer():
+        g.request_started = time.perf_counter()
+
+    @app.after_request
+    def observe_request(response):
+        # Streamed responses are measured to the first byte
+        started = g.pop("request_started", None)
+        if started is not None:
+            endpoint = request.url_rule.rule if request.url_rule is not None else "unmatched"
+            HTTP_REQUEST_SECONDS.observe(time.perf_counter() - started, endpoint, request.method,
+                                         str(response.status_code))
+        return response
+
+    # Split deployment: scanning endpoints run in the privileged capture daemon
+    daemon = get_client()
+    if daemon is None and lazy_scapy.WARMUP:
+        # Workers that forward scans never touch scapy; everyone else loads it off the request path
+        lazy_scapy.warm_up()
+
+    def forward_to_daemon(path):
+        headers = {k: v for k, v in request.headers.items() if k in FORWARDED_HEADERS}
+        try:
+            status, headers, chunks = daemon.request(request.method, path,
+                                                     request.query_string.decode("latin-1"),
+                                                     headers, request.get_data())
+        except OSError as e:
+            logger.error("❌ Capture daemon unreachable at %s: %s", daemon.path, e)
+            return jsonify({"status": "error", "message": f"Capture daemon unavailable: {e}"}), 503
+        if path in RECORDED_PATHS and status.startswith("200"):
+            chunks = record_forwarded(path, chunks, dict(headers).get(SCAN_ID_HEADER))
+        return Response(chunks, status=status, headers=headers)
+
+    def record_forwarded(path, chunks, scan_id):
+        # History stays with the workers' user: a root daemon writing the shared
+        # SQLite file would leave a WAL/SHM the workers can't open for writing
+        body = bytearray()
+        for chunk in chunks:
+            body += chunk
+            yield chunk
+        try:
+            if path == "/scan/all":
+                result = json.loads(body)
+            else:
+                result = {}
+                for line in body.splitlines():
+                    if line.strip():
+                        item = json.loads(line)
+                        result[item["step"]] = item["result"]
+        except (ValueError, KeyError, TypeError) as e:
+            logger.warning("⚠️ Not storing forwarded %s result: %s", path, e)
+            return
+        get_history_store().append(result, uid=scan_id)
+
+    @app.before_request
+    def forward_scans():
+        if daemon is not None and is_forwarded(request.path):
+            return forward_to_daemon(request.path)
+
+    @app.route("/metrics", methods=["GET"])
+    def metrics():
+        return Response(render_metrics(), content_type=METRICS_CONTENT_TYPE)
+
+    # The daemon's detectors, sniffers and subprocess metrics (this worker's are at /metrics)
+    @app.route("/metrics/capture", methods=["GET"])
+    def capture_metrics():
+        if daemon is None:
+            return metrics()
+        return forward_to_daemon("/metrics")
 
     @app.route("/")
     def index():
         return jsonify({"message": "Backend is running!"})
 
+    def fresh_requested():
+        # ?fresh=1 skips the result cache (the new result is still stored)
+        return request.args.get("fresh") == "1"
+
+    def published(name):
+        """The scheduler's snapshot if it holds `name` ("all": every section), else None."""
+        if fresh_requested():
+            return None
+        snapshot = get_snapshot()
+        if snapshot is None:
+            return None
+        return snapshot if (snapshot.complete() if name == "all" else name in snapshot.sections) else None
+
+    def snapshot_response(snapshot, name, body=None):
+        # Pre-serialized at publish time; Age tells the client how stale the section is
+        updated_at = snapshot.updated_at(name)
+        return Response(body if body is not None else snapshot.bodies[name], mimetype="application/json",
+                        headers={"Age": str(max(0, int(time.time() - updated_at))),
+                                 "X-Scan-Updated-At": f"{updated_at:.3f}"})
+
     @app.route("/scan/wifi", methods=["GET"])
     def wifi_scan():
-        return jsonify(get_wifi_info())
+        snapshot = published("wifi_info")
+        if snapshot is not None:
+            return snapshot_response(snapshot, "wifi_info")
+        return jsonify(result_cache.wifi_info(fresh=fresh_requested()))
 
     @app.route("/scan/arp", methods=["GET"])
     def arp_scan():
-        return jsonify(detect_arp_spoofing())
+        # ?active=1 forces the old two-probe check against the gateway
+        if request.args.get("active") == "1":
+            return jsonify(result_cache.call("arp_active", detect_arp_spoofing, fresh=fresh_requested()))
+        return jsonify(get_arp_verdict())
+
+    @app.route("/scan/arp/monitor", methods=["GET"])
+    def arp_monitor_health():
+        return jsonify(arp_monitor.health())
+
+    @app.route("/scan/arp/monitor/start", methods=["POST"])
+    def arp_monitor_start():
+        return jsonify(arp_monitor.start())
+
+    @app.route("/scan/arp/monitor/stop", methods=["POST"])
+    def arp_monitor_stop():
+        return jsonify(arp_monitor.stop())
 
     @app.route("/scan/dns", methods=["GET"])
     def dns_scan():
-        results = start_dns_monitor(timeout=2)
-        return jsonify(results)
-    
+        return jsonify(get_dns_verdict())
+
+    @app.route("/scan/dns/monitor", methods=["GET"])
+    def dns_monitor_health():
+        return jsonify(dns_monitor.health())
+
+    @app.route("/scan/dns/monitor/start", methods=["POST"])
+    def dns_monitor_start():
+        fast_path = request.args.get("fast_path")
+        return jsonify(dns_monitor.start(fast_path=fast_path == "1" if fast_path is not None else None))
+
+    @app.route("/scan/dns/monitor/stop", methods=["POST"])
+    def dns_monitor_stop():
+        return jsonify(dns_monitor.stop())
 
     @app.route("/scan/open_ports", methods=["GET"])
     def port_scan():
         ip = get_gateway_ip()
         if not ip:
             return jsonify({"error": "❌ Could not find default gateway IP"}), 500
-        result = scan_open_ports(ip)
+        engine = request.args.get("engine", "auto")
+        ports = request.args.get("ports")
+        snapshot = published("open_ports") if (engine, ports) == ("auto", None) else None
+        if snapshot is not None:
+            # Splice the stored bytes rather than re-encoding the whole port list
+            body = b'{"ip":%s,"scan_result":%s}\n' % (json.dumps(ip).encode(), snapshot.bodies["open_ports"].rstrip())
+            return snapshot_response(snapshot, "open_ports", body)
+        result = result_cache.call("open_ports", scan_open_ports, ip, engine=engine, ports=ports,
+                                   fresh=fresh_requested(), args_key=(ip, engine, ports))
         return jsonify({"ip": ip, "scan_result": result})
 
+    @app.route("/scan/lan", methods=["GET"])
+    def lan_scan():
+        cidr, ports = request.args.get("cidr"), request.args.get("ports")
+        return jsonify(result_cache.call("lan", scan_lan, cidr=cidr, ports=ports,
+                                         fresh=fresh_requested(), args_key=(cidr, ports)))
+
     @app.route("/scan/rogue_ap", methods=["GET"])
     def rogue_ap_scan():
-        return jsonify(detect_rogue_aps())
+        # ?fresh=1 runs a one-off scan without consulting the sighting store
+        if fresh_requested():
+            return jsonify(result_cache.call("rogue_ap_fresh", detect_rogue_aps, fresh=True))
+        return jsonify(get_rogue_ap_verdict())
+
+    @app.route("/scan/rogue_ap/monitor", methods=["GET"])
+    def rogue_ap_monitor_health():
+        return jsonify(rogue_ap_monitor.health())
+
+    @app.route("/scan/rogue_ap/monitor/start", methods=["POST"])
+    def rogue_ap_monitor_start():
+        return jsonify(rogue_ap_monitor.start())
+
+    @app.route("/scan/rogue_ap/monitor/stop", methods=["POST"])
+    def rogue_ap_monitor_stop():
+        return jsonify(rogue_ap_monitor.stop())
 
     @app.route("/scan/threat_score", methods=["POST"])
     def get_threat_score():
@@ -79,64 +258,181 @@ def create_app():
         result = calculate_threat_score(data)
         return jsonify(result)
 
+    # Scoring rules are read from threat_rules.json and picked up automatically when it changes
+    @app.route("/scan/threat_rules", methods=["GET"])
+    def threat_rules():
+        return jsonify(rules_status())
+
+    @app.route("/scan/threat_rules/reload", methods=["POST"])
+    def threat_rules_reload():
+        reload_rules(force=True)
+        return jsonify(rules_status())
+
+    # Re-score many stored scan results in one request
+    @app.route("/scan/threat_score/batch", methods=["POST"])
+    def get_threat_scores():
+        data = request.get_json(silent=True)
+        items = data.get("items") if isinstance(data, dict) else data
+        if not isinstance(items, list):
+            return jsonify({"error": "Expected a JSON list of scan results or {\"items\": [...]}"}), 400
+        if len(items) > MAX_BATCH_ITEMS:
+            return jsonify({"error": f"Batch too large (max {MAX_BATCH_ITEMS} items)"}), 413
+
+        results = calculate_threat_scores(items)
+        return jsonify({"count": len(results), "results": results})
+
+    # Background scheduler: GET endpoints answer from its latest snapshot
+    @app.route("/scan/snapshot", methods=["GET"])
+    def scan_snapshot():
+        get_snapshot()
+        return Response(scan_scheduler.snapshot().bodies["snapshot"], mimetype="application/json")
+
+    @app.route("/scan/scheduler", methods=["GET"])
+    def scheduler_health():
+        return jsonify(scan_scheduler.health())
+
+    @app.route("/scan/scheduler/start", methods=["POST"])
+    def scheduler_start():
+        return jsonify(scan_scheduler.start())
+
+    @app.route("/scan/scheduler/stop", methods=["POST"])
+    def scheduler_stop():
+        return jsonify(scan_scheduler.stop())
+
+    # How many concurrent scan calls were folded into an in-flight one
+    @app.route("/scan/coalescing", methods=["GET"])
+    def coalescing_stats():
+        return jsonify(single_flight.stats())
+
+    @app.route("/scan/cache", methods=["GET"])
+    def cache_stats():
+        return jsonify(result_cache.stats())
+
+    @app.route("/scan/cache/clear", methods=["POST"])
+    def cache_clear():
+        result_cache.invalidate()
+        return jsonify({"status": "ok", "message": "Result cache cleared"})
+
+    def record(result, scan_id):
+        if record_history:
+            get_history_store().append(result, uid=scan_id)
+
+    def run_and_record(**kwargs):
+        # Runs once per coalesced group, so each scan is stored once; the id
+        # does the same for workers storing results forwarded from the daemon
+        result = run_all_scans(**kwargs)
+        scan_id = uuid.uuid4().hex
+        record(result, scan_id)
+        return result, scan_id
+
+    recorded = {"version": None}
+    recorded_lock = threading.Lock()
+
+    def record_snapshot(snapshot):
+        # Each published snapshot is stored once, however many clients read it
+        scan_id = uuid.uuid5(uuid.NAMESPACE_URL, f"snapshot/{snapshot.published_at!r}/{snapshot.version}").hex
+        with recorded_lock:
+            if recorded["version"] == snapshot.version:
+                return scan_id
+            recorded["version"] = snapshot.version
+        record({name: section["result"] for name, section in snapshot.sections.items()}, scan_id)
+        return scan_id
+
     # 🔥 Combined scan endpoint
     @app.route("/scan/all", methods=["GET"])
     def scan_all():
-        """Run all scans but never fail the whole endpoint.
-        Returns 200 with best-effort data and embeds any step errors.
+        """Run all scans concurrently but never fail the whole endpoint.
+        Returns 200 with best-effort data and embeds any step errors;
+        steps that miss their deadline come back with status "timeout".
+        Once the background scheduler has every section, answers come from
+        its snapshot instead (stored in the history once per snapshot).
         """
-        result = {}
+        include_lan, fresh = request.args.get("lan") == "1", fresh_requested()
+        snapshot = None if include_lan else published("all")
+        if snapshot is not None:
+            response = snapshot_response(snapshot, "all")
+            response.headers[SCAN_ID_HEADER] = record_snapshot(snapshot)
+            return response
+        # Simultaneous callers share one run instead of each starting their own
+        result, scan_id = single_flight.do(("scan_all", include_lan, fresh), run_and_record,
+                                           include_lan=include_lan, fresh=fresh)
+        return jsonify(result), 200, {SCAN_ID_HEADER: scan_id}
 
-        # WiFi info (best-effort)
-        try:
-            result["wifi_info"] = get_wifi_info()
-        except Exception as e:
-            result["wifi_info"] = {"status": "error", "message": str(e)}
+    # Streaming variant: one NDJSON line per step, in the order they finish
+    @app.route("/scan/all/stream", methods=["GET"])
+    def scan_all_stream():
+        include_lan, fresh = request.args.get("lan") == "1", fresh_requested()
+        scan_id = uuid.uuid4().hex
 
-        # ARP spoofing
-        try:
-            result["arp_spoofing"] = detect_arp_spoofing()
-        except Exception as e:
-            result["arp_spoofing"] = {"status": "unknown", "message": str(e)}
+        def generate():
+            collected = {}
+            for name, step_result in iter_scan_results(include_lan=include_lan, fresh=fresh):
+                collected[name] = step_result
+                yield json.dumps({"step": name, "result": step_result}) + "\n"
+            record(collected, scan_id)
 
-        # DNS spoofing (sniff may require privileges); handled inside function too
-        try:
-            result["dns_spoofing"] = start_dns_monitor(timeout=2)
-        except Exception as e:
-            result["dns_spoofing"] = {"status": "unknown", "message": str(e)}
+        return Response(
+            stream_with_context(generate()),
+            mimetype="application/x-ndjson",
+            # Stop reverse proxies from buffering the whole response
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no", SCAN_ID_HEADER: scan_id},
+        )
 
-        # Rogue APs (best-effort)
+    # Server-side scan history, newest first, keyset-paginated
+    @app.route("/history", methods=["GET"])
+    def history():
+        args = request.args
         try:
-            result["rogue_ap"] = detect_rogue_aps()
-        except Exception as e:
-            result["rogue_ap"] = {"status": "unknown", "message": str(e)}
+            page = get_history_store().query(
+                limit=args.get("limit", 50),
+                cursor=args.get("cursor"),
+                ssid=args.get("ssid"),
+                bssid=args.get("bssid"),
+                since=args.get("since"),
+                until=args.get("until"),
+                full=args.get("full") == "1",
+            )
+        except ValueError as e:
+            return jsonify({"error": f"Invalid query: {e}"}), 400
+        return jsonify(page)
 
-        # Open ports (graceful if gateway/nmap is unavailable)
+    # Bulk transfer: gzip-compressed NDJSON, streamed in both directions
+    @app.route("/history/export", methods=["GET"])
+    def history_export():
+        args = request.args
+        fields = [f for f in args.get("fields", "").split(",") if f] or None
         try:
-            ip = get_gateway_ip()
-            if not ip:
-                result["open_ports"] = {"status": "unknown", "message": "No gateway IP"}
-            else:
-                ports_scan = scan_open_ports(ip)
-                result["open_ports"] = ports_scan if ports_scan is not None else {"status": "unknown", "message": "scan failed"}
-        except Exception as e:
-            result["open_ports"] = {"status": "unknown", "message": str(e)}
+            lines = get_history_store().iter_export(
+                fields=fields, ssid=args.get("ssid"), bssid=args.get("bssid"),
+                since=args.get("since"), until=args.get("until"))
+            # Pull the first line now so bad arguments become a 400, not a broken stream
+            first = next(lines, None)
+        except ValueError as e:
+            return jsonify({"error": f"Invalid export: {e}"}), 400
+        body = itertools.chain([first] if first is not None else [], lines)
+
+        if args.get("gzip") == "0":
+            return Response(stream_with_context(body), mimetype="application/x-ndjson")
+        return Response(
+            stream_with_context(gzip_chunks(body)),
+            mimetype="application/gzip",
+            headers={"Content-Disposition": "attachment; filename=scan_history.ndjson.gz"},
+        )
 
-        # Threat score (optional, don't fail)
+    @app.route("/history/import", methods=["POST"])
+    def history_import():
         try:
-            # Provide a minimal, shape-agnostic payload
-            threat_input = {
-                "arp_spoofing": result.get("arp_spoofing"),
-                "dns_spoofing": result.get("dns_spoofing"),
-                "rogue_ap": result.get("rogue_ap"),
-                # If ports are provided as list, use it; else empty list
-                "open_ports": result.get("open_ports") if isinstance(result.get("open_ports"), list) else []
-            }
-            result["threat_score"] = calculate_threat_score(threat_input)
-        except Exception as e:
-            result["threat_score"] = {"status": "unknown", "message": str(e)}
-
-        return jsonify(result), 200
+            summary = get_history_store().import_records(iter_lines(request.stream))
+        except (ValueError, zlib.error) as e:
+            return jsonify({"status": "error", "message": f"Could not read upload: {e}"}), 400
+        return jsonify({"status": "ok", **summary})
+
+    @app.route("/history/<int:scan_id>", methods=["GET"])
+    def history_item(scan_id):
+        item = get_history_store().get(scan_id)
+        if item is None:
+            return jsonify({"error": "Scan not found"}), 404
+        return jsonify(item)
 
     return app
 
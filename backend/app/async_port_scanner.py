@@ -0,0 +1,152 @@
+import asyncio
+import os
+import socket
+import time
+
+# nmap's "-F" set: the 100 most common TCP ports
+FAST_PORTS = (
+    7, 9, 13, 21, 22, 23, 25, 26, 37, 53, 79, 80, 81, 88, 106, 110, 111, 113, 119, 135,
+    139, 143, 144, 179, 199, 389, 427, 443, 444, 445, 465, 513, 514, 515, 543, 544, 548,
+    554, 587, 631, 646, 873, 990, 993, 995, 1025, 1026, 1027, 1028, 1029, 1110, 1433,
+    1720, 1723, 1755, 1900, 2000, 2001, 2049, 2121, 2717, 3000, 3128, 3306, 3389, 3986,
+    4899, 5000, 5009, 5051, 5060, 5101, 5190, 5357, 5432, 5631, 5666, 5800, 5900, 6000,
+    6001, 6646, 7070, 8000, 8008, 8009, 8080, 8081, 8443, 8888, 9100, 9999, 10000, 32768,
+    49152, 49153, 49154, 49155, 49156, 49157,
+)
+
+PORT_SETS = {
+    "fast": FAST_PORTS,
+    "all": range(1, 65536),
+}
+
+DEFAULT_CONCURRENCY = 256
+DEFAULT_CONNECT_TIMEOUT = 1.0
+# Deprecated: "open_ports" (numbers as strings) repeats "ports" for API clients
+# written against the old result shape; set to 0 to drop it from responses
+LEGACY_OPEN_PORTS = os.environ.get("LEGACY_OPEN_PORTS", "1") == "1"
+
+
+def parse_ports(spec):
+    """Turn a port-set name, "22,80,8000-8100" string or iterable into a sorted port list."""
+    if spec is None:
+        spec = "fast"
+    if isinstance(spec, str):
+        if spec in PORT_SETS:
+            return sorted(set(PORT_SETS[spec]))
+        ports = set()
+        for part in spec.split(","):
+            part = part.strip()
+            if not part:
+                continue
+            if "-" in part:
+                lo, hi = (int(x) for x in part.split("-", 1))
+                # Check before expanding: "1-1000000000" must not build a huge set
+                if not 1 <= lo <= hi <= 65535:
+                    raise ValueError(f"invalid port range {part!r} (need 1 <= lo <= hi <= 65535)")
+                ports.update(range(lo, hi + 1))
+            else:
+                ports.add(int(part))
+    else:
+        ports = {int(p) for p in spec}
+    if any(p < 1 or p > 65535 for p in ports):
+        raise ValueError("ports must be between 1 and 65535")
+    return sorted(ports)
+
+
+async def _probe(ip, port, connect_timeout):
+    try:
+        _, writer = await asyncio.wait_for(asyncio.open_connection(ip, port), connect_timeout)
+    except (OSError, asyncio.TimeoutError):
+        return False
+    writer.close()
+    try:
+        await writer.wait_closed()
+    except OSError:
+        pass
+    return True
+
+
+async def iter_open_endpoints(targets, concurrency=DEFAULT_CONCURRENCY,
+                              connect_timeout=DEFAULT_CONNECT_TIMEOUT):
+    """Async generator yielding each open (ip, port) from `targets` as it answers.
+
+    At most `concurrency` connects are in flight; a fixed pool of workers
+    pulls from the `targets` iterator, so even a full 65535-port sweep (or a
+    whole subnet) never materialises more than `concurrency` tasks.
+    """
+    target_iter = iter(targets)
+    found = asyncio.Queue()
+    done = object()
+
+    async def worker():
+        try:
+            for ip, port in target_iter:
+                if await _probe(ip, port, connect_timeout):
+                    found.put_nowait((ip, port))
+        finally:
+            found.put_nowait(done)
+
+    workers = [asyncio.ensure_future(worker()) for _ in range(max(1, concurrency))]
+    try:
+        remaining = len(workers)
+        while remaining:
+            item = await found.get()
+            if item is done:
+                remaining -= 1
+            else:
+                yield item
+    finally:
+        for w in workers:
+            w.cancel()
+
+
+async def iter_open_ports(ip, ports=None, concurrency=DEFAULT_CONCURRENCY,
+                          connect_timeout=DEFAULT_CONNECT_TIMEOUT):
+    """Async generator yielding each open TCP port on `ip` as soon as it answers."""
+    targets = ((ip, p) for p in parse_ports(ports))
+    async for _, port in iter_open_endpoints(targets, concurrency, connect_timeout):
+        yield port
+
+
+async def scan_ports_async(ip, ports=None, concurrency=DEFAULT_CONCURRENCY,
+                           connect_timeout=DEFAULT_CONNECT_TIMEOUT, on_open=None):
+    """Connect-scan `ip`; return the sorted list of open ports.
+
+    `on_open(port)` is called for each open port as it is found.
+    """
+    found = []
+    async for port in iter_open_ports(ip, ports, concurrency, connect_timeout):
+        found.append(port)
+        if on_open:
+            on_open(port)
+    return sorted(found)
+
+
+def _service_name(port):
+    try:
+        return socket.getservbyport(port, "tcp")
+    except OSError:
+        return None
+
+
+def scan_open_ports_native(ip, ports=None, concurrency=DEFAULT_CONCURRENCY,
+                           connect_timeout=DEFAULT_CONNECT_TIMEOUT, timeout=None):
+    """Blocking wrapper with the same result shape as scan_open_ports()."""
+    start = time.monotonic()
+    try:
+        coro = scan_ports_async(ip, ports, concurrency, connect_timeout)
+        open_ports = asyncio.run(asyncio.wait_for(coro, timeout) if timeout else coro)
+    except asyncio.TimeoutError:
+        return {"status": "timeout", "message": f"port scan did not finish within {timeout:g}s"}
+    except ValueError as e:
+        return {"status": "error", "message": str(e)}
+    found = [{"port": p, "protocol": "tcp", "state": "open", "service": _service_name(p)} for p in open_ports]
+    return port_result(found, "native", start)
+
+
+def port_result(found, engine, start):
+    """The scan_open_ports() result for the open `found` ports ([{"port", ...}])."""
+    result = {"status": "ok", "ports": found, "engine": engine, "duration_s": round(time.monotonic() - start, 3)}
+    if LEGACY_OPEN_PORTS:
+        result["open_ports"] = [str(p["port"]) for p in found]
+    return result
@@ -4,6 +4,8 @@ import platform
 import json
 import os
 
+from app.commands import check_output
+
 def get_wifi_info():
     try:
         system = platform.system()
@@ -27,7 +29,7 @@ def get_wifi_info_macos():
 
         def find_wifi_device():
             try:
-                out = subprocess.check_output("networksetup -listallhardwareports", shell=True, text=True)
+                out = check_output("networksetup -listallhardwareports", shell=True, text=True)
                 dev = None
                 lines = out.splitlines()
                 for i, line in enumerate(lines):
@@ -46,7 +48,7 @@ def get_wifi_info_macos():
         # Preferred method: airport -I (if available)
         try:
             if os.path.exists(airport_path):
-                result = subprocess.check_output(f"{airport_path} -I", shell=True, text=True)
+                result = check_output(f"{airport_path} -I", shell=True, text=True)
                 for line in result.split('\n'):
                     if ':' in line:
                         key, value = line.strip().split(':', 1)
@@ -78,7 +80,7 @@ def get_wifi_info_macos():
         # Fallback: networksetup for SSID
         if 'SSID' not in wifi_info:
             try:
-                out = subprocess.check_output(f"networksetup -getairportnetwork {device}", shell=True, text=True)
+                out = check_output(f"networksetup -getairportnetwork {device}", shell=True, text=True)
                 m = re.search(r"Current Wi-Fi Network: (.*)", out)
                 if m:
                     ssid_value = m.group(1).strip()
@@ -92,7 +94,7 @@ def get_wifi_info_macos():
         if 'SSID' not in wifi_info:
             try:
                 # Use system_profiler as another fallback
-                out = subprocess.check_output("system_profiler SPAirPortDataType", shell=True, text=True)
+                out = check_output("system_profiler SPAirPortDataType", shell=True, text=True)
                 # Look for current network info
                 lines = out.split('\n')
                 for i, line in enumerate(lines):
@@ -152,7 +154,7 @@ def get_wifi_info_macos():
 
 def get_wifi_info_windows():
     try:
-        result = subprocess.check_output("netsh wlan show interfaces", shell=True, text=True, encoding='utf-8')
+        result = check_output("netsh wlan show interfaces", shell=True, text=True, encoding='utf-8')
 
         # Parse the relevant fields
         ssid = re.search(r"^\s*SSID\s*:\s(.+)", result, re.MULTILINE)
@@ -183,7 +185,7 @@ def get_wifi_info_windows():
 def get_wifi_info_linux():
     try:
         # Try iwconfig first
-        result = subprocess.check_output("iwconfig", shell=True, text=True, stderr=subprocess.DEVNULL)
+        result = check_output("iwconfig", shell=True, text=True, stderr=subprocess.DEVNULL)
         
         # Parse iwconfig output
         wifi_info = {}
@@ -0,0 +1,93 @@
+import os
+import sqlite3
+import threading
+import time
+
+DEFAULT_DB_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "bssid_sightings.db")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS sightings (
+    ssid        TEXT NOT NULL,
+    bssid       TEXT NOT NULL,
+    first_seen  REAL NOT NULL,
+    last_seen   REAL NOT NULL,
+    rssi        INTEGER,
+    channel     TEXT,
+    seen_count  INTEGER NOT NULL DEFAULT 1,
+    PRIMARY KEY (ssid, bssid)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS sightings_bssid ON sightings (bssid);
+CREATE INDEX IF NOT EXISTS sightings_last_seen ON sightings (last_seen);
+"""
+
+_UPSERT = """
+INSERT INTO sightings (ssid, bssid, first_seen, last_seen, rssi, channel)
+VALUES (?, ?, ?, ?, ?, ?)
+ON CONFLICT (ssid, bssid) DO UPDATE SET
+    last_seen = excluded.last_seen,
+    rssi = COALESCE(excluded.rssi, sightings.rssi),
+    channel = COALESCE(excluded.channel, sightings.channel),
+    seen_count = sightings.seen_count + 1
+"""
+
+
+class BSSIDStore:
+    """SQLite (WAL mode) table of every (SSID, BSSID) pair ever sighted.
+
+    Rows are keyed by (ssid, bssid) with extra indexes on bssid and
+    last_seen. A scan's sightings are upserted in one transaction.
+    """
+
+    def __init__(self, path=DEFAULT_DB_PATH):
+        self.path = path
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+
+    def record(self, aps, now=None):
+        """Upsert one scan's access points; return the (ssid, bssid) pairs seen for the first time."""
+        now = time.time() if now is None else now
+        rows = [(ap["ssid"], ap["bssid"], now, now, ap.get("rssi"), ap.get("channel")) for ap in aps]
+        with self._lock:
+            known = self._existing_pairs([(r[0], r[1]) for r in rows])
+            self._conn.execute("BEGIN")
+            try:
+                self._conn.executemany(_UPSERT, rows)
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        return [(r[0], r[1]) for r in rows if (r[0], r[1]) not in known]
+
+    def _existing_pairs(self, pairs):
+        ssids = sorted({ssid for ssid, _ in pairs})
+        if not ssids:
+            return set()
+        placeholders = ",".join("?" * len(ssids))
+        cur = self._conn.execute(f"SELECT ssid, bssid FROM sightings WHERE ssid IN ({placeholders})", ssids)
+        return set(cur.fetchall())
+
+    def first_seen_map(self):
+        """{(ssid, bssid): first_seen} for every known pair."""
+        with self._lock:
+            return {(s, b): t for s, b, t in self._conn.execute("SELECT ssid, bssid, first_seen FROM sightings")}
+
+    def sightings_for_ssid(self, ssid):
+        with self._lock:
+            cur = self._conn.execute(
+                "SELECT bssid, first_seen, last_seen, rssi, channel, seen_count FROM sightings WHERE ssid = ? "
+                "ORDER BY first_seen", (ssid,))
+            cols = ("bssid", "first_seen", "last_seen", "rssi", "channel", "seen_count")
+            return [dict(zip(cols, row)) for row in cur.fetchall()]
+
+    def count(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM sightings").fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,171 @@
+import os
+import threading
+import time
+
+from app import lazy_scapy
+from app.commands import FIXTURES_ENV
+
+# With the fixtures directory set (see app.commands), sniffers replay this capture
+FIXTURE_CAPTURE = "capture.pcap"
+# Replayed packets per second, per sniffer
+REPLAY_RATE = 500.0
+
+
+def sniffer_alive(sniffer):
+    """True while a background sniffer's capture thread is running."""
+    return sniffer is not None and sniffer.thread is not None and sniffer.thread.is_alive()
+
+
+def stop_sniffer(sniffer):
+    """Stop an AsyncSniffer (or compatible sniffer); return an error string or None."""
+    # An AsyncSniffer stopped right after start() may not have opened its socket yet
+    # (AsyncSniffer is only in lazy_scapy's namespace once one has been created)
+    is_async = "AsyncSniffer" in vars(lazy_scapy) and isinstance(sniffer, lazy_scapy.AsyncSniffer)
+    deadline = time.monotonic() + 1.0
+    while is_async and not hasattr(sniffer, "stop_cb") and sniffer_alive(sniffer) \
+            and time.monotonic() < deadline:
+        time.sleep(0.01)
+    try:
+        sniffer.stop()
+    except Exception as e:
+        return str(e)
+    return None
+
+
+class ScapySource:
+    """Live capture through scapy: what the detectors use outside of benchmarks."""
+
+    def sniffer(self, bpf, prn):
+        """An unstarted background sniffer calling prn(packet) for each match."""
+        # Frames are dissected on capture, so the layers must be registered first
+        lazy_scapy.load_layers()
+        return lazy_scapy.AsyncSniffer(filter=bpf, prn=prn, store=False)
+
+    def sniff(self, bpf, prn, timeout):
+        lazy_scapy.load_layers()
+        lazy_scapy.sniff(filter=bpf, prn=prn, timeout=timeout, store=0)
+
+    def srp(self, packets, timeout, iface=None):
+        lazy_scapy.load_layers()
+        return lazy_scapy.srp(packets, timeout=timeout, iface=iface, verbose=False)
+
+
+# The BPF expressions the detectors use, as scapy-side predicates
+_REPLAY_FILTERS = {
+    "arp": lambda p: p.haslayer(lazy_scapy.ARP),
+    "udp port 53": lambda p: p.haslayer(lazy_scapy.UDP) and p.haslayer(lazy_scapy.DNS),
+}
+
+
+class ReplaySniffer:
+    """AsyncSniffer stand-in that feeds recorded packets to prn on its own thread.
+
+    Packets are re-stamped with the current time, so alert windows and TTLs
+    behave as for live traffic. loop=True replays the capture until stop().
+    """
+
+    def __init__(self, packets, prn, rate=REPLAY_RATE, loop=True):
+        self.packets = packets
+        self.prn = prn
+        self.rate = rate
+        self.loop = loop
+        self.thread = None
+        self._stop = threading.Event()
+
+    def start(self):
+        self._stop.clear()
+        self.thread = threading.Thread(target=self._run, name="replay-sniffer", daemon=True)
+        self.thread.start()
+
+    def _run(self):
+        interval = 1.0 / self.rate if self.rate else 0.0
+        while not self._stop.is_set():
+            for packet in self.packets:
+                if self._stop.is_set():
+                    return
+                packet.time = time.time()
+                self.prn(packet)
+                if interval:
+                    self._stop.wait(interval)
+            if not self.loop:
+                return
+
+    def stop(self):
+        self._stop.set()
+        if self.thread is not None:
+            self.thread.join(timeout=2)
+
+
+class ReplaySource:
+    """Packet source backed by a pcap file, for running the detectors without root.
+
+    srp() answers ARP who-has requests with the replies recorded in the
+    capture (the last MAC seen per IP), after `srp_delay` seconds.
+    """
+
+    def __init__(self, path, rate=REPLAY_RATE, srp_delay=0.0):
+        self.path = path
+        self.rate = rate
+        self.srp_delay = srp_delay
+        self._packets = None
+        self._lock = threading.Lock()
+
+    def packets(self):
+        with self._lock:
+            if self._packets is None:
+                lazy_scapy.load_layers()
+                self._packets = list(lazy_scapy.rdpcap(self.path))
+            return self._packets
+
+    def _matching(self, bpf):
+        accept = _REPLAY_FILTERS.get(bpf, lambda p: True)
+        return [p for p in self.packets() if accept(p)]
+
+    def sniffer(self, bpf, prn):
+        return ReplaySniffer(self._matching(bpf), prn, rate=self.rate)
+
+    def sniff(self, bpf, prn, timeout):
+        sniffer = ReplaySniffer(self._matching(bpf), prn, rate=self.rate)
+        sniffer.start()
+        time.sleep(timeout)
+        sniffer.stop()
+
+    def srp(self, packets, timeout, iface=None):
+        ARP = lazy_scapy.ARP
+        bindings = {p[ARP].psrc: p[ARP].hwsrc for p in self._matching("arp") if p[ARP].op == 2}
+        answered, unanswered = [], []
+        for request in packets:
+            mac = bindings.get(request[ARP].pdst) if request.haslayer(ARP) else None
+            if mac is None:
+                unanswered.append(request)
+                continue
+            reply = lazy_scapy.Ether(src=mac, dst=request[lazy_scapy.Ether].src) / ARP(
+                op=2, hwsrc=mac, psrc=request[ARP].pdst, hwdst=request[lazy_scapy.Ether].src, pdst=request[ARP].psrc)
+            answered.append((request, reply))
+        if self.srp_delay:
+            time.sleep(min(self.srp_delay, timeout))
+        return answered, unanswered
+
+
+def _default_source():
+    fixtures = os.environ.get(FIXTURES_ENV)
+    if fixtures and os.path.exists(os.path.join(fixtures, FIXTURE_CAPTURE)):
+        return ReplaySource(os.path.join(fixtures, FIXTURE_CAPTURE))
+    return ScapySource()
+
+
+_source = _default_source()
+
+
+def get_packet_source():
+    return _source
+
+
+def set_packet_source(source):
+    """Swap the capture backend process-wide; returns the previous one.
+
+    Sniffers already running keep their old source until restarted.
+    """
+    global _source
+    previous, _source = _source, source
+    return previous
@@ -0,0 +1,113 @@
+"""Privileged capture daemon for split deployments.
+
+One root process owns the sniffers, raw sockets and nmap, and unprivileged
+HTTP workers forward the scanning endpoints to it over a Unix socket
+(see app.daemon_client):
+
+    sudo python -m app.capture_daemon --socket /run/wifi-scan.sock --group www-data
+    SCAN_DAEMON_SOCKET=/run/wifi-scan.sock gunicorn -w 4 -b 0.0.0.0:5001 run:app
+
+The daemon runs the same create_app() in-process, so every forwarded
+endpoint behaves exactly as in the single-process server (including the
+result cache, single-flight coalescing and streamed responses). It never
+writes the scan history: workers store the /scan/all results they forward,
+tagged with the daemon's X-Scan-Id so a coalesced run is stored once, and
+the SQLite file and its WAL stay owned by the workers' user.
+"""
+import argparse
+import json
+import logging
+import os
+import signal
+import socketserver
+import sys
+
+from app.daemon_client import SOCKET_ENV, recv_frame, send_frame
+
+# Named explicitly: under python -m this module is __main__, outside the "app" logger tree
+logger = logging.getLogger("app.capture_daemon")
+
+
+class _Handler(socketserver.BaseRequestHandler):
+    def handle(self):
+        from werkzeug.test import EnvironBuilder, run_wsgi_app
+
+        sock = self.request
+        while True:
+            try:
+                head = recv_frame(sock)
+                if head is None:
+                    return
+                meta = json.loads(head)
+                body = recv_frame(sock) or b""
+            except (OSError, ValueError) as e:
+                logger.warning("⚠️ Dropping worker connection: %s", e)
+                return
+            environ = EnvironBuilder(path=meta["path"], method=meta["method"],
+                                     query_string=meta.get("query_string", ""),
+                                     headers=meta.get("headers", {}), data=body).get_environ()
+            app_iter, status, headers = run_wsgi_app(self.server.app, environ, buffered=False)
+            try:
+                send_frame(sock, json.dumps({"status": status, "headers": list(headers.items())}).encode())
+                for chunk in app_iter:
+                    if chunk:
+                        send_frame(sock, chunk)
+                send_frame(sock, b"")
+            except OSError:
+                return
+            finally:
+                if hasattr(app_iter, "close"):
+                    app_iter.close()
+
+
+class CaptureDaemon(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """Serves forwarded requests against an in-process app, one thread per worker connection."""
+
+    daemon_threads = True
+    # Every worker process may open a burst of connections at once
+    request_queue_size = 128
+
+    def __init__(self, path, app, mode=0o660, group=None):
+        if os.path.exists(path):
+            os.unlink(path)
+        super().__init__(path, _Handler)
+        self.app = app
+        os.chmod(path, mode)
+        if group is not None:
+            import grp
+            os.chown(path, -1, grp.getgrnam(group).gr_gid)
+
+    def server_close(self):
+        super().server_close()
+        try:
+            os.unlink(self.server_address)
+        except OSError:
+            pass
+
+
+def main():
+    from app import create_app
+    from app.log_setup import configure_logging
+
+    parser = argparse.ArgumentParser(description="Privileged capture/scan daemon for split deployments.")
+    parser.add_argument("--socket", default=os.environ.get(SOCKET_ENV, "/run/wifi-scan.sock"))
+    parser.add_argument("--group", help="group allowed to connect (socket mode 0660)")
+    args = parser.parse_args()
+
+    configure_logging()
+    # The daemon serves the real detectors, never another daemon
+    os.environ.pop(SOCKET_ENV, None)
+    server = CaptureDaemon(args.socket, create_app(record_history=False), group=args.group)
+    # Unwind through server_close() on SIGTERM too, so the socket file is removed
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+    logger.info("🛰️ Capture daemon listening on %s", args.socket)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
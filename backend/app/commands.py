@@ -0,0 +1,248 @@
+import fnmatch
+import json
+import os
+import shutil
+import subprocess
+import tempfile
+import threading
+import time
+
+from app.metrics import SUBPROCESS_FAILURES, SUBPROCESS_SECONDS, SUBPROCESS_SPAWNS, command_name
+
+# Directory with commands.json (and capture.pcap, see packet_source); switches
+# every detector to recorded outputs so the app runs without Wi-Fi hardware or root
+FIXTURES_ENV = "WIFI_SCAN_FIXTURES"
+STREAM_CHUNK = 64 * 1024
+
+
+def command_key(cmd):
+    """Command line as one string with the program reduced to its base name."""
+    args = cmd.split() if isinstance(cmd, str) else [str(a) for a in cmd]
+    return " ".join([os.path.basename(args[0])] + args[1:]) if args else ""
+
+
+class SubprocessRunner:
+    """Runs real commands and reads real files.
+
+    Every detector goes through check_output()/iter_stdout(), and reads
+    kernel tables such as /proc/net/route through read_file().
+    """
+
+    def which(self, program):
+        return shutil.which(program)
+
+    def read_file(self, path):
+        with open(path) as f:
+            return f.read()
+
+    def check_output(self, cmd, **kwargs):
+        """subprocess.check_output with spawn, latency and failure metrics; same exceptions."""
+        name = command_name(cmd)
+        SUBPROCESS_SPAWNS.inc(name)
+        start = time.perf_counter()
+        try:
+            return subprocess.check_output(cmd, **kwargs)
+        except subprocess.TimeoutExpired:
+            SUBPROCESS_FAILURES.inc(name, "timeout")
+            raise
+        except subprocess.CalledProcessError:
+            SUBPROCESS_FAILURES.inc(name, "exit")
+            raise
+        except OSError:
+            SUBPROCESS_FAILURES.inc(name, "missing")
+            raise
+        finally:
+            SUBPROCESS_SECONDS.observe(time.perf_counter() - start, name)
+
+    def iter_stdout(self, cmd, timeout=None, chunk_size=STREAM_CHUNK):
+        """Yield stdout in chunks as the command writes it.
+
+        The command is killed after `timeout` seconds (TimeoutExpired), and a
+        non-zero exit raises CalledProcessError with stderr as its output,
+        once stdout is exhausted.
+        """
+        name = command_name(cmd)
+        SUBPROCESS_SPAWNS.inc(name)
+        start = time.perf_counter()
+        # stderr goes to a file: a pipe nobody reads until stdout ends can fill
+        # up and block the command, which then never closes stdout
+        errors = tempfile.TemporaryFile()
+        try:
+            proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=errors)
+        except OSError:
+            errors.close()
+            raise
+        timed_out = threading.Event()
+
+        def kill():
+            timed_out.set()
+            proc.kill()
+
+        timer = threading.Timer(timeout, kill) if timeout else None
+        if timer:
+            timer.start()
+        finished = False
+        try:
+            yield from iter(lambda: proc.stdout.read1(chunk_size), b"")
+            finished = True
+        finally:
+            if timer:
+                timer.cancel()
+            if not finished:
+                # The consumer stopped early (or raised); don't leave the command running
+                proc.kill()
+            proc.wait()
+            proc.stdout.close()
+            errors.seek(0)
+            stderr = errors.read().decode(errors="replace")
+            errors.close()
+            SUBPROCESS_SECONDS.observe(time.perf_counter() - start, name)
+
+        if timed_out.is_set():
+            SUBPROCESS_FAILURES.inc(name, "timeout")
+            raise subprocess.TimeoutExpired(cmd, timeout)
+        if proc.returncode:
+            SUBPROCESS_FAILURES.inc(name, "exit")
+            raise subprocess.CalledProcessError(proc.returncode, cmd, output=stderr.strip())
+
+
+class FixtureRunner:
+    """Answers commands from recorded outputs instead of running them.
+
+    `fixtures` maps fnmatch patterns over command_key() to records
+    {"stdout" or "file", "returncode", "delay"}; the first matching pattern
+    wins and "file" is relative to `base_dir`. An unmatched command behaves
+    like a missing program. Patterns starting with "/" answer read_file()
+    for that path instead, and an unmatched path like a missing file. "delay" (seconds) stands in for the command's
+    run time so latency benchmarks stay realistic.
+    """
+
+    def __init__(self, fixtures, base_dir="."):
+        self.fixtures = list(fixtures.items())
+        self.base_dir = base_dir
+        self.calls = 0
+
+    @classmethod
+    def from_file(cls, path):
+        with open(path, encoding="utf-8") as f:
+            return cls(json.load(f), base_dir=os.path.dirname(os.path.abspath(path)))
+
+    def _lookup(self, key):
+        for pattern, record in self.fixtures:
+            if fnmatch.fnmatchcase(key, pattern):
+                return record
+        raise FileNotFoundError(f"no recorded output for: {key}")
+
+    def _stdout(self, record):
+        if "file" in record:
+            with open(os.path.join(self.base_dir, record["file"]), "rb") as f:
+                return f.read()
+        return record.get("stdout", "").encode("utf-8")
+
+    def which(self, program):
+        # A program "exists" when some pattern is for it
+        name = os.path.basename(program)
+        return program if any(pattern.split(None, 1)[0] == name for pattern, _ in self.fixtures) else None
+
+    def read_file(self, path):
+        # Never the host's file: its routes and neighbours don't match the recording
+        return self._stdout(self._lookup(path)).decode("utf-8")
+
+    def _run(self, cmd):
+        record = self._lookup(command_key(cmd))
+        self.calls += 1
+        if record.get("delay"):
+            time.sleep(record["delay"])
+        out = self._stdout(record)
+        if record.get("returncode", 0):
+            raise subprocess.CalledProcessError(record["returncode"], cmd, output=out.decode("utf-8", "replace"))
+        return out
+
+    def check_output(self, cmd, text=False, encoding=None, **_ignored):
+        name = command_name(cmd)
+        SUBPROCESS_SPAWNS.inc(name)
+        start = time.perf_counter()
+        try:
+            out = self._run(cmd)
+        except subprocess.CalledProcessError:
+            SUBPROCESS_FAILURES.inc(name, "exit")
+            raise
+        except OSError:
+            SUBPROCESS_FAILURES.inc(name, "missing")
+            raise
+        finally:
+            SUBPROCESS_SECONDS.observe(time.perf_counter() - start, name)
+        return out.decode(encoding or "utf-8") if text or encoding else out
+
+    def iter_stdout(self, cmd, timeout=None, chunk_size=STREAM_CHUNK):
+        out = self.check_output(cmd)
+        for i in range(0, len(out), chunk_size):
+            yield out[i:i + chunk_size]
+
+
+class RecordingRunner(SubprocessRunner):
+    """Runs real commands and keeps their outputs, for building a FixtureRunner file."""
+
+    def __init__(self):
+        self.recorded = {}
+
+    def check_output(self, cmd, **kwargs):
+        try:
+            out = super().check_output(cmd, **kwargs)
+        except subprocess.CalledProcessError as e:
+            self.recorded[command_key(cmd)] = {"stdout": str(e.output or ""), "returncode": e.returncode}
+            raise
+        self.recorded[command_key(cmd)] = {"stdout": out if isinstance(out, str) else out.decode("utf-8", "replace")}
+        return out
+
+    def iter_stdout(self, cmd, timeout=None, chunk_size=STREAM_CHUNK):
+        chunks = []
+        for chunk in super().iter_stdout(cmd, timeout, chunk_size):
+            chunks.append(chunk)
+            yield chunk
+        self.recorded[command_key(cmd)] = {"stdout": b"".join(chunks).decode("utf-8", "replace")}
+
+    def read_file(self, path):
+        self.recorded[path] = {"stdout": super().read_file(path)}
+        return self.recorded[path]["stdout"]
+
+    def save(self, path):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.recorded, f, indent=2, sort_keys=True)
+
+
+def _default_runner():
+    fixtures = os.environ.get(FIXTURES_ENV)
+    if fixtures:
+        return FixtureRunner.from_file(os.path.join(fixtures, "commands.json"))
+    return SubprocessRunner()
+
+
+_runner = _default_runner()
+
+
+def get_runner():
+    return _runner
+
+
+def set_runner(runner):
+    """Swap the command backend process-wide; returns the previous one."""
+    global _runner
+    previous, _runner = _runner, runner
+    return previous
+
+
+def check_output(cmd, **kwargs):
+    return _runner.check_output(cmd, **kwargs)
+
+
+def iter_stdout(cmd, timeout=None, chunk_size=STREAM_CHUNK):
+    return _runner.iter_stdout(cmd, timeout, chunk_size)
+
+
+def which(program):
+    return _runner.which(program)
+
+
+def read_file(path):
+    return _runner.read_file(path)
@@ -0,0 +1,158 @@
+"""Client side of the split deployment (see app.capture_daemon).
+
+With SCAN_DAEMON_SOCKET set, create_app() forwards the scanning endpoints
+to the privileged capture daemon listening on that Unix socket. Wire
+format, per request on a persistent connection: a JSON frame
+{"method", "path", "query_string", "headers"} and a body frame; the reply
+is a JSON frame {"status", "headers"}, body chunk frames, and an empty
+frame. Frames are a 4-byte big-endian length and the payload.
+"""
+import json
+import os
+import socket
+import struct
+import threading
+
+SOCKET_ENV = "SCAN_DAEMON_SOCKET"
+# Endpoints the workers forward: everything that captures, probes or runs a scanner
+FORWARDED_PREFIXES = ("/scan/wifi", "/scan/arp", "/scan/dns", "/scan/open_ports", "/scan/lan",
+                      "/scan/rogue_ap", "/scan/all", "/scan/cache", "/scan/coalescing",
+                      "/scan/snapshot", "/scan/scheduler")
+# Request headers passed through; the rest are hop-by-hop or for the worker only
+FORWARDED_HEADERS = ("Content-Type", "Accept")
+# Forwarded endpoints whose results the workers store in the history; the
+# daemon tags each result so workers sharing a coalesced run store it once
+RECORDED_PATHS = ("/scan/all", "/scan/all/stream")
+SCAN_ID_HEADER = "X-Scan-Id"
+MAX_FRAME = 64 * 1024 * 1024
+CONNECT_TIMEOUT = 5.0
+# Long enough for a full /scan/all with the LAN sweep
+REPLY_TIMEOUT = 120.0
+# Idle daemon connections kept per worker process
+MAX_IDLE = 32
+
+_FRAME = struct.Struct("!I")
+
+
+def send_frame(sock, payload):
+    # One write for small frames; large bodies skip the concatenation copy
+    if len(payload) < 65536:
+        sock.sendall(_FRAME.pack(len(payload)) + payload)
+    else:
+        sock.sendall(_FRAME.pack(len(payload)))
+        sock.sendall(payload)
+
+
+def _recv_exact(sock, n):
+    buf = bytearray()
+    while len(buf) < n:
+        chunk = sock.recv(n - len(buf))
+        if not chunk:
+            raise ConnectionError("connection closed mid-frame")
+        buf += chunk
+    return bytes(buf)
+
+
+def recv_frame(sock):
+    """Next frame's payload, or None if the peer closed between frames."""
+    head = sock.recv(_FRAME.size, socket.MSG_WAITALL)
+    if not head:
+        return None
+    if len(head) < _FRAME.size:
+        head += _recv_exact(sock, _FRAME.size - len(head))
+    (length,) = _FRAME.unpack(head)
+    if length > MAX_FRAME:
+        raise ValueError(f"frame of {length} bytes exceeds {MAX_FRAME}")
+    return _recv_exact(sock, length) if length else b""
+
+
+class DaemonClient:
+    """Forwards requests to the capture daemon over a pool of kept-alive connections.
+
+    A connection is checked out for one request and returned once its reply
+    has been read to the end, so thread-per-request servers reuse them too.
+    """
+
+    def __init__(self, path, max_idle=MAX_IDLE):
+        self.path = path
+        self.max_idle = max_idle
+        self._idle = []
+        self._lock = threading.Lock()
+
+    def _connect(self):
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.settimeout(CONNECT_TIMEOUT)
+        sock.connect(self.path)
+        sock.settimeout(REPLY_TIMEOUT)
+        return sock
+
+    def _checkout(self):
+        with self._lock:
+            if self._idle:
+                return self._idle.pop(), True
+        return self._connect(), False
+
+    def _checkin(self, sock):
+        with self._lock:
+            if len(self._idle) < self.max_idle:
+                self._idle.append(sock)
+                return
+        sock.close()
+
+    def request(self, method, path, query_string="", headers=None, body=b""):
+        """Send one request; return (status line, header pairs, body chunk iterator).
+
+        Raises OSError when the daemon cannot be reached.
+        """
+        head = json.dumps({"method": method, "path": path, "query_string": query_string,
+                           "headers": headers or {}}).encode()
+        while True:
+            sock, reused = self._checkout()
+            try:
+                send_frame(sock, head)
+                send_frame(sock, body)
+                reply = recv_frame(sock)
+                if reply is None:
+                    raise ConnectionError("capture daemon closed the connection")
+                break
+            except TimeoutError:
+                # The daemon took the request; re-sending it would run the scan twice
+                sock.close()
+                raise
+            except OSError:
+                sock.close()
+                # An idle connection may have gone stale (daemon restart); retry on another
+                if not reused:
+                    raise
+        meta = json.loads(reply)
+        # The worker's own CORS layer sets these; duplicates make browsers reject the response
+        headers = [(k, v) for k, v in meta["headers"] if not k.lower().startswith("access-control-")]
+        return meta["status"], headers, self._chunks(sock)
+
+    def _chunks(self, sock):
+        done = False
+        try:
+            while True:
+                chunk = recv_frame(sock)
+                if chunk is None:
+                    raise ConnectionError("capture daemon closed the connection mid-reply")
+                if not chunk:
+                    done = True
+                    return
+                yield chunk
+        finally:
+            # A reply abandoned part-way (client went away, error) leaves the connection unusable
+            if done:
+                self._checkin(sock)
+            else:
+                sock.close()
+
+
+def is_forwarded(path):
+    return path.startswith(FORWARDED_PREFIXES)
+
+
+def get_client():
+    """Client for the daemon named by SCAN_DAEMON_SOCKET, or None when running standalone."""
+    path = os.environ.get(SOCKET_ENV)
+    return DaemonClient(path) if path else None
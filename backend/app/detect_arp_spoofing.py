@@ -1,106 +1,119 @@
-import subprocess
-import platform
-import re
-from scapy.all import ARP, Ether, srp
+import logging
+import threading
+import time
+from collections import deque
 
+from app import lazy_scapy
+from app.capture import get_packet_source, sniffer_alive, stop_sniffer
+from app.commands import read_file
+from app.gateway import get_gateway_ip
+from app.log_setup import SampledLogger, configure_logging
+from app.metrics import SRP_FAILURES, SRP_SECONDS, register_collector
+
+ARP_OP_REPLY = 2  # "is-at"
+MAX_ARP_ALERTS = 200
+
+# Kernel neighbour cache: "IP address  HW type  Flags  HW address  Mask  Device"
+PROC_NET_ARP = "/proc/net/arp"
+ATF_COM = 0x2  # entry is complete
+# /proc/net/arp is re-read at most this often when answering a query
+ARP_SNAPSHOT_INTERVAL = 5.0
+# Conflicts newer than this keep the verdict at "threat"
+ARP_ALERT_WINDOW_SECONDS = 600
+
+logger = logging.getLogger(__name__)
+packet_log = SampledLogger(logger)
+
+
+class ARPBindingTable:
+    """IP→MAC bindings learned from ARP replies and gratuitous ARPs.
+
+    Applies the same rule as detect_arp_spoofing(): a host whose MAC changes
+    between replies is flagged, with the first MAC seen as the expected one.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.bindings = {}  # ip -> {"mac", "first_seen", "last_seen"}
+        self.alerts = deque(maxlen=MAX_ARP_ALERTS)
+        self.packets_seen = 0
+
+    def process_packet(self, packet):
+        if not packet.haslayer(lazy_scapy.ARP):
+            return
+        arp = packet[lazy_scapy.ARP]
+        # Replies, plus gratuitous announcements (sender IP == target IP)
+        if arp.op != ARP_OP_REPLY and arp.psrc != arp.pdst:
+            return
+        self.packets_seen += 1
+        packet_log.log("ARP %s is-at %s", arp.psrc, arp.hwsrc)
+        self.observe(arp.psrc, arp.hwsrc, now=float(packet.time))
+
+    def observe(self, ip, mac, now=None):
+        """Record ip→mac; return an alert dict when it conflicts with a known binding."""
+        now = time.time() if now is None else now
+        mac = mac.lower()
+        with self._lock:
+            binding = self.bindings.get(ip)
+            if binding is None:
+                self.bindings[ip] = {"mac": mac, "first_seen": now, "last_seen": now}
+                return None
+            binding["last_seen"] = now
+            if binding["mac"] == mac:
+                return None
+            alert = {
+                "ip": ip,
+                "expected_mac": binding["mac"],
+                "received_mac": mac,
+                "timestamp": now,
+                "message": "ARP spoofing detected!",
+            }
+            binding.update(mac=mac, first_seen=now)
+        logger.warning("🚨 ALERT! ARP binding for %s changed: %s → %s", ip, alert["expected_mac"], mac)
+        self.alerts.append(alert)
+        return alert
 
-def get_gateway_ip():
-    """Detect default gateway IP across platforms without invoking wrong OS tools."""
-    system = platform.system()
-    try:
-        if system == "Windows":
-            # Prefer `ipconfig` parsing; some environments require checking the next line
-            output = subprocess.check_output("ipconfig", shell=True, text=True)
-            lines = output.splitlines()
-            for i, line in enumerate(lines):
-                if "Default Gateway" in line:
-                    parts = line.split(":")
-                    if len(parts) == 2 and parts[1].strip():
-                        gw = parts[1].strip()
-                        print(f"✅ Gateway IP detected: {gw}")
-                        return gw
-                    # Sometimes the value is on the next line
-                    if i + 1 < len(lines):
-                        nxt = lines[i + 1].strip()
-                        if nxt:
-                            print(f"✅ Gateway IP detected: {nxt}")
-                            return nxt
-
-        elif system == "Darwin":  # macOS
-            output = subprocess.check_output("route -n get default | grep 'gateway'", shell=True, text=True)
-            m = re.search(r"gateway:\s*([0-9\.]+)", output)
-            if m:
-                gw = m.group(1)
-                print(f"✅ Gateway IP detected: {gw}")
-                return gw
-
-        else:  # Linux and others
-            # Try `ip route` first
-            try:
-                output = subprocess.check_output("ip route show default", shell=True, text=True)
-                m = re.search(r"default via ([0-9\.]+)", output)
-                if m:
-                    gw = m.group(1)
-                    print(f"✅ Gateway IP detected: {gw}")
-                    return gw
-            except Exception:
-                pass
-
-            # Fallback to legacy `route -n`
-            try:
-                output = subprocess.check_output("route -n | grep '^0.0.0.0'", shell=True, text=True)
-                m = re.search(r"^0\.0\.0\.0\s+([0-9\.]+)", output)
-                if m:
-                    gw = m.group(1)
-                    print(f"✅ Gateway IP detected: {gw}")
-                    return gw
-            except Exception:
-                pass
-
-        print("❌ Could not find default gateway.")
-        return None
-    except Exception as e:
-        print("❌ Error getting gateway IP:", e)
-        return None
 
 def get_mac(ip):
-    arp_request = ARP(pdst=ip)
-    broadcast = Ether(dst="ff:ff:ff:ff:ff:ff")
+    arp_request = lazy_scapy.ARP(pdst=ip)
+    broadcast = lazy_scapy.Ether(dst="ff:ff:ff:ff:ff:ff")
     packet = broadcast / arp_request
     try:
-        answered = srp(packet, timeout=3, verbose=False)[0]
+        with SRP_SECONDS.time("get_mac"):
+            answered = get_packet_source().srp(packet, timeout=3)[0]
     except Exception as e:
         # Likely a permissions issue on macOS/Linux when not run as root
-        print("⚠️ ARP request failed:", e)
+        SRP_FAILURES.inc("get_mac", "error")
+        logger.warning("⚠️ ARP request failed: %s", e)
         return None
 
     if answered:
         return answered[0][1].hwsrc
+    SRP_FAILURES.inc("get_mac", "no_answer")
     return None
 
 def detect_arp_spoofing():
-    print("🔍 Starting ARP spoofing detection...\n")
+    logger.info("🔍 Starting ARP spoofing detection...")
     gateway_ip = get_gateway_ip()
     if not gateway_ip:
         msg = "Unable to detect gateway IP"
-        print(f"❌ {msg}")
+        logger.error("❌ %s", msg)
         return {"status": "unknown", "message": msg}
 
     original_mac = get_mac(gateway_ip)
     if not original_mac:
         msg = "Could not retrieve MAC address of gateway (permissions or connectivity)"
-        print(f"❌ {msg}")
+        logger.error("❌ %s", msg)
         return {"status": "unknown", "message": msg,
                 "recommendation": "Try running with elevated privileges or check network connectivity."}
 
     current_mac = get_mac(gateway_ip)
     if not current_mac:
         msg = "No ARP reply from gateway"
-        print(f"⚠️ {msg}")
+        logger.warning("⚠️ %s", msg)
         return {"status": "warning", "message": msg}
     elif current_mac != original_mac:
-        print("🚨 ALERT! ARP spoofing detected!")
-        print(f"Expected MAC: {original_mac}, but got: {current_mac}")
+        logger.warning("🚨 ALERT! ARP spoofing detected! Expected MAC: %s, but got: %s", original_mac, current_mac)
         return {
             "status": "threat",
             "message": "ARP spoofing detected!",
@@ -109,7 +122,7 @@ def detect_arp_spoofing():
             "recommendation": "Avoid entering sensitive information on this network."
         }
     else:
-        print("✅ No spoofing detected. Gateway MAC is unchanged.")
+        logger.info("✅ No spoofing detected. Gateway MAC is unchanged.")
         return {
             "status": "safe",
             "message": "No ARP spoofing detected.",
@@ -117,7 +130,171 @@ def detect_arp_spoofing():
             "gateway_mac": original_mac
         }
 
+def read_proc_arp(path=PROC_NET_ARP):
+    """Return [(ip, mac)] for complete entries in the kernel ARP cache."""
+    entries = []
+    try:
+        lines = read_file(path).splitlines()[1:]
+    except OSError:
+        return entries
+    for line in lines:
+        fields = line.split()
+        if len(fields) < 6 or not int(fields[2], 16) & ATF_COM:
+            continue
+        if fields[3] != "00:00:00:00:00:00":
+            entries.append((fields[0], fields[3]))
+    return entries
+
+
+class ARPMonitor:
+    """Passive ARP watcher that answers /scan/arp from memory.
+
+    A background sniffer feeds every ARP reply and gratuitous ARP into an
+    ARPBindingTable, and the kernel's /proc/net/arp cache is folded in when
+    a verdict is requested, so conflicts are caught for every host on the
+    segment without sending probes.
+    """
+
+    def __init__(self, table=None):
+        self._lock = threading.Lock()
+        self._sniffer = None
+        self.table = table if table is not None else ARPBindingTable()
+        self.started_at = None
+        self.last_snapshot_at = 0.0
+        self.last_error = None
+        # Cleared by an explicit stop() so get_arp_verdict() won't restart it
+        self.autostart = True
+
+    def is_running(self):
+        return sniffer_alive(self._sniffer)
+
+    def start(self):
+        """Start the background ARP sniffer if it is not already running."""
+        with self._lock:
+            self.autostart = True
+            if self.is_running():
+                return self.health()
+            self.last_error = None
+            try:
+                self._sniffer = get_packet_source().sniffer("arp", self.table.process_packet)
+                self._sniffer.start()
+                self.started_at = time.time()
+            except Exception as e:
+                self._sniffer = None
+                self.last_error = str(e)
+        return self.health()
+
+    def stop(self):
+        """Stop the background sniffer; learned bindings and alerts are kept."""
+        with self._lock:
+            self.autostart = False
+            sniffer, self._sniffer = self._sniffer, None
+        if sniffer is not None:
+            self.last_error = stop_sniffer(sniffer)
+        self.started_at = None
+        return self.health()
+
+    def snapshot(self, force=False):
+        """Fold the kernel ARP cache into the binding table (rate limited)."""
+        now = time.time()
+        if not force and now - self.last_snapshot_at < ARP_SNAPSHOT_INTERVAL:
+            return
+        self.last_snapshot_at = now
+        for ip, mac in read_proc_arp():
+            self.table.observe(ip, mac, now=now)
+
+    def health(self):
+        return {
+            "running": self.is_running(),
+            "started_at": self.started_at,
+            "packets_seen": self.table.packets_seen,
+            "hosts_tracked": len(self.table.bindings),
+            "alerts": len(self.table.alerts),
+            "last_snapshot_at": self.last_snapshot_at or None,
+            "error": self.last_error,
+        }
+
+    def _shared_gateway_mac(self, gateway_ip, gateway_mac):
+        """Other IPs currently bound to the gateway's MAC (a poisoned cache looks like this)."""
+        with self.table._lock:
+            return sorted(ip for ip, b in self.table.bindings.items()
+                          if b["mac"] == gateway_mac and ip != gateway_ip)
+
+    def verdict(self):
+        """Current ARP spoofing verdict from the bindings learned so far."""
+        self.snapshot()
+        gateway_ip = get_gateway_ip()
+        binding = self.table.bindings.get(gateway_ip) if gateway_ip else None
+        gateway_mac = binding["mac"] if binding else None
+
+        cutoff = time.time() - ARP_ALERT_WINDOW_SECONDS
+        recent = [a for a in list(self.table.alerts) if a["timestamp"] >= cutoff]
+        if recent:
+            # Prefer the gateway's own conflict for the top-level MAC fields
+            first = next((a for a in recent if a["ip"] == gateway_ip), recent[0])
+            return {
+                "status": "threat",
+                "message": "ARP spoofing detected!",
+                "expected_mac": first["expected_mac"],
+                "received_mac": first["received_mac"],
+                "details": recent,
+                "recommendation": "Avoid entering sensitive information on this network."
+            }
+
+        shared = self._shared_gateway_mac(gateway_ip, gateway_mac) if gateway_mac else []
+        if shared:
+            return {
+                "status": "warning",
+                "message": "Gateway MAC is also claimed by other hosts.",
+                "gateway_ip": gateway_ip,
+                "gateway_mac": gateway_mac,
+                "shared_with": shared,
+                "recommendation": "Avoid entering sensitive information on this network."
+            }
+
+        if not gateway_mac:
+            msg = "Unable to detect gateway IP" if not gateway_ip else "Gateway MAC not observed yet"
+            if not self.is_running() and self.last_error:
+                msg += f" (ARP monitor not running: {self.last_error})"
+            return {"status": "unknown", "message": msg,
+                    "recommendation": "Try running with elevated privileges or check network connectivity."}
+
+        return {
+            "status": "safe",
+            "message": "No ARP spoofing detected.",
+            "gateway_ip": gateway_ip,
+            "gateway_mac": gateway_mac,
+            "hosts_tracked": len(self.table.bindings),
+            "monitoring_since": self.started_at,
+        }
+
+
+arp_monitor = ARPMonitor()
+
+
+@register_collector
+def _arp_metrics():
+    table = arp_monitor.table
+    return [
+        ("wifi_scan_sniffer_running", "gauge", "1 while the background sniffer is capturing.",
+         [({"sniffer": "arp"}, int(arp_monitor.is_running()))]),
+        ("wifi_scan_sniffer_packets_total", "counter", "Packets handed to the detector.",
+         [({"sniffer": "arp"}, table.packets_seen)]),
+        ("wifi_scan_arp_hosts_tracked", "gauge", "IP to MAC bindings held by the ARP monitor.",
+         [({}, len(table.bindings))]),
+        ("wifi_scan_arp_alerts", "gauge", "ARP spoofing alerts currently held.", [({}, len(table.alerts))]),
+    ]
+
+
+def get_arp_verdict():
+    """Return the passive monitor's verdict, starting the monitor on first use."""
+    if arp_monitor.autostart and arp_monitor._sniffer is None and arp_monitor.last_error is None:
+        arp_monitor.start()
+    return arp_monitor.verdict()
+
+
 # Optional: run standalone
 if __name__ == "__main__":
+    configure_logging()
     print(detect_arp_spoofing())
 
@@ -1,42 +1,205 @@
-from scapy.all import sniff, DNS, DNSQR, DNSRR
-from collections import defaultdict
+import logging
+import threading
+import time
+from collections import deque
+
+from app import lazy_scapy
+from app.capture import get_packet_source, sniffer_alive, stop_sniffer
+from app.dns_history import DNSHistory
+from app.dns_fastpath import RawDNSSniffer, fast_path_available
+from app.log_setup import SampledLogger, configure_logging
+from app.metrics import register_collector
+
+# Alerts newer than this keep the verdict at "warning"
+ALERT_WINDOW_SECONDS = 600
+MAX_ALERTS = 200
+# Use the raw AF_PACKET parser instead of scapy dissection (Linux only)
+USE_FAST_PATH = False
+
+logger = logging.getLogger(__name__)
+# Runs on the sniffer thread for every response, so only a sample is logged
+packet_log = SampledLogger(logger)
+
+
+class DNSMonitor:
+    """Long-running DNS response sniffer that owns the domain→IP history.
+
+    The sniffer runs on its own capture thread and updates the history
+    and alerts continuously; verdict() only reads that state, so it answers
+    in constant time without sniffing on the caller's thread.
+    """
+
+    def __init__(self, history=None):
+        self._lock = threading.Lock()
+        self._sniffer = None
+        self.dns_history = history if history is not None else DNSHistory()
+        self.alerts = deque(maxlen=MAX_ALERTS)
+        self.packets_seen = 0
+        # Responses without a question or answer record
+        self.packets_skipped = 0
+        self.started_at = None
+        self.last_packet_at = None
+        self.last_error = None
+        # Cleared by an explicit stop() so get_dns_verdict() won't restart it
+        self.autostart = True
+
+    def process_packet(self, packet):
+        if packet.haslayer(lazy_scapy.DNS) and packet[lazy_scapy.DNS].qr == 1:  # DNS response
+            if not packet.haslayer(lazy_scapy.DNSQR) or not packet.haslayer(lazy_scapy.DNSRR):
+                self.packets_skipped += 1
+                return
+            domain = packet[lazy_scapy.DNSQR].qname.decode('utf-8').strip(".")
+            answer = packet[lazy_scapy.DNSRR]
+            ip = answer.rdata
+
+            if isinstance(ip, bytes):
+                ip = ip.decode('utf-8')
+
+            # Capture time, so replayed pcaps expire records on their own clock
+            now = float(packet.time)
+            self.packets_seen += 1
+            self.last_packet_at = now
+            packet_log.log("DNS response %s -> %s", domain, ip)
+            self.record(domain, ip, ttl=answer.ttl, now=now)
+
+    def record(self, domain, ip, ttl=None, now=None):
+        """Add one domain→IP answer to the history, raising an alert on a change."""
+        now = time.time() if now is None else now
+        previous = self.dns_history.observe(domain, ip, ttl, now=now)
+        if previous is None:
+            return
+        logger.warning("🚨 DNS Spoofing Alert! domain=%s previous=%s new=%s", domain, previous, ip)
+
+        # deque.append is atomic, so the sniffer thread needs no lock here
+        self.alerts.append({
+            "domain": domain,
+            "old_ips": previous,
+            "new_ip": ip,
+            "timestamp": now,
+            "message": "Suspicious DNS response detected. May indicate an attack."
+        })
+
+    def is_running(self):
+        return sniffer_alive(self._sniffer)
+
+    def _record_raw(self, domain, ip, ttl):
+        self.packets_seen += 1
+        self.last_packet_at = time.time()
+        packet_log.log("DNS response %s -> %s", domain, ip)
+        self.record(domain, ip, ttl=ttl)
+
+    def start(self, fast_path=None):
+        """Start the background sniffer if it is not already running."""
+        if fast_path is None:
+            fast_path = USE_FAST_PATH
+        with self._lock:
+            self.autostart = True
+            if self.is_running():
+                return self.health()
+            self.last_error = None
+            try:
+                if fast_path and fast_path_available():
+                    self._sniffer = RawDNSSniffer(self._record_raw)
+                else:
+                    self._sniffer = get_packet_source().sniffer("udp port 53", self.process_packet)
+                self._sniffer.start()
+                self.started_at = time.time()
+            except Exception as e:
+                self._sniffer = None
+                self.last_error = str(e)
+        return self.health()
+
+    def stop(self):
+        """Stop the background sniffer; history and alerts are kept."""
+        with self._lock:
+            self.autostart = False
+            sniffer, self._sniffer = self._sniffer, None
+        if sniffer is not None:
+            self.last_error = stop_sniffer(sniffer)
+        self.started_at = None
+        return self.health()
+
+    def health(self):
+        return {
+            "running": self.is_running(),
+            "fast_path": isinstance(self._sniffer, RawDNSSniffer),
+            "started_at": self.started_at,
+            "last_packet_at": self.last_packet_at,
+            "packets_seen": self.packets_seen,
+            "history": self.dns_history.stats(),
+            "alerts": len(self.alerts),
+            "error": self.last_error,
+        }
+
+    def verdict(self):
+        """Current DNS spoofing verdict from the state gathered so far."""
+        if not self.is_running():
+            return {
+                "status": "unknown",
+                "message": f"DNS monitor is not running{': ' + self.last_error if self.last_error else ''}",
+                "recommendation": "Run with appropriate permissions or disable DNS scan in dev"
+            }
+
+        cutoff = time.time() - ALERT_WINDOW_SECONDS
+        recent = [a for a in list(self.alerts) if a["timestamp"] >= cutoff]
+        if recent:
+            return {
+                "status": "warning",
+                "threat": "Possible DNS Spoofing Detected",
+                "details": recent,
+                "monitoring_since": self.started_at,
+                "recommendation": "Avoid entering sensitive information while using this Wi-Fi."
+            }
+        else:
+            return {
+                "status": "safe",
+                "message": "No DNS spoofing detected.",
+                "monitoring_since": self.started_at,
+                "recommendation": "Wi-Fi appears safe for now."
+            }
+
+
+dns_monitor = DNSMonitor()
+
+
+@register_collector
+def _dns_metrics():
+    sniffer = dns_monitor._sniffer
+    unparsed = dns_monitor.packets_skipped
+    dropped = []
+    if isinstance(sniffer, RawDNSSniffer):
+        unparsed += sniffer.unparsed
+        dropped.append(({"sniffer": "dns", "reason": "kernel"}, sniffer.read_kernel_drops()))
+    dropped.append(({"sniffer": "dns", "reason": "unparsed"}, unparsed))
+    return [
+        ("wifi_scan_sniffer_running", "gauge", "1 while the background sniffer is capturing.",
+         [({"sniffer": "dns"}, int(dns_monitor.is_running()))]),
+        ("wifi_scan_sniffer_packets_total", "counter", "Packets handed to the detector.",
+         [({"sniffer": "dns"}, dns_monitor.packets_seen)]),
+        ("wifi_scan_sniffer_dropped_total", "counter", "Packets captured but not used, by reason.", dropped),
+        ("wifi_scan_dns_alerts", "gauge", "DNS spoofing alerts currently held.",
+         [({}, len(dns_monitor.alerts))]),
+    ]
 
-# History of domain-IP mapping
-dns_history = defaultdict(set)
-spoof_alerts = []  # List to store alerts for Flask/terminal
 
 def process_packet(packet):
-    if packet.haslayer(DNS) and packet[DNS].qr == 1:  # DNS response
-        domain = packet[DNSQR].qname.decode('utf-8').strip(".")
-        ip = packet[DNSRR].rdata
-
-        if isinstance(ip, bytes):
-            ip = ip.decode('utf-8')
-
-        if domain not in dns_history:
-            dns_history[domain].add(ip)
-            print(f"🌐 New domain: {domain} → {ip}")
-        elif ip not in dns_history[domain]:
-            print(f"\n🚨 DNS Spoofing Alert!")
-            print(f"❗ Domain: {domain}")
-            print(f"🧠 Previous IPs: {dns_history[domain]}")
-            print(f"⚠️ New unexpected IP: {ip}\n")
-
-            spoof_alerts.append({
-                "domain": domain,
-                "old_ips": list(dns_history[domain]),
-                "new_ip": ip,
-                "message": "Suspicious DNS response detected. May indicate an attack."
-            })
-            dns_history[domain].add(ip)
+    dns_monitor.process_packet(packet)
+
+
+def get_dns_verdict():
+    """Return the background monitor's verdict, starting the monitor on first use."""
+    if dns_monitor.autostart and dns_monitor._sniffer is None and dns_monitor.last_error is None:
+        dns_monitor.start()
+    return dns_monitor.verdict()
+
 
 def start_dns_monitor(timeout=10):
-    global spoof_alerts
-    spoof_alerts = []  # Reset before sniffing
+    """One-shot blocking sniff for `timeout` seconds (standalone/CLI use)."""
+    monitor = DNSMonitor()
 
-    print("🌐 Monitoring DNS responses... (Sniffing for", timeout, "seconds)")
+    logger.info("🌐 Monitoring DNS responses... (sniffing for %s seconds)", timeout)
     try:
-        sniff(filter="udp port 53", prn=process_packet, timeout=timeout, store=0)
+        get_packet_source().sniff("udp port 53", monitor.process_packet, timeout)
     except Exception as e:
         # Permissions/libpcap issues commonly surface here on macOS without sudo
         return {
@@ -45,11 +208,11 @@ def start_dns_monitor(timeout=10):
             "recommendation": "Run with appropriate permissions or disable DNS scan in dev"
         }
 
-    if spoof_alerts:
+    if monitor.alerts:
         return {
             "status": "warning",
             "threat": "Possible DNS Spoofing Detected",
-            "details": spoof_alerts,
+            "details": list(monitor.alerts),
             "recommendation": "Avoid entering sensitive information while using this Wi-Fi."
         }
     else:
@@ -61,6 +224,7 @@ def start_dns_monitor(timeout=10):
 
 # === If run directly from terminal ===
 if __name__ == "__main__":
+    configure_logging()
     result = start_dns_monitor(timeout=10)
     print("\n=== Detection Summary ===")
     print(result)
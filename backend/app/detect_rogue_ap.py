@@ -1,151 +1,497 @@
+import os
 import subprocess
 import platform
 import re
+import threading
+import time
 from collections import defaultdict
 
+from app.bssid_store import BSSIDStore
+from app.commands import check_output
+from app.metrics import ROGUE_AP_SCAN_SECONDS, register_collector
 
-def _parse_windows_netsh(output: str):
-    networks = defaultdict(set)
-    current_ssid = None
-    for line in output.splitlines():
-        ssid_match = re.search(r"SSID\s+\d+\s+:\s+(.*)", line)
-        bssid_match = re.search(r"BSSID\s+\d+\s+:\s+([0-9A-Fa-f:]{17})", line)
-        if ssid_match:
-            current_ssid = ssid_match.group(1).strip()
-        elif bssid_match and current_ssid:
-            networks[current_ssid].add(bssid_match.group(1).strip())
-    return networks
 
+_BSSID = r"[0-9A-Fa-f]{2}(?::[0-9A-Fa-f]{2}){5}"
+
+# netsh: "SSID 1 : name", "BSSID 1 : mac", "Signal : 80%", "Channel : 6", "Authentication : WPA2-Personal"
+_NETSH_LINE = re.compile(r"^\s*(SSID|BSSID|Signal|Channel|Authentication)(?:\s+\d+)?\s*:\s?(.*?)\s*$")
+# airport -s: right-aligned SSID, then BSSID RSSI CHANNEL HT CC SECURITY
+_AIRPORT_ROW = re.compile(r"^\s*(.*?)\s+(" + _BSSID + r")\s+(-?\d+)\s+(\S+)\s+\S+\s+\S+\s+(.*?)\s*$")
+# Key ends at the first ": " or a trailing ':', so SSIDs containing ':' survive
+_PROFILER_KEY = re.compile(r"^(\s*)(.+?):(?:\s+(.*?))?\s*$")
+_PROFILER_SIGNAL = re.compile(r"(-?\d+)\s*dBm")
+# iwlist scan: cells start with "Cell NN - Address: mac"
+_IWLIST_CELL = re.compile(r"Cell \d+ - Address: (" + _BSSID + r")")
+_IWLIST_ESSID = re.compile(r'ESSID:"(.*)"')
+_IWLIST_SIGNAL = re.compile(r"Signal level=(-?\d+)")
+_IWLIST_CHANNEL = re.compile(r"Channel[:\s](\d+)")
+# iw dev <iface> scan dump: blocks start with "BSS mac(on iface)"
+_IW_BSS = re.compile(r"^BSS (" + _BSSID + r")")
+_IW_FIELD = re.compile(r"^\t(SSID|signal|freq|DS Parameter set|RSN|WPA|capability):\s?(.*)$")
+_IW_SIGNAL = re.compile(r"(-?\d+(?:\.\d+)?) dBm")
+
+
+def _dbm_to_percent(dbm):
+    # Same mapping the Wi-Fi info parsers use
+    if dbm >= -50:
+        return 100
+    if dbm <= -100:
+        return 0
+    return 2 * (dbm + 100)
+
+
+def _percent_to_dbm(percent):
+    return percent // 2 - 100
 
-def _parse_macos_airport(output: str):
-    # airport -s prints table-like rows; columns typically: SSID BSSID RSSI CHANNEL HT CC SECURITY
-    networks = defaultdict(set)
-    lines = output.splitlines()
-    # Skip header if present
-    for line in lines[1:]:
-        parts = line.split()
-        if len(parts) >= 2:
-            # SSID may contain spaces; BSSID has fixed format xx:xx:xx:xx:xx:xx
-            # Find the part that looks like a BSSID
-            bssid_idx = None
+
+def _ap(ssid, bssid, rssi=None, signal=None, channel=None, security=None):
+    if signal is None and rssi is not None:
+        signal = _dbm_to_percent(rssi)
+    if rssi is None and signal is not None:
+        rssi = _percent_to_dbm(signal)
+    return {"ssid": ssid, "bssid": bssid.lower(), "rssi": rssi, "signal": signal,
+            "channel": channel, "security": security}
+
+
+def _freq_to_channel(freq):
+    if freq == 2484:
+        return 14
+    if 2412 <= freq <= 2472:
+        return (freq - 2407) // 5
+    if 5955 <= freq <= 7115:  # 6 GHz
+        return (freq - 5950) // 5
+    if 5000 <= freq <= 5900:
+        return (freq - 5000) // 5
+    return None
+
+
+def _parse_windows_netsh(output: str):
+    aps = []
+    ssid = auth = None
+    current = None
+    for line in output.splitlines():
+        m = _NETSH_LINE.match(line)
+        if not m:
+            continue
+        key, value = m.groups()
+        if key == "SSID":
+            ssid, auth, current = value, None, None
+        elif key == "Authentication":
+            auth = value
+        elif key == "BSSID" and ssid:
+            current = _ap(ssid, value, security=auth)
+            aps.append(current)
+        elif current is not None:
+            if key == "Signal" and value.rstrip("%").isdigit():
+                current["signal"] = int(value.rstrip("%"))
+                current["rssi"] = _percent_to_dbm(current["signal"])
+            elif key == "Channel":
+                current["channel"] = value
+    return aps
 
 
 def _parse_macos_system_profiler(output: str):
     """Parse system_profiler SPAirPortDataType output for network information"""
-    networks = defaultdict(set)
-    lines = output.splitlines()
+    aps = []
     current_ssid = None
-    
-    for line in lines:
-        line = line.strip()
-        # Look for network names (SSIDs)
-        if line and not line.startswith(' ') and ':' not in line and line != 'Wi-Fi:':
-            # This might be an SSID
-            current_ssid = line.strip()
-        elif 'MAC Address:' in line or 'BSSID:' in line:
-            # Extract MAC/BSSID
-            bssid_match = re.search(r'([0-9A-Fa-f:]{17})', line)
-            if bssid_match and current_ssid:
-                networks[current_ssid].add(bssid_match.group(1))
-    
-    return networks
+    ssid_indent = None
+    fields = {}
+
+    def flush():
+        if current_ssid and fields.get("BSSID"):
+            rssi = _PROFILER_SIGNAL.search(fields.get("Signal / Noise", ""))
+            aps.append(_ap(current_ssid, fields["BSSID"], rssi=int(rssi.group(1)) if rssi else None,
+                           channel=fields.get("Channel", "").split(" ")[0] or None,
+                           security=fields.get("Security")))
+
+    for line in output.splitlines():
+        m = _PROFILER_KEY.match(line)
+        if not m:
+            continue
+        indent, key, value = len(m.group(1)), m.group(2).strip(), m.group(3) or ""
+        if key in ("Current Network Information", "Other Local Wi-Fi Networks"):
+            flush()
+            current_ssid, ssid_indent, fields = None, indent, {}
+        elif ssid_indent is not None and not value and indent > ssid_indent and \
+                (current_ssid is None or indent <= ssid_indent + 2):
+            # A bare "Name:" line one level below the section header is an SSID
+            flush()
+            current_ssid, fields = key, {}
+        elif current_ssid is not None:
+            fields[key] = value
+    flush()
+    return aps
 
 
 def _parse_macos_airport(output: str):
-    # airport -s prints table-like rows; columns typically: SSID BSSID RSSI CHANNEL HT CC SECURITY
-    networks = defaultdict(set)
-    lines = output.splitlines()
-    # Skip header if present
-    for line in lines[1:]:
-        parts = line.split()
-        if len(parts) >= 2:
-            # SSID may contain spaces; BSSID has fixed format xx:xx:xx:xx:xx:xx
-            # Find the part that looks like a BSSID
-            bssid_idx = None
-            for i, p in enumerate(parts):
-                if re.fullmatch(r"[0-9A-Fa-f]{2}(:[0-9A-Fa-f]{2}){5}", p):
-                    bssid_idx = i
-                    break
-            if bssid_idx is not None:
-                bssid = parts[bssid_idx]
-                ssid = " ".join(parts[:bssid_idx]).strip()
-                if ssid:
-                    networks[ssid].add(bssid)
-    return networks
-
-
-def _parse_linux_nmcli(output: str):
-    # nmcli dev wifi list outputs columns with BSSID first typically
-    networks = defaultdict(set)
-    lines = output.splitlines()
-    for line in lines[1:]:  # skip header
-        m = re.match(r"([0-9A-Fa-f:]{17})\s+(\*?\s*)?(\S.+?)\s", line)
+    aps = []
+    for line in output.splitlines()[1:]:  # skip header
+        m = _AIRPORT_ROW.match(line)
+        if m and m.group(1):
+            ssid, bssid, rssi, channel, security = m.groups()
+            aps.append(_ap(ssid, bssid, rssi=int(rssi), channel=channel.split(",")[0], security=security))
+    return aps
+
+
+def _split_terse(line):
+    """Split one `nmcli -t` line on unescaped ':' and undo the \\: / \\\\ escapes."""
+    if "\\" not in line:
+        return line.split(":")
+    # Park the escapes on control characters nmcli never emits, split, then restore
+    line = line.replace("\\\\", "\x00").replace("\\:", "\x01")
+    return [f.replace("\x01", ":").replace("\x00", "\\") for f in line.split(":")]
+
+
+NMCLI_TERSE_FIELDS = "BSSID,SSID,CHAN,SIGNAL,SECURITY"
+
+
+def _parse_linux_nmcli_terse(output: str):
+    # nmcli -t -f BSSID,SSID,CHAN,SIGNAL,SECURITY dev wifi list
+    aps = []
+    for line in output.splitlines():
+        if not line:
+            continue
+        fields = _split_terse(line)
+        if len(fields) < 5 or not fields[1]:
+            continue
+        bssid, ssid, chan, signal, security = fields[:5]
+        aps.append(_ap(ssid, bssid, signal=int(signal) if signal.isdigit() else None,
+                       channel=chan or None, security=security or None))
+    return aps
+
+
+def _parse_linux_iw(output: str):
+    # iw dev <iface> scan dump
+    aps = []
+    current = None
+    security = None
+    for line in output.splitlines():
+        m = _IW_BSS.match(line)
         if m:
-            bssid = m.group(1)
-            ssid = m.group(3).strip()
-            networks[ssid].add(bssid)
-    return networks
+            current = {"bssid": m.group(1), "ssid": None, "rssi": None, "channel": None}
+            security = None
+            aps.append(current)
+            continue
+        if current is None:
+            continue
+        m = _IW_FIELD.match(line)
+        if not m:
+            continue
+        key, value = m.groups()
+        if key == "SSID":
+            current["ssid"] = value
+        elif key == "signal":
+            sig = _IW_SIGNAL.match(value)
+            if sig:
+                current["rssi"] = int(float(sig.group(1)))
+        elif key == "freq" and current["channel"] is None:
+            ch = _freq_to_channel(int(float(value)))
+            current["channel"] = str(ch) if ch else None
+        elif key == "DS Parameter set":
+            current["channel"] = value.replace("channel", "").strip()
+        elif key == "RSN":
+            security = "WPA2"
+        elif key == "WPA" and security is None:
+            security = "WPA"
+        elif key == "capability" and security is None and "Privacy" in value:
+            security = "WEP"
+        current["security"] = security
+    return [_ap(a["ssid"], a["bssid"], rssi=a["rssi"], channel=a["channel"], security=a.get("security"))
+            for a in aps if a["ssid"]]
 
 
-def detect_rogue_aps():
+def _parse_linux_iwlist(output: str):
+    # iwlist scan
+    aps = []
+    current = None
+    for line in output.splitlines():
+        m = _IWLIST_CELL.search(line)
+        if m:
+            current = {"bssid": m.group(1), "ssid": None, "rssi": None, "channel": None, "security": None}
+            aps.append(current)
+            continue
+        if current is None:
+            continue
+        if "ESSID:" in line:
+            m = _IWLIST_ESSID.search(line)
+            current["ssid"] = m.group(1) if m else None
+        elif "Signal level=" in line:
+            m = _IWLIST_SIGNAL.search(line)
+            if m:
+                current["rssi"] = int(m.group(1))
+        elif "Channel" in line and current["channel"] is None:
+            m = _IWLIST_CHANNEL.search(line)
+            if m:
+                current["channel"] = m.group(1)
+        elif "Encryption key:on" in line:
+            current["security"] = current["security"] or "WEP"
+        elif "IE: IEEE 802.11i/WPA2" in line:
+            current["security"] = "WPA2"
+        elif "IE: WPA Version" in line and current["security"] in (None, "WEP"):
+            current["security"] = "WPA"
+    return [_ap(a["ssid"], a["bssid"], rssi=a["rssi"], channel=a["channel"], security=a["security"])
+            for a in aps if a["ssid"]]
+
+
+def _wireless_interfaces():
+    """Wireless interface names from sysfs (Linux)."""
+    try:
+        return sorted(name for name in os.listdir("/sys/class/net")
+                      if os.path.isdir(os.path.join("/sys/class/net", name, "wireless")))
+    except OSError:
+        return []
+
+
+def _collect_linux():
+    errors = []
+    try:
+        output = check_output(["nmcli", "-t", "-f", NMCLI_TERSE_FIELDS, "dev", "wifi", "list"],
+                              text=True, encoding='utf-8', stderr=subprocess.DEVNULL)
+        return _parse_linux_nmcli_terse(output)
+    except Exception as e:
+        errors.append(e)
+    # iw reads the kernel's cached scan results; no new scan, no root needed
+    for iface in _wireless_interfaces():
+        try:
+            output = check_output(["iw", "dev", iface, "scan", "dump"],
+                                  text=True, encoding='utf-8', stderr=subprocess.DEVNULL)
+            return _parse_linux_iw(output)
+        except Exception as e:
+            errors.append(e)
+    # Fallback to iwlist (may require sudo)
+    try:
+        output = check_output(["iwlist", "scan"], text=True, encoding='utf-8', stderr=subprocess.DEVNULL)
+        return _parse_linux_iwlist(output)
+    except Exception as e:
+        raise RuntimeError(f"Wi-Fi scan unavailable: {e}")
+
+
+def collect_access_points():
+    """Scan for nearby access points.
+
+    Returns [{"ssid", "bssid", "rssi", "signal", "channel", "security"}]
+    (rssi in dBm, signal in percent). Raises RuntimeError when no scanning
+    tool is usable on this system.
+    """
     system = platform.system()
+    if system == "Windows":
+        output = check_output("netsh wlan show networks mode=bssid", shell=True, text=True, encoding='utf-8')
+        return _parse_windows_netsh(output)
+    elif system == "Darwin":  # macOS
+        try:
+            # Try system_profiler as alternative to deprecated airport command
+            output = check_output(
+                "system_profiler SPAirPortDataType",
+                shell=True, text=True, encoding='utf-8'
+            )
+            aps = _parse_macos_system_profiler(output)
+            if aps:
+                return aps
+        except Exception as e:
+            fallback_error = e
+        else:
+            # Recent macOS redacts BSSIDs here; airport -s still lists them
+            fallback_error = "system_profiler reported no BSSIDs"
+        # Fallback to airport if available
+        try:
+            output = check_output(
+                "/System/Library/PrivateFrameworks/Apple80211.framework/Versions/Current/Resources/airport -s",
+                shell=True, text=True, encoding='utf-8'
+            )
+            return _parse_macos_airport(output)
+        except Exception:
+            raise RuntimeError(f"macOS Wi-Fi scanning unavailable: {fallback_error}")
+    else:  # Linux
+        return _collect_linux()
+
+
+def detect_rogue_aps():
     try:
-        if system == "Windows":
-            output = subprocess.check_output("netsh wlan show networks mode=bssid", shell=True, text=True, encoding='utf-8')
-            networks = _parse_windows_netsh(output)
-        elif system == "Darwin":  # macOS
-            try:
-                # Try system_profiler as alternative to deprecated airport command
-                output = subprocess.check_output(
-                    "system_profiler SPAirPortDataType",
-                    shell=True, text=True, encoding='utf-8'
-                )
-                networks = _parse_macos_system_profiler(output)
-            except Exception as fallback_error:
-                # Fallback to airport if available
-                try:
-                    output = subprocess.check_output(
-                        "/System/Library/PrivateFrameworks/Apple80211.framework/Versions/Current/Resources/airport -s",
-                        shell=True, text=True, encoding='utf-8'
-                    )
-                    networks = _parse_macos_airport(output)
-                except Exception:
-                    return {"status": "unknown", "message": f"macOS Wi-Fi scanning unavailable: {fallback_error}"}
-        else:  # Linux
-            try:
-                output = subprocess.check_output("nmcli dev wifi list", shell=True, text=True, encoding='utf-8')
-                networks = _parse_linux_nmcli(output)
-            except Exception:
-                # Fallback to iwlist (may require sudo)
-                try:
-                    output = subprocess.check_output("iwlist scan", shell=True, text=True, encoding='utf-8')
-                    networks = defaultdict(set)
-                    current_ssid = None
-                    for line in output.splitlines():
-                        essid = re.search(r'ESSID:"([^"]+)"', line)
-                        ap = re.search(r"Address: ([0-9A-Fa-f:]{17})", line)
-                        if essid:
-                            current_ssid = essid.group(1)
-                        if ap and current_ssid:
-                            networks[current_ssid].add(ap.group(1))
-                except Exception as e:
-                    return {"status": "unknown", "message": f"Wi-Fi scan unavailable: {e}"}
-
-        # Analyze for multiple BSSIDs per SSID
+        aps = collect_access_points()
+    except RuntimeError as e:
+        return {"status": "unknown", "message": str(e)}
+    except subprocess.CalledProcessError as e:
+        return {"status": "unknown", "message": f"Failed to scan networks: {e}"}
+
+    networks = defaultdict(set)
+    for ap in aps:
+        networks[ap["ssid"]].add(ap["bssid"])
+
+    # Analyze for multiple BSSIDs per SSID
+    rogue_alerts = []
+    for ssid, bssids in networks.items():
+        if len(bssids) > 1:
+            rogue_alerts.append({
+                "ssid": ssid,
+                "bssids": list(bssids),
+                "count": len(bssids),
+                "alert": "Suspicious: Multiple BSSIDs found for same SSID"
+            })
+
+    if rogue_alerts:
+        return {"status": "warning", "message": "Possible Rogue APs detected!", "data": rogue_alerts}
+    else:
+        return {"status": "safe", "message": "No rogue access points detected."}
+
+
+# A BSSID seen for at least this long counts as part of the established network
+ESTABLISHED_AFTER_SECONDS = 3600
+ROGUE_SCAN_INTERVAL = 30.0
+# How long a request waits for the background loop's first scan
+FIRST_SCAN_WAIT = 10.0
+
+
+class RogueAPMonitor:
+    """Background Wi-Fi scan loop backed by a persistent BSSID sighting store.
+
+    Every scan is upserted into the BSSIDStore, and the rogue check diffs it
+    against the first-seen times already known (held in memory, loaded from
+    the store once), so a long-standing mesh with several BSSIDs is told
+    apart from a BSSID that just appeared for an established SSID.
+    """
+
+    def __init__(self, store=None, interval=ROGUE_SCAN_INTERVAL):
+        self._lock = threading.Lock()
+        self._store = store
+        self.interval = interval
+        self._first_seen = None
+        self._thread = None
+        self._stop = threading.Event()
+        self._scanned = threading.Event()
+        self.last_scan_at = None
+        self.last_result = None
+        self.last_error = None
+        self.scans = 0
+        # Cleared by an explicit stop() so get_rogue_ap_verdict() won't restart it
+        self.autostart = True
+
+    @property
+    def store(self):
+        if self._store is None:
+            self._store = BSSIDStore()
+        return self._store
+
+    def scan_once(self, now=None):
+        """Run one scan, persist it and return the incremental rogue-AP verdict."""
+        now = time.time() if now is None else now
+        try:
+            with ROGUE_AP_SCAN_SECONDS.time():
+                aps = collect_access_points()
+        except RuntimeError as e:
+            result = {"status": "unknown", "message": str(e)}
+        except subprocess.CalledProcessError as e:
+            result = {"status": "unknown", "message": f"Failed to scan networks: {e}"}
+        else:
+            with self._lock:
+                if self._first_seen is None:
+                    self._first_seen = self.store.first_seen_map()
+                new_pairs = self.store.record(aps, now=now)
+                for pair in new_pairs:
+                    self._first_seen.setdefault(pair, now)
+                result = self._analyze(aps, new_pairs, now)
+        self.last_result = result
+        self.last_scan_at = now
+        self.scans += 1
+        self._scanned.set()
+        return result
+
+    def _analyze(self, aps, new_pairs, now):
+        visible = defaultdict(set)
+        for ap in aps:
+            visible[ap["ssid"]].add(ap["bssid"])
+
         rogue_alerts = []
-        for ssid, bssids in networks.items():
-            if len(bssids) > 1:
+        established_meshes = []
+        for ssid, bssids in visible.items():
+            if len(bssids) < 2:
+                continue
+            established = sorted(b for b in bssids if now - self._first_seen[(ssid, b)] >= ESTABLISHED_AFTER_SECONDS)
+            fresh = sorted(bssids - set(established))
+            if established and fresh:
                 rogue_alerts.append({
                     "ssid": ssid,
-                    "bssids": list(bssids),
+                    "bssids": sorted(bssids),
+                    "new_bssids": fresh,
+                    "count": len(bssids),
+                    "alert": "Suspicious: New BSSID appeared for an established SSID"
+                })
+            elif fresh:
+                # No history yet to tell a mesh from a twin: fall back to the plain rule
+                rogue_alerts.append({
+                    "ssid": ssid,
+                    "bssids": sorted(bssids),
                     "count": len(bssids),
                     "alert": "Suspicious: Multiple BSSIDs found for same SSID"
                 })
+            else:
+                established_meshes.append(ssid)
 
+        result = {"new_sightings": len(new_pairs), "established_multi_bssid": sorted(established_meshes)}
         if rogue_alerts:
-            return {"status": "warning", "message": "Possible Rogue APs detected!", "data": rogue_alerts}
+            result.update(status="warning", message="Possible Rogue APs detected!", data=rogue_alerts)
         else:
-            return {"status": "safe", "message": "No rogue access points detected."}
+            result.update(status="safe", message="No rogue access points detected.")
+        return result
 
-    except subprocess.CalledProcessError as e:
-        return {"status": "unknown", "message": f"Failed to scan networks: {e}"}
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self.scan_once()
+                self.last_error = None
+            except Exception as e:
+                self.last_error = str(e)
+            self._stop.wait(self.interval)
+
+    def is_running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        """Start the background scan loop if it is not already running."""
+        self.autostart = True
+        if not self.is_running():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="rogue-ap-scan", daemon=True)
+            self._thread.start()
+        return self.health()
+
+    def stop(self):
+        self.autostart = False
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=1)
+        return self.health()
+
+    def health(self):
+        return {
+            "running": self.is_running(),
+            "interval": self.interval,
+            "scans": self.scans,
+            "last_scan_at": self.last_scan_at,
+            "sightings": self.store.count(),
+            "error": self.last_error,
+        }
+
+
+rogue_ap_monitor = RogueAPMonitor()
+
+
+@register_collector
+def _rogue_ap_metrics():
+    return [
+        ("wifi_scan_rogue_ap_loop_running", "gauge", "1 while the background AP scan loop runs.",
+         [({}, int(rogue_ap_monitor.is_running()))]),
+        ("wifi_scan_rogue_ap_scans_total", "counter", "Access point scans completed by the loop.",
+         [({}, rogue_ap_monitor.scans)]),
+    ]
+
+
+def get_rogue_ap_verdict():
+    """Latest verdict from the background scan loop, starting it on first use."""
+    if rogue_ap_monitor.autostart and not rogue_ap_monitor.is_running():
+        rogue_ap_monitor.start()
+    if rogue_ap_monitor.last_result is None:
+        if not rogue_ap_monitor.is_running():
+            return rogue_ap_monitor.scan_once()
+        if not rogue_ap_monitor._scanned.wait(FIRST_SCAN_WAIT):
+            return {"status": "unknown", "message": "Rogue AP scan still in progress"}
+    return rogue_ap_monitor.last_result
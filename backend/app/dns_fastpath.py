@@ -0,0 +1,211 @@
+import ctypes
+import socket
+import struct
+import threading
+
+ETH_P_ALL = 0x0003
+SO_ATTACH_FILTER = 26
+SNAPLEN = 65535
+PACKET_OUTGOING = 4
+SOL_PACKET = 263
+PACKET_STATISTICS = 6
+_TPACKET_STATS = struct.Struct("II")  # tp_packets, tp_drops
+
+# Classic BPF for "udp src port 53" over Ethernet, non-fragmented IPv4 or IPv6
+# without extension headers. Tuples are (code, jt, jf, k).
+DNS_BPF_FILTER = [
+    (0x28, 0, 0, 12),        # 0: ldh [12]              ethertype
+    (0x15, 0, 7, 0x0800),    # 1: jeq IPv4 ? 2 : 9
+    (0x30, 0, 0, 23),        # 2: ldb [23]              IPv4 protocol
+    (0x15, 0, 11, 17),       # 3: jeq UDP ? 4 : drop
+    (0x28, 0, 0, 20),        # 4: ldh [20]              flags/fragment offset
+    (0x45, 9, 0, 0x1FFF),    # 5: jset frag ? drop : 6
+    (0xB1, 0, 0, 14),        # 6: ldxb 4*([14]&0xf)     IPv4 header length
+    (0x48, 0, 0, 14),        # 7: ldh [x+14]            UDP source port
+    (0x15, 5, 6, 53),        # 8: jeq 53 ? accept : drop
+    (0x15, 0, 5, 0x86DD),    # 9: jeq IPv6 ? 10 : drop
+    (0x30, 0, 0, 20),        # 10: ldb [20]             IPv6 next header
+    (0x15, 0, 3, 17),        # 11: jeq UDP ? 12 : drop
+    (0x28, 0, 0, 54),        # 12: ldh [54]             UDP source port
+    (0x15, 0, 1, 53),        # 13: jeq 53 ? accept : drop
+    (0x06, 0, 0, SNAPLEN),   # 14: accept
+    (0x06, 0, 0, 0),         # 15: drop
+]
+
+TYPE_A = 1
+TYPE_NS = 2
+TYPE_CNAME = 5
+TYPE_PTR = 12
+TYPE_AAAA = 28
+# Record types whose rdata is a domain name (scapy renders these with a trailing dot)
+NAME_TYPES = {TYPE_NS, TYPE_CNAME, TYPE_PTR}
+
+_ETH_HDR = 14
+_UDP_HDR = 8
+_DNS_HDR = struct.Struct("!HHHHHH")
+_RR_FIXED = struct.Struct("!HHIH")
+
+
+def _read_name(msg, offset):
+    """Decode a (possibly compressed) domain name; return (name, next_offset)."""
+    labels = []
+    end = None
+    hops = 0
+    while True:
+        length = msg[offset]
+        if length & 0xC0 == 0xC0:
+            if end is None:
+                end = offset + 2
+            offset = ((length & 0x3F) << 8) | msg[offset + 1]
+            hops += 1
+            if hops > 32:
+                raise ValueError("DNS name compression loop")
+            continue
+        offset += 1
+        if length == 0:
+            break
+        labels.append(bytes(msg[offset:offset + length]).decode("utf-8", "replace"))
+        offset += length
+    return ".".join(labels), (end if end is not None else offset)
+
+
+def parse_dns_message(msg):
+    """Parse a DNS response held in a buffer.
+
+    Returns (domain, rdata, ttl) for the question name and the first answer
+    record, or None for queries, empty answers and unsupported record types.
+    """
+    try:
+        _id, flags, qdcount, ancount, _ns, _ar = _DNS_HDR.unpack_from(msg, 0)
+        if not flags & 0x8000 or qdcount == 0 or ancount == 0:
+            return None
+        domain, offset = _read_name(msg, _DNS_HDR.size)
+        offset += 4  # QTYPE, QCLASS
+        for _ in range(qdcount - 1):
+            offset = _read_name(msg, offset)[1] + 4
+
+        offset = _read_name(msg, offset)[1]
+        rtype, _rclass, ttl, rdlength = _RR_FIXED.unpack_from(msg, offset)
+        offset += _RR_FIXED.size
+        if offset + rdlength > len(msg):
+            return None
+
+        if rtype == TYPE_A and rdlength == 4:
+            rdata = socket.inet_ntop(socket.AF_INET, msg[offset:offset + 4])
+        elif rtype == TYPE_AAAA and rdlength == 16:
+            rdata = socket.inet_ntop(socket.AF_INET6, msg[offset:offset + 16])
+        elif rtype in NAME_TYPES:
+            rdata = _read_name(msg, offset)[0] + "."
+        else:
+            return None
+        return domain.strip("."), rdata, ttl
+    except (IndexError, ValueError, struct.error):
+        return None
+
+
+def parse_dns_frame(frame):
+    """Parse an Ethernet frame carrying a UDP DNS response (see parse_dns_message)."""
+    try:
+        ethertype = (frame[12] << 8) | frame[13]
+        if ethertype == 0x0800:
+            if frame[_ETH_HDR + 9] != 17:
+                return None
+            udp = _ETH_HDR + (frame[_ETH_HDR] & 0x0F) * 4
+        elif ethertype == 0x86DD:
+            if frame[_ETH_HDR + 6] != 17:
+                return None
+            udp = _ETH_HDR + 40
+        else:
+            return None
+    except IndexError:
+        return None
+    return parse_dns_message(frame[udp + _UDP_HDR:])
+
+
+def _attach_bpf(sock, program):
+    blob = b"".join(struct.pack("HBBI", *insn) for insn in program)
+    buf = ctypes.create_string_buffer(blob)
+    fprog = struct.pack("HL", len(program), ctypes.addressof(buf))
+    sock.setsockopt(socket.SOL_SOCKET, SO_ATTACH_FILTER, fprog)
+
+
+def fast_path_available():
+    return hasattr(socket, "AF_PACKET")
+
+
+class RawDNSSniffer:
+    """Background AF_PACKET reader feeding parsed DNS answers to `callback`.
+
+    Skips scapy dissection entirely: the kernel BPF filter drops everything
+    but DNS responses, and each frame is parsed in place from one reusable
+    buffer. `callback(domain, ip, ttl)` runs on the sniffer thread, matching
+    what the scapy path passes to DNSMonitor.record().
+    """
+
+    def __init__(self, callback, iface=None):
+        self.callback = callback
+        self.iface = iface
+        self.packets = 0
+        self.unparsed = 0
+        self.kernel_drops = 0
+        self.thread = None
+        self._sock = None
+        self._stop = threading.Event()
+
+    def start(self):
+        sock = socket.socket(socket.AF_PACKET, socket.SOCK_RAW, socket.htons(ETH_P_ALL))
+        try:
+            _attach_bpf(sock, DNS_BPF_FILTER)
+            if self.iface:
+                sock.bind((self.iface, 0))
+            # Wake up periodically so stop() is honoured on a quiet network
+            sock.settimeout(0.5)
+        except Exception:
+            sock.close()
+            raise
+        self._sock = sock
+        self._stop.clear()
+        self.thread = threading.Thread(target=self._run, name="dns-fastpath", daemon=True)
+        self.thread.start()
+
+    def _run(self):
+        buf = bytearray(SNAPLEN)
+        view = memoryview(buf)
+        sock = self._sock
+        try:
+            while not self._stop.is_set():
+                try:
+                    n, addr = sock.recvfrom_into(buf)
+                except socket.timeout:
+                    continue
+                except OSError:
+                    break
+                # Our own transmissions are looped back too; count each frame once
+                if addr[2] == PACKET_OUTGOING:
+                    continue
+                self.packets += 1
+                parsed = parse_dns_frame(view[:n])
+                if parsed:
+                    self.callback(*parsed)
+                else:
+                    self.unparsed += 1
+        finally:
+            sock.close()
+
+    def read_kernel_drops(self):
+        """Add frames the kernel dropped (socket buffer full) since the last call; return the total."""
+        sock = self._sock
+        if sock is not None:
+            try:
+                # The kernel resets these counters on every read
+                _packets, drops = _TPACKET_STATS.unpack(
+                    sock.getsockopt(SOL_PACKET, PACKET_STATISTICS, _TPACKET_STATS.size))
+                self.kernel_drops += drops
+            except OSError:
+                pass
+        return self.kernel_drops
+
+    def stop(self):
+        self._stop.set()
+        if self.thread is not None:
+            self.thread.join(timeout=2)
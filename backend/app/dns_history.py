@@ -0,0 +1,106 @@
+import threading
+import time
+import zlib
+from collections import OrderedDict
+
+# Defaults sized for a busy hotspot: ~50k domains × a few IPs stays in the low MBs
+DEFAULT_MAX_DOMAINS = 50000
+DEFAULT_MAX_IPS_PER_DOMAIN = 16
+DEFAULT_SHARDS = 16
+# Answer TTLs are clamped so a 0 s TTL can't hide a spoof and a week-long one can't pin memory
+DEFAULT_MIN_TTL = 300
+DEFAULT_MAX_TTL = 86400
+
+
+class _Shard:
+    __slots__ = ("lock", "domains")
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        # domain -> {ip: expires_at}, ordered least- to most-recently used
+        self.domains = OrderedDict()
+
+
+class DNSHistory:
+    """Bounded domain→IP history with per-record TTL expiry and LRU eviction.
+
+    Domains are hashed across independently locked shards so the sniffer
+    thread and request threads rarely contend. Each shard holds at most
+    max_domains / shards domains and evicts its least recently seen domain
+    when full, so memory stays flat however long the monitor runs.
+    """
+
+    def __init__(self, max_domains=DEFAULT_MAX_DOMAINS, max_ips_per_domain=DEFAULT_MAX_IPS_PER_DOMAIN,
+                 shards=DEFAULT_SHARDS, min_ttl=DEFAULT_MIN_TTL, max_ttl=DEFAULT_MAX_TTL):
+        self.max_ips_per_domain = max_ips_per_domain
+        self.min_ttl = min_ttl
+        self.max_ttl = max_ttl
+        self._shards = [_Shard() for _ in range(shards)]
+        self._per_shard = max(1, max_domains // shards)
+        self.evictions = 0
+
+    def _shard(self, domain):
+        return self._shards[zlib.crc32(domain.encode()) % len(self._shards)]
+
+    def _expiry(self, ttl, now):
+        if ttl is None:
+            ttl = self.min_ttl
+        return now + min(max(ttl, self.min_ttl), self.max_ttl)
+
+    def observe(self, domain, ip, ttl=None, now=None):
+        """Record one answer for `domain`.
+
+        Returns the list of previously known, unexpired IPs when `ip` is new
+        for a domain we already had live records for (a possible spoof), and
+        None otherwise.
+        """
+        now = time.time() if now is None else now
+        shard = self._shard(domain)
+        with shard.lock:
+            ips = shard.domains.get(domain)
+            if ips is not None:
+                shard.domains.move_to_end(domain)
+                for old_ip, expires_at in list(ips.items()):
+                    if expires_at <= now:
+                        del ips[old_ip]
+
+            if not ips:
+                shard.domains[domain] = {ip: self._expiry(ttl, now)}
+                shard.domains.move_to_end(domain)
+                while len(shard.domains) > self._per_shard:
+                    shard.domains.popitem(last=False)
+                    self.evictions += 1
+                return None
+
+            previous = None if ip in ips else list(ips)
+            ips[ip] = self._expiry(ttl, now)
+            if len(ips) > self.max_ips_per_domain:
+                # Drop the record closest to expiry
+                del ips[min(ips, key=ips.get)]
+            return previous
+
+    def get(self, domain, now=None):
+        """Unexpired IPs currently known for `domain`."""
+        now = time.time() if now is None else now
+        shard = self._shard(domain)
+        with shard.lock:
+            ips = shard.domains.get(domain) or {}
+            return [ip for ip, expires_at in ips.items() if expires_at > now]
+
+    def __contains__(self, domain):
+        return bool(self.get(domain))
+
+    def __len__(self):
+        return sum(len(s.domains) for s in self._shards)
+
+    def clear(self):
+        for shard in self._shards:
+            with shard.lock:
+                shard.domains.clear()
+
+    def stats(self):
+        return {
+            "domains": len(self),
+            "capacity": self._per_shard * len(self._shards),
+            "evictions": self.evictions,
+        }
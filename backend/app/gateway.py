@@ -0,0 +1,206 @@
+import ipaddress
+import logging
+import platform
+import re
+import socket
+import struct
+import threading
+import time
+
+from app.commands import check_output, read_file
+
+# Kernel IPv4 routing table; one header line, then whitespace-separated hex fields
+PROC_NET_ROUTE = "/proc/net/route"
+RTF_UP = 0x1
+RTF_GATEWAY = 0x2
+
+# rtnetlink multicast groups (linux/rtnetlink.h)
+RTMGRP_LINK = 0x1
+RTMGRP_IPV4_IFADDR = 0x10
+RTMGRP_IPV4_ROUTE = 0x40
+
+# Without netlink (macOS/Windows) the cached route is simply re-read after this
+FALLBACK_TTL = 30.0
+
+logger = logging.getLogger(__name__)
+
+_lock = threading.Lock()
+_cached_route = None
+_cached_at = 0.0
+_stale = True
+_netlink = None
+_netlink_failed = False
+
+
+def _parse_proc_net_route(text):
+    """Return (iface, gateway_ip) for the default route with the lowest metric."""
+    best = None
+    for line in text.splitlines()[1:]:
+        fields = line.split()
+        if len(fields) < 8:
+            continue
+        iface, dest, gw, flags, metric = fields[0], fields[1], fields[2], int(fields[3], 16), int(fields[6])
+        if dest != "00000000" or not (flags & RTF_UP) or not (flags & RTF_GATEWAY):
+            continue
+        if best is None or metric < best[0]:
+            gw_ip = socket.inet_ntoa(struct.pack("<L", int(gw, 16)))
+            best = (metric, iface, gw_ip)
+    if best is None:
+        return None
+    return best[1], best[2]
+
+
+def _parse_link_subnets(text, iface):
+    """On-link (non-gateway) IPv4 networks routed via `iface` in /proc/net/route."""
+    nets = []
+    for line in text.splitlines()[1:]:
+        fields = line.split()
+        if len(fields) < 8 or fields[0] != iface:
+            continue
+        dest, flags, mask = fields[1], int(fields[3], 16), fields[7]
+        if dest == "00000000" or flags & RTF_GATEWAY or not flags & RTF_UP:
+            continue
+        net = socket.inet_ntoa(struct.pack("<L", int(dest, 16)))
+        netmask = socket.inet_ntoa(struct.pack("<L", int(mask, 16)))
+        nets.append(ipaddress.IPv4Network(f"{net}/{netmask}", strict=False))
+    return nets
+
+
+def get_default_subnet():
+    """The on-link IPv4 network of the default route's interface, as (iface, network).
+
+    Linux only (reads /proc/net/route); returns None elsewhere or when unknown.
+    """
+    route = get_default_route()
+    if not route or not route[0]:
+        return None
+    try:
+        nets = _parse_link_subnets(read_file(PROC_NET_ROUTE), route[0])
+    except OSError:
+        return None
+    gateway = ipaddress.IPv4Address(route[1])
+    # Prefer the network that actually contains the gateway
+    nets.sort(key=lambda n: (gateway not in n, -n.prefixlen))
+    return (route[0], nets[0]) if nets else None
+
+
+def _read_linux_route():
+    try:
+        return _parse_proc_net_route(read_file(PROC_NET_ROUTE))
+    except OSError:
+        return None
+
+
+def _read_windows_route():
+    # Prefer `ipconfig` parsing; some environments require checking the next line
+    output = check_output("ipconfig", shell=True, text=True)
+    lines = output.splitlines()
+    for i, line in enumerate(lines):
+        if "Default Gateway" in line:
+            parts = line.split(":")
+            if len(parts) == 2 and parts[1].strip():
+                return None, parts[1].strip()
+            # Sometimes the value is on the next line
+            if i + 1 < len(lines):
+                nxt = lines[i + 1].strip()
+                if nxt:
+                    return None, nxt
+    return None
+
+
+def _read_macos_route():
+    output = check_output(["route", "-n", "get", "default"], text=True)
+    gw = re.search(r"gateway:\s*([0-9\.]+)", output)
+    iface = re.search(r"interface:\s*(\S+)", output)
+    if gw:
+        return (iface.group(1) if iface else None), gw.group(1)
+    return None
+
+
+def _read_route():
+    system = platform.system()
+    try:
+        if system == "Windows":
+            return _read_windows_route()
+        elif system == "Darwin":  # macOS
+            return _read_macos_route()
+        else:  # Linux and others
+            return _read_linux_route()
+    except Exception as e:
+        logger.error("❌ Error getting gateway IP: %s", e)
+        return None
+
+
+def _open_netlink():
+    """Subscribe to route/link/address changes; None where rtnetlink is unavailable."""
+    if not hasattr(socket, "AF_NETLINK"):
+        return None
+    try:
+        sock = socket.socket(socket.AF_NETLINK, socket.SOCK_RAW, socket.NETLINK_ROUTE)
+        sock.bind((0, RTMGRP_LINK | RTMGRP_IPV4_IFADDR | RTMGRP_IPV4_ROUTE))
+        sock.setblocking(False)
+        return sock
+    except OSError:
+        return None
+
+
+def _routes_changed():
+    """Drain pending rtnetlink notifications; True if any arrived (or can't tell)."""
+    global _netlink, _netlink_failed
+    if _netlink is None and not _netlink_failed:
+        _netlink = _open_netlink()
+        _netlink_failed = _netlink is None
+        # Nothing was cached while unsubscribed, so the first read must be fresh
+        return True
+    if _netlink is None:
+        return time.monotonic() - _cached_at >= FALLBACK_TTL
+
+    changed = False
+    while True:
+        try:
+            if not _netlink.recv(65536):
+                break
+            changed = True
+        except BlockingIOError:
+            break
+        except OSError:
+            # Receive buffer overran: events were lost, so assume the worst
+            changed = True
+            break
+    return changed
+
+
+def get_default_route():
+    """Return (iface, gateway_ip) for the default route, or None.
+
+    On Linux this reads /proc/net/route (no fork/exec) and caches the result
+    until an rtnetlink route/link/address event arrives. Other platforms fall
+    back to their route tools with a short TTL.
+    """
+    global _cached_route, _cached_at, _stale
+    with _lock:
+        if _routes_changed() or _stale:
+            _cached_route = _read_route()
+            _cached_at = time.monotonic()
+            _stale = False
+        return _cached_route
+
+
+def get_gateway_ip():
+    """Detect default gateway IP across platforms."""
+    route = get_default_route()
+    if not route:
+        logger.error("❌ Could not find default gateway.")
+        return None
+    return route[1]
+
+
+def invalidate_gateway_cache():
+    """Force the next lookup to re-read the routing table."""
+    global _stale
+    with _lock:
+        _stale = True
+
+
+if __name__ == "__main__":
+    print(get_default_route())
@@ -0,0 +1,322 @@
+import hashlib
+import json
+import logging
+import os
+import queue
+import sqlite3
+import threading
+import time
+import uuid
+
+DEFAULT_DB_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "scan_history.db")
+
+# Writes are grouped: one transaction per batch or per interval, whichever comes first
+WRITE_BATCH_SIZE = 256
+WRITE_INTERVAL = 1.0
+MAX_PAGE_SIZE = 500
+
+logger = logging.getLogger(__name__)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS scans (
+    id            INTEGER PRIMARY KEY AUTOINCREMENT,
+    uid           TEXT,
+    ts            REAL NOT NULL,
+    ssid          TEXT,
+    bssid         TEXT,
+    threat_score  INTEGER,
+    threat_level  TEXT,
+    result        TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS scans_ts ON scans (ts, id);
+CREATE INDEX IF NOT EXISTS scans_ssid_ts ON scans (ssid, ts, id);
+CREATE INDEX IF NOT EXISTS scans_bssid_ts ON scans (bssid, ts, id);
+"""
+# Globally unique per scan, so re-importing an export is a no-op
+_UID_INDEX = "CREATE UNIQUE INDEX IF NOT EXISTS scans_uid ON scans (uid)"
+
+_INSERT = ("INSERT OR IGNORE INTO scans (uid, ts, ssid, bssid, threat_score, threat_level, result) "
+           "VALUES (?, ?, ?, ?, ?, ?, ?)")
+_SUMMARY_COLUMNS = ("id", "timestamp", "ssid", "bssid", "threat_score", "threat_level")
+# Columns available to export, by the field name used in the export
+EXPORT_COLUMNS = {
+    "uid": "uid", "id": "id", "timestamp": "ts", "ssid": "ssid", "bssid": "bssid",
+    "threat_score": "threat_score", "threat_level": "threat_level", "result": "result",
+}
+EXPORT_CHUNK_ROWS = 1000
+
+
+def _row_for(result, now, uid=None):
+    wifi = result.get("wifi_info") if isinstance(result.get("wifi_info"), dict) else {}
+    threat = result.get("threat_score") if isinstance(result.get("threat_score"), dict) else {}
+    bssid = wifi.get("BSSID")
+    return (uid or uuid.uuid4().hex, now, wifi.get("SSID"), bssid.lower() if isinstance(bssid, str) else None,
+            threat.get("score"), threat.get("threat_level"), json.dumps(result, separators=(",", ":")))
+
+
+def encode_cursor(ts, row_id):
+    return f"{ts!r}_{row_id}"
+
+
+def decode_cursor(cursor):
+    ts, row_id = cursor.rsplit("_", 1)
+    return float(ts), int(row_id)
+
+
+def _filters(ssid=None, bssid=None, since=None, until=None):
+    where, params = [], []
+    if ssid is not None:
+        where.append("ssid = ?")
+        params.append(ssid)
+    if bssid is not None:
+        where.append("bssid = ?")
+        params.append(bssid.lower())
+    if since is not None:
+        where.append("ts >= ?")
+        params.append(float(since))
+    if until is not None:
+        where.append("ts < ?")
+        params.append(float(until))
+    return where, params
+
+
+class HistoryStore:
+    """Append-only SQLite (WAL mode) log of combined scan results.
+
+    append() only queues the result; a writer thread inserts queued results
+    in one transaction per batch. Queries page newest-first with a keyset
+    cursor on (ts, id), so each page is an index range scan no matter how
+    deep the caller pages.
+    """
+
+    def __init__(self, path=DEFAULT_DB_PATH):
+        self.path = path
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+        if "uid" not in {row[1] for row in self._conn.execute("PRAGMA table_info(scans)")}:
+            # Databases created before export/import existed
+            self._conn.execute("ALTER TABLE scans ADD COLUMN uid TEXT")
+            self._conn.execute("UPDATE scans SET uid = lower(hex(randomblob(16))) WHERE uid IS NULL")
+        self._conn.execute(_UID_INDEX)
+        self._queue = queue.Queue()
+        self._writer = None
+        self._stats = {"appended": 0, "written": 0, "batches": 0}
+
+    def append(self, result, now=None, uid=None):
+        """Queue one /scan/all result for the next batched write (ignored if `uid` is already stored)."""
+        self._queue.put(_row_for(result, time.time() if now is None else now, uid))
+        self._stats["appended"] += 1
+        if self._writer is None or not self._writer.is_alive():
+            with self._lock:
+                if self._writer is None or not self._writer.is_alive():
+                    self._writer = threading.Thread(target=self._write_loop, name="history-writer", daemon=True)
+                    self._writer.start()
+
+    def _drain(self, first=None):
+        rows = [] if first is None else [first]
+        while len(rows) < WRITE_BATCH_SIZE:
+            try:
+                rows.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return rows
+
+    def _write(self, rows):
+        if not rows:
+            return
+        try:
+            with self._lock:
+                self._conn.execute("BEGIN")
+                try:
+                    self._conn.executemany(_INSERT, rows)
+                    self._conn.execute("COMMIT")
+                except Exception:
+                    self._conn.execute("ROLLBACK")
+                    raise
+                self._stats["written"] += len(rows)
+                self._stats["batches"] += 1
+        finally:
+            for _ in rows:
+                self._queue.task_done()
+
+    def _write_loop(self):
+        while True:
+            try:
+                first = self._queue.get(timeout=WRITE_INTERVAL)
+            except queue.Empty:
+                continue
+            # Let a burst accumulate into one transaction
+            time.sleep(min(WRITE_INTERVAL, 0.05))
+            try:
+                self._write(self._drain(first))
+            except sqlite3.Error as e:
+                logger.warning("⚠️ Could not write scan history: %s", e)
+
+    def flush(self):
+        """Write everything queued so far and wait for any batch the writer is holding."""
+        while not self._queue.empty():
+            self._write(self._drain())
+        self._queue.join()
+
+    def query(self, limit=50, cursor=None, ssid=None, bssid=None, since=None, until=None, full=False):
+        """One page of history, newest first.
+
+        Returns {"items", "next_cursor"}; pass next_cursor back to get the
+        following page (None when there are no more rows).
+        """
+        limit = max(1, min(int(limit), MAX_PAGE_SIZE))
+        where, params = _filters(ssid, bssid, since, until)
+        if cursor:
+            where.append("(ts, id) < (?, ?)")
+            params.extend(decode_cursor(cursor))
+
+        columns = "id, ts, ssid, bssid, threat_score, threat_level" + (", result" if full else "")
+        sql = f"SELECT {columns} FROM scans"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += " ORDER BY ts DESC, id DESC LIMIT ?"
+        params.append(limit + 1)
+
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+        more = len(rows) > limit
+        rows = rows[:limit]
+        items = []
+        for row in rows:
+            item = dict(zip(_SUMMARY_COLUMNS, row[:6]))
+            if full:
+                item["result"] = json.loads(row[6])
+            items.append(item)
+        next_cursor = encode_cursor(rows[-1][1], rows[-1][0]) if more else None
+        return {"items": items, "next_cursor": next_cursor}
+
+    def iter_export(self, fields=None, ssid=None, bssid=None, since=None, until=None):
+        """Yield one NDJSON line (bytes) per matching scan, oldest first.
+
+        `fields` projects the output to a subset of EXPORT_COLUMNS (default
+        all). Rows are read EXPORT_CHUNK_ROWS at a time with a keyset cursor,
+        and the stored result JSON is spliced in as-is, so memory stays flat
+        and nothing is re-encoded.
+        """
+        fields = list(fields or EXPORT_COLUMNS)
+        unknown = [f for f in fields if f not in EXPORT_COLUMNS]
+        if unknown:
+            raise ValueError(f"unknown export fields: {', '.join(unknown)}")
+        with_result = "result" in fields
+        plain = [f for f in fields if f != "result"]
+        columns = ", ".join(["ts", "id"] + [EXPORT_COLUMNS[f] for f in plain] + (["result"] if with_result else []))
+        base_where, base_params = _filters(ssid, bssid, since, until)
+
+        last = None
+        while True:
+            where, params = list(base_where), list(base_params)
+            if last:
+                where.append("(ts, id) > (?, ?)")
+                params.extend(last)
+            sql = f"SELECT {columns} FROM scans"
+            if where:
+                sql += " WHERE " + " AND ".join(where)
+            sql += " ORDER BY ts, id LIMIT ?"
+            with self._lock:
+                rows = self._conn.execute(sql, params + [EXPORT_CHUNK_ROWS]).fetchall()
+            for row in rows:
+                head = json.dumps(dict(zip(plain, row[2:2 + len(plain)])), separators=(",", ":"))
+                if with_result:
+                    # Splice the stored JSON text in rather than decoding and re-encoding it
+                    head = head[:-1] + ("," if plain else "") + '"result":' + row[-1] + "}"
+                yield head.encode() + b"\n"
+            if len(rows) < EXPORT_CHUNK_ROWS:
+                return
+            last = rows[-1][:2]
+
+    def import_records(self, lines, batch_size=EXPORT_CHUNK_ROWS):
+        """Insert NDJSON lines from an export in batched transactions; return counts.
+
+        Each record needs "timestamp" and "result". Records are keyed by
+        "uid" (derived from timestamp and result when absent), so importing
+        the same export twice inserts nothing the second time.
+        """
+        summary = {"received": 0, "inserted": 0, "duplicates": 0, "errors": 0, "error_samples": []}
+        batch = []
+
+        def write():
+            with self._lock:
+                before = self._conn.total_changes
+                self._conn.execute("BEGIN")
+                try:
+                    self._conn.executemany(_INSERT, batch)
+                    self._conn.execute("COMMIT")
+                except Exception:
+                    self._conn.execute("ROLLBACK")
+                    raise
+                inserted = self._conn.total_changes - before
+            summary["inserted"] += inserted
+            summary["duplicates"] += len(batch) - inserted
+            batch.clear()
+
+        for line in lines:
+            if not line.strip():
+                continue
+            summary["received"] += 1
+            try:
+                record = json.loads(line)
+                result = record["result"]
+                ts = float(record["timestamp"])
+                if not isinstance(result, dict):
+                    raise ValueError("result must be an object")
+                uid = record.get("uid") or hashlib.sha1(
+                    f"{ts!r}:{json.dumps(result, sort_keys=True)}".encode()).hexdigest()
+                batch.append(_row_for(result, ts, uid=str(uid)))
+            except (KeyError, TypeError, ValueError) as e:
+                summary["errors"] += 1
+                if len(summary["error_samples"]) < 5:
+                    summary["error_samples"].append(f"record {summary['received']}: {e!r}")
+                continue
+            if len(batch) >= batch_size:
+                write()
+        if batch:
+            write()
+        return summary
+
+    def get(self, scan_id):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT id, ts, ssid, bssid, threat_score, threat_level, result FROM scans WHERE id = ?",
+                (scan_id,)).fetchone()
+        if row is None:
+            return None
+        item = dict(zip(_SUMMARY_COLUMNS, row[:6]))
+        item["result"] = json.loads(row[6])
+        return item
+
+    def count(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM scans").fetchone()[0]
+
+    def stats(self):
+        with self._lock:
+            rows = self._conn.execute("SELECT COUNT(*) FROM scans").fetchone()[0]
+        return {**self._stats, "rows": rows, "queued": self._queue.qsize()}
+
+    def close(self):
+        self.flush()
+        with self._lock:
+            self._conn.close()
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_history_store():
+    """Process-wide HistoryStore, opened on first use."""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = HistoryStore()
+        return _store
@@ -0,0 +1,122 @@
+import asyncio
+import ipaddress
+import logging
+import time
+
+from app import lazy_scapy
+from app.capture import get_packet_source
+from app.async_port_scanner import iter_open_endpoints, parse_ports, DEFAULT_CONNECT_TIMEOUT
+from app.detect_arp_spoofing import arp_monitor
+from app.gateway import get_default_subnet
+from app.metrics import SRP_FAILURES, SRP_SECONDS
+from app.threat_level_ai import classify_ports
+
+# Refuse to ARP-sweep anything bigger than a /22 (1024 addresses)
+MAX_SWEEP_ADDRESSES = 1024
+ARP_SWEEP_TIMEOUT = 2
+# One connect budget shared by every host in the sweep
+LAN_SCAN_CONCURRENCY = 512
+
+logger = logging.getLogger(__name__)
+
+
+def _default_subnet():
+    """(iface, network) for the default interface, via /proc or scapy's route table."""
+    found = get_default_subnet()
+    if found:
+        return found
+    # Non-Linux: scapy's route table holds (net, mask, gw, iface, addr, metric)
+    for net, mask, gw, iface, addr, _metric in lazy_scapy.conf.route.routes:
+        if gw == "0.0.0.0" and net and mask and addr != "127.0.0.1":
+            network = ipaddress.IPv4Network((net, bin(mask).count("1")), strict=False)
+            if ipaddress.IPv4Address(addr) in network:
+                return iface, network
+    return None
+
+
+def discover_hosts(network, iface=None, timeout=ARP_SWEEP_TIMEOUT):
+    """ARP-sweep a whole CIDR with a single srp() call; return [{"ip", "mac"}].
+
+    Every reply is also fed to the passive ARP monitor's binding table.
+    """
+    try:
+        with SRP_SECONDS.time("lan_sweep"):
+            sweep = lazy_scapy.Ether(dst="ff:ff:ff:ff:ff:ff") / lazy_scapy.ARP(pdst=str(network))
+            answered = get_packet_source().srp(sweep, timeout=timeout, iface=iface)[0]
+    except Exception:
+        SRP_FAILURES.inc("lan_sweep", "error")
+        raise
+    hosts = {}
+    for _sent, reply in answered:
+        hosts[reply.psrc] = reply.hwsrc
+        arp_monitor.table.observe(reply.psrc, reply.hwsrc)
+    return [{"ip": ip, "mac": mac} for ip, mac in sorted(hosts.items(), key=lambda h: ipaddress.ip_address(h[0]))]
+
+
+async def _sweep_ports(ips, ports, concurrency, connect_timeout):
+    targets = ((ip, port) for ip in ips for port in ports)
+    found = {ip: [] for ip in ips}
+    async for ip, port in iter_open_endpoints(targets, concurrency, connect_timeout):
+        found[ip].append(port)
+    return found
+
+
+def sweep_ports(ips, ports=None, concurrency=LAN_SCAN_CONCURRENCY, connect_timeout=DEFAULT_CONNECT_TIMEOUT):
+    """Connect-scan every host under one global concurrency budget; {ip: [open ports]}."""
+    return asyncio.run(_sweep_ports(list(ips), parse_ports(ports), concurrency, connect_timeout))
+
+
+def scan_lan(cidr=None, ports=None, concurrency=LAN_SCAN_CONCURRENCY, skip_self=True):
+    """Discover live hosts on the local subnet and port-scan them concurrently.
+
+    Returns {"status", "network", "hosts": [{"ip", "mac", "open_ports", "risk"}],
+    "summary"}; the result can be passed to calculate_threat_score as
+    "lan_hosts".
+    """
+    start = time.monotonic()
+    iface = None
+    try:
+        # Bad ports fail here, before the sweep rather than after it
+        ports = parse_ports(ports)
+        if cidr:
+            network = ipaddress.IPv4Network(cidr, strict=False)
+        else:
+            found = _default_subnet()
+            if not found:
+                return {"status": "unknown", "message": "Could not determine the local subnet"}
+            iface, network = found
+    except ValueError as e:
+        return {"status": "error", "message": str(e)}
+
+    if network.num_addresses > MAX_SWEEP_ADDRESSES:
+        return {"status": "error",
+                "message": f"{network} is too large to sweep (max {MAX_SWEEP_ADDRESSES} addresses)"}
+
+    logger.info("🔍 Sweeping %s for live hosts...", network)
+    try:
+        hosts = discover_hosts(network, iface=iface)
+    except Exception as e:
+        # Raw sockets need root on Linux/macOS
+        return {"status": "unknown", "message": f"ARP sweep unavailable: {e}",
+                "recommendation": "Try running with elevated privileges."}
+
+    if skip_self:
+        own = {addr for *_rest, addr, _metric in lazy_scapy.conf.route.routes}
+        hosts = [h for h in hosts if h["ip"] not in own]
+
+    open_ports = sweep_ports([h["ip"] for h in hosts], ports, concurrency)
+    for host in hosts:
+        host["open_ports"] = sorted(open_ports.get(host["ip"], []))
+        host["risk"] = classify_ports(host["open_ports"])
+
+    # Bucket names come from threat_rules.json; the defaults are high/medium/low
+    risk_counts = {"high": 0, "medium": 0, "low": 0}
+    for host in hosts:
+        risk_counts[host["risk"]] = risk_counts.get(host["risk"], 0) + 1
+    return {
+        "status": "warning" if risk_counts["high"] else "ok",
+        "network": str(network),
+        "hosts": hosts,
+        "summary": {"hosts": len(hosts), **risk_counts},
+        "duration_s": round(time.monotonic() - start, 3),
+    }
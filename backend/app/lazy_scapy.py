@@ -0,0 +1,83 @@
+"""The scapy names the detectors use, imported on first access.
+
+`scapy.all` loads every layer, the route tables and the interface list and
+dominates backend start-up; the app only needs Ethernet/ARP and DNS. Use
+`lazy_scapy.ARP` etc.: the first access imports the minimal module that
+defines the name and caches it here, later accesses are plain attribute
+lookups. Call load_layers() before dissecting packets (sniffing, reading a
+pcap), since scapy decodes frames only as far as the loaded layers go.
+"""
+import importlib
+import logging
+import os
+import sys
+import threading
+import time
+
+# Decode frames down to ARP and to DNS over UDP on IPv4/IPv6 (l2 and dns pull in inet and inet6)
+LAYER_MODULES = ("scapy.layers.l2", "scapy.layers.dns")
+# Set to 0 to skip loading the layers in the background at start-up
+WARMUP = os.environ.get("SCAPY_WARMUP", "1") != "0"
+
+_SOURCES = {
+    "ARP": "scapy.layers.l2",
+    "Ether": "scapy.layers.l2",
+    "UDP": "scapy.layers.inet",
+    "DNS": "scapy.layers.dns",
+    "DNSQR": "scapy.layers.dns",
+    "DNSRR": "scapy.layers.dns",
+    "AsyncSniffer": "scapy.sendrecv",
+    "sniff": "scapy.sendrecv",
+    "srp": "scapy.sendrecv",
+    "PcapReader": "scapy.utils",
+    "RawPcapReader": "scapy.utils",
+    "rdpcap": "scapy.utils",
+    # scapy.route fills in conf.route when imported
+    "conf": "scapy.route",
+}
+
+logger = logging.getLogger(__name__)
+
+_warmup_thread = None
+_warmup_lock = threading.Lock()
+
+
+def __getattr__(name):
+    module = _SOURCES.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module), name)
+    globals()[name] = value
+    return value
+
+
+def load_layers():
+    """Import the layer modules packet dissection needs (cheap once loaded)."""
+    for module in LAYER_MODULES:
+        importlib.import_module(module)
+
+
+def loaded():
+    """True once the layers are imported."""
+    return all(module in sys.modules for module in LAYER_MODULES)
+
+
+def _warm_up():
+    start = time.perf_counter()
+    try:
+        load_layers()
+    except Exception as e:
+        # A broken scapy install surfaces again, with context, when a detector needs it
+        logger.warning("⚠️ scapy warm-up failed: %s", e)
+        return
+    logger.debug("scapy layers loaded in %.0f ms", (time.perf_counter() - start) * 1000)
+
+
+def warm_up():
+    """Load the layers on a background thread so the first scan doesn't pay for it."""
+    global _warmup_thread
+    with _warmup_lock:
+        if _warmup_thread is None and not loaded():
+            _warmup_thread = threading.Thread(target=_warm_up, name="scapy-warmup", daemon=True)
+            _warmup_thread.start()
+    return _warmup_thread
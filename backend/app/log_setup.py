@@ -0,0 +1,91 @@
+import atexit
+import itertools
+import logging
+import logging.handlers
+import os
+import queue
+import sys
+import threading
+
+# Everything under the "app" package logs through one queue
+ROOT_LOGGER = "app"
+LOG_LEVEL = os.environ.get("LOG_LEVEL", "INFO").upper()
+LOG_FORMAT = "%(asctime)s %(levelname)-7s %(name)s [%(threadName)s] %(message)s"
+# Request bodies can hold credentials; only logged when explicitly enabled
+LOG_REQUEST_BODIES = os.environ.get("LOG_REQUEST_BODIES", "0") == "1"
+# Default 1-in-N rate for per-packet events (DEBUG level)
+PACKET_LOG_EVERY = int(os.environ.get("PACKET_LOG_EVERY", "1000"))
+
+_lock = threading.Lock()
+_listener = None
+
+
+class _DeferredQueueHandler(logging.handlers.QueueHandler):
+    """Queues records unformatted; the listener's handler formats them.
+
+    The stock prepare() merges the arguments into the message and renders
+    any traceback on the logging thread, which is only needed when records
+    cross a process boundary. Arguments are formatted on the listener thread,
+    so callers must log immutable values rather than objects they mutate
+    after the call.
+    """
+
+    def prepare(self, record):
+        return record
+
+
+def configure_logging(level=None, stream=None):
+    """Route the "app" logger tree through a queue drained by a background thread.
+
+    Callers only build the record and enqueue it; the listener thread does
+    the formatting and the (possibly blocking) write. Safe to call repeatedly:
+    the first call wins unless level is given, which just adjusts the level.
+    """
+    global _listener
+    logger = logging.getLogger(ROOT_LOGGER)
+    with _lock:
+        if level is not None or _listener is None:
+            logger.setLevel(level or LOG_LEVEL)
+        if _listener is not None:
+            return _listener
+        handler = logging.StreamHandler(stream or sys.stderr)
+        handler.setFormatter(logging.Formatter(LOG_FORMAT))
+        log_queue = queue.SimpleQueue()
+        # Adding a handler first also stops Flask from attaching its own to "app"
+        logger.addHandler(_DeferredQueueHandler(log_queue))
+        logger.propagate = False
+        _listener = logging.handlers.QueueListener(log_queue, handler, respect_handler_level=True)
+        _listener.start()
+        atexit.register(flush_logging, restart=False)
+        return _listener
+
+
+def flush_logging(restart=True):
+    """Write out everything queued so far; the listener keeps running unless restart=False."""
+    with _lock:
+        if _listener is not None and _listener._thread is not None:
+            _listener.stop()
+            if restart:
+                _listener.start()
+
+
+class SampledLogger:
+    """Emit only every Nth call, for events that fire once per packet.
+
+    The level check comes first, so a disabled level costs one method call;
+    an enabled one costs a counter increment except on the sampled call,
+    which also reports how many calls it stands for.
+    """
+
+    def __init__(self, logger, every=PACKET_LOG_EVERY, level=logging.DEBUG):
+        self.logger = logger
+        self.every = max(1, int(every))
+        self.level = level
+        self._count = itertools.count(1)  # next() is atomic under the GIL
+
+    def log(self, msg, *args):
+        if not self.logger.isEnabledFor(self.level):
+            return
+        n = next(self._count)
+        if n % self.every == 0:
+            self.logger.log(self.level, f"{msg} (1 of {self.every}, {n} total)", *args)
@@ -0,0 +1,168 @@
+import bisect
+import os
+import threading
+import time
+
+# Seconds; spans an in-memory verdict lookup up to a full nmap run
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+_metrics = []
+_collectors = []
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names, values, extra=""):
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _number(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    """Monotonic count per label combination. Label values are positional."""
+
+    kind = "counter"
+
+    def __init__(self, name, help_text, labels=()):
+        self.name, self.help, self.labels = name, help_text, tuple(labels)
+        self._lock = threading.Lock()
+        self._values = {}
+        _metrics.append(self)
+
+    def inc(self, *label_values, amount=1):
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0) + amount
+
+    def value(self, *label_values):
+        return self._values.get(label_values, 0)
+
+    def render(self):
+        with self._lock:
+            items = sorted(self._values.items())
+        return [f"{self.name}{_labels(self.labels, key)} {_number(v)}" for key, v in items]
+
+
+class _Timer:
+    __slots__ = ("histogram", "label_values", "start")
+
+    def __init__(self, histogram, label_values):
+        self.histogram, self.label_values = histogram, label_values
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.histogram.observe(time.perf_counter() - self.start, *self.label_values)
+        return False
+
+
+class Histogram:
+    """Bucketed distribution per label combination (cumulative only when rendered)."""
+
+    kind = "histogram"
+
+    def __init__(self, name, help_text, labels=(), buckets=DEFAULT_BUCKETS):
+        self.name, self.help, self.labels = name, help_text, tuple(labels)
+        self.buckets = tuple(sorted(buckets))
+        self._lock = threading.Lock()
+        self._values = {}  # label values -> [per-bucket counts (+Inf last), sum]
+        _metrics.append(self)
+
+    def observe(self, value, *label_values):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            entry = self._values.get(label_values)
+            if entry is None:
+                entry = self._values[label_values] = [[0] * (len(self.buckets) + 1), 0.0]
+            entry[0][index] += 1
+            entry[1] += value
+
+    def time(self, *label_values):
+        """Context manager observing the elapsed seconds of its block."""
+        return _Timer(self, label_values)
+
+    def count(self, *label_values):
+        entry = self._values.get(label_values)
+        return sum(entry[0]) if entry else 0
+
+    def render(self):
+        with self._lock:
+            items = sorted((key, (list(counts), total)) for key, (counts, total) in self._values.items())
+        lines = []
+        for key, (counts, total) in items:
+            running = 0
+            for bound, n in zip(self.buckets + (float("inf"),), counts):
+                running += n
+                le = 'le="' + _number(bound) + '"'
+                lines.append(f"{self.name}_bucket{_labels(self.labels, key, le)} {running}")
+            lines.append(f"{self.name}_sum{_labels(self.labels, key)} {_number(total)}")
+            lines.append(f"{self.name}_count{_labels(self.labels, key)} {running}")
+        return lines
+
+
+def register_collector(fn):
+    """Add fn() -> [(name, kind, help, [(labels dict, value)])], read at scrape time.
+
+    For values the code already tracks (packet counters, sniffer state), so
+    the hot path pays nothing extra for exposing them. Collectors may report
+    the same metric name with different labels; the samples are merged.
+    """
+    _collectors.append(fn)
+    return fn
+
+
+def render_metrics():
+    """All metrics in the Prometheus text exposition format."""
+    out = []
+    for metric in _metrics:
+        out.append(f"# HELP {metric.name} {metric.help}")
+        out.append(f"# TYPE {metric.name} {metric.kind}")
+        out.extend(metric.render())
+    families = {}
+    for collector in _collectors:
+        try:
+            for name, kind, help_text, samples in collector():
+                families.setdefault(name, (kind, help_text, []))[2].extend(samples)
+        except Exception as e:
+            out.append(f"# collector {getattr(collector, '__name__', collector)} failed: {_escape(e)}")
+    for name, (kind, help_text, samples) in families.items():
+        out.append(f"# HELP {name} {help_text}")
+        out.append(f"# TYPE {name} {kind}")
+        for labels, value in samples:
+            out.append(f"{name}{_labels(labels.keys(), labels.values())} {_number(value)}")
+    return "\n".join(out) + "\n"
+
+
+SCAN_STEP_SECONDS = Histogram("wifi_scan_step_seconds", "Time each /scan/all step took to return.", ("step",))
+SCAN_STEP_RESULTS = Counter("wifi_scan_step_results_total", "Step results by returned status.", ("step", "status"))
+SCAN_STEP_TIMEOUTS = Counter("wifi_scan_step_timeouts_total", "Steps that missed their /scan/all deadline.", ("step",))
+SCAN_ALL_SECONDS = Histogram("wifi_scan_all_seconds", "Wall time of a combined scan, first step to last.")
+HTTP_REQUEST_SECONDS = Histogram("wifi_scan_http_request_seconds", "HTTP request latency.",
+                                 ("endpoint", "method", "code"))
+SUBPROCESS_SPAWNS = Counter("wifi_scan_subprocess_spawns_total", "External commands started.", ("command",))
+SUBPROCESS_SECONDS = Histogram("wifi_scan_subprocess_seconds", "External command run time.", ("command",))
+SUBPROCESS_FAILURES = Counter("wifi_scan_subprocess_failures_total",
+                              "External commands that failed, by reason (exit, timeout, missing).",
+                              ("command", "reason"))
+SRP_SECONDS = Histogram("wifi_scan_srp_seconds", "scapy srp() send/receive round time.", ("caller",))
+ROGUE_AP_SCAN_SECONDS = Histogram("wifi_scan_rogue_ap_scan_seconds", "Time to list nearby access points.")
+SRP_FAILURES = Counter("wifi_scan_srp_failures_total", "srp() calls that raised or got no answer.",
+                       ("caller", "reason"))
+
+
+def command_name(cmd):
+    """Short label for a command line: the program's base name."""
+    first = cmd.split(None, 1)[0] if isinstance(cmd, str) else cmd[0]
+    return os.path.basename(str(first))
+
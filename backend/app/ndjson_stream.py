@@ -0,0 +1,59 @@
+import zlib
+
+# Compressed bytes buffered before a chunk is handed to the response
+GZIP_FLUSH_BYTES = 64 * 1024
+READ_SIZE = 64 * 1024
+# A single record larger than this is rejected rather than buffered
+MAX_LINE_BYTES = 16 * 1024 * 1024
+
+
+def gzip_chunks(lines, level=6, flush_bytes=GZIP_FLUSH_BYTES):
+    """Gzip an iterable of byte strings on the fly, yielding ~flush_bytes chunks."""
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 31)  # 31: gzip container
+    pending = []
+    size = 0
+    for line in lines:
+        out = compressor.compress(line)
+        if out:
+            pending.append(out)
+            size += len(out)
+            if size >= flush_bytes:
+                yield b"".join(pending)
+                pending, size = [], 0
+    pending.append(compressor.flush())
+    yield b"".join(pending)
+
+
+def _blocks(stream, read_size):
+    """Decoded blocks of at most ~read_size bytes each, gunzipping if the stream is gzip."""
+    data = stream.read(read_size)
+    if data[:2] != b"\x1f\x8b":
+        while data:
+            yield data
+            data = stream.read(read_size)
+        return
+    decompressor = zlib.decompressobj(47)  # 47: accept gzip or zlib headers
+    while data:
+        # Bounded steps: a highly compressed read can't expand into one huge block
+        while data:
+            yield decompressor.decompress(data, read_size)
+            data = decompressor.unconsumed_tail
+        data = stream.read(read_size)
+    yield decompressor.flush()
+
+
+def iter_lines(stream, read_size=READ_SIZE):
+    """Yield newline-delimited lines from a binary stream, gunzipping it if needed.
+
+    Works in fixed-size reads and bounded decompression steps, so memory
+    does not grow with the size of the upload.
+    """
+    carry = b""
+    for block in _blocks(stream, read_size):
+        lines = (carry + block).split(b"\n")
+        carry = lines.pop()
+        if len(carry) > MAX_LINE_BYTES:
+            raise ValueError(f"line longer than {MAX_LINE_BYTES} bytes")
+        yield from lines
+    if carry:
+        yield carry
@@ -1,79 +1,94 @@
+import logging
+import os
 import subprocess
 import platform
-import re
-import shutil
+import time
+import xml.etree.ElementTree as ET
 
+from app import commands
+from app.async_port_scanner import parse_ports, port_result, scan_open_ports_native
+from app.gateway import get_gateway_ip
+from app.log_setup import configure_logging
+
+logger = logging.getLogger(__name__)
+
+
+def find_nmap():
+    """Path to the nmap binary, or None when it is not installed."""
+    if platform.system() == "Windows":
+        nmap_path = r"C:\Program Files (x86)\Nmap\nmap.exe"
+        return nmap_path if os.path.exists(nmap_path) else commands.which("nmap")
+    return commands.which("nmap")
+
+
+# Bytes read from nmap's stdout per XML parser feed
+READ_CHUNK = 64 * 1024
 
-def get_gateway_ip():
-    """Best-effort gateway IP detection across platforms (Windows/macOS/Linux)."""
-    system = platform.system()
-    try:
-        if system == "Windows":
-            try:
-                output = subprocess.check_output("ipconfig", shell=True, text=True)
-                lines = output.splitlines()
-                for i, line in enumerate(lines):
-                    if "Default Gateway" in line:
-                        parts = line.split(":")
-                        if len(parts) == 2 and parts[1].strip():
-                            return parts[1].strip()
-                        elif i + 1 < len(lines):
-                            nxt = lines[i + 1].strip()
-                            if nxt:
-                                return nxt
-            except Exception:
-                pass
-
-        elif system == "Darwin":  # macOS
-            try:
-                output = subprocess.check_output("route -n get default | grep 'gateway'", shell=True, text=True)
-                m = re.search(r"gateway:\s*([0-9\.]+)", output)
-                if m:
-                    return m.group(1)
-            except Exception:
-                pass
-
-        else:  # Linux and others
-            # Prefer `ip route`
-            try:
-                output = subprocess.check_output("ip route show default", shell=True, text=True)
-                m = re.search(r"default via ([0-9\.]+)", output)
-                if m:
-                    return m.group(1)
-            except Exception:
-                pass
-            # Fallback to `route -n`
-            try:
-                output = subprocess.check_output("route -n | grep '^0.0.0.0'", shell=True, text=True)
-                m = re.search(r"^0\.0\.0\.0\s+([0-9\.]+)", output)
-                if m:
-                    return m.group(1)
-            except Exception:
-                pass
-
-        print("❌ Could not find default gateway.")
-        return None
-    except Exception as e:
-        print("❌ Error getting gateway IP:", e)
-        return None
 
+def iter_nmap_xml_ports(chunks):
+    """Parse nmap -oX output incrementally; yield one dict per <port> as it closes.
 
-def scan_open_ports(ip):
-    print(f"🔍 Scanning open ports for {ip}...")
+    Each dict is {"port", "protocol", "state", "service"}. Elements are
+    discarded once read, so memory stays flat however many ports nmap reports.
+    """
+    parser = ET.XMLPullParser(events=("end",))
+    for chunk in chunks:
+        parser.feed(chunk)
+        for _event, elem in parser.read_events():
+            if elem.tag == "port":
+                state = elem.find("state")
+                service = elem.find("service")
+                yield {
+                    "port": int(elem.get("portid")),
+                    "protocol": elem.get("protocol"),
+                    "state": state.get("state") if state is not None else None,
+                    "service": service.get("name") if service is not None else None,
+                }
+                elem.clear()
+            elif elem.tag == "host":
+                elem.clear()
+    parser.close()
+
+
+def _run_nmap_xml(cmd, timeout):
+    """Run nmap with XML on stdout and parse it while it streams; return the port list."""
     try:
-        if platform.system() == "Windows":
-            nmap_path = r"C:\Program Files (x86)\Nmap\nmap.exe"
-        else:
-            nmap_path = shutil.which("nmap") or "/opt/homebrew/bin/nmap"
+        return list(iter_nmap_xml_ports(commands.iter_stdout(cmd, timeout, READ_CHUNK)))
+    except ET.ParseError:
+        raise subprocess.CalledProcessError(0, cmd, output="nmap produced invalid XML")
+
 
-        if not shutil.which("nmap") and not platform.system() == "Windows":
-            return {"status": "error", "message": "nmap not installed"}
+def scan_open_ports(ip, timeout=None, engine="auto", ports=None):
+    """Scan TCP ports on `ip` with nmap or the built-in asyncio engine.
 
-        cmd = [nmap_path, "-sT", "-F", ip]
-        result = subprocess.check_output(cmd, text=True, stderr=subprocess.STDOUT)
+    engine="auto" uses nmap when it is installed and falls back to the
+    native connect scanner otherwise. `ports` takes a port-set name
+    ("fast", "all"), a "22,80,8000-8100" string or a list; default "fast".
+    Both engines return the open ports as "ports" ([{"port", "protocol",
+    "state", "service"}]), plus the deprecated "open_ports" (numbers as
+    strings) unless LEGACY_OPEN_PORTS=0.
+    """
+    logger.info("🔍 Scanning open ports for %s...", ip)
+    nmap_path = find_nmap() if engine in ("auto", "nmap") else None
+    if engine == "native" or (engine == "auto" and not nmap_path):
+        return scan_open_ports_native(ip, ports=ports, timeout=timeout)
+    if engine != "nmap" and engine != "auto":
+        return {"status": "error", "message": f"unknown scan engine: {engine}"}
+    if not nmap_path:
+        return {"status": "error", "message": "nmap not installed"}
+
+    try:
+        if ports is None or ports == "fast":
+            port_args = ["-F"]
+        else:
+            port_args = ["-p", ",".join(str(p) for p in parse_ports(ports))]
 
-        open_ports = re.findall(r"(\d+)/tcp\s+open", result)
-        return {"status": "ok", "open_ports": open_ports, "raw": result}
+        start = time.monotonic()
+        cmd = [nmap_path, "-sT", *port_args, "-oX", "-", ip]
+        found = [p for p in _run_nmap_xml(cmd, timeout) if p["state"] == "open"]
+        return port_result(found, "nmap", start)
+    except subprocess.TimeoutExpired:
+        return {"status": "timeout", "message": f"nmap did not finish within {timeout:g}s"}
     except subprocess.CalledProcessError as e:
         return {"status": "error", "message": e.output}
     except Exception as e:
@@ -81,6 +96,7 @@ def scan_open_ports(ip):
 
 
 if __name__ == "__main__":
+    configure_logging()
     gateway_ip = get_gateway_ip()
     if gateway_ip:
         result = scan_open_ports(gateway_ip)
@@ -0,0 +1,139 @@
+import threading
+import time
+from collections import OrderedDict
+
+from app.auto_scan_wifi import get_wifi_info
+from app.gateway import get_default_route
+from app.single_flight import single_flight
+
+# Seconds a detector result stays valid on an unchanged network
+DETECTOR_TTLS = {
+    "wifi_info": 10.0,
+    "arp_active": 15.0,
+    "rogue_ap_fresh": 60.0,
+    "open_ports": 300.0,
+    "lan": 300.0,
+}
+DEFAULT_TTL = 30.0
+MAX_ENTRIES = 256
+
+# Results that say the scan did not really happen are never cached...
+UNCACHEABLE_STATUSES = {"error", "timeout", "unknown"}
+# ...except Wi-Fi info, where "not connected" is a real answer and the lookup
+# runs on every cached call to establish the network identity
+ALWAYS_CACHED = {"wifi_info"}
+
+
+def _cacheable(detector, result):
+    if detector in ALWAYS_CACHED:
+        return True
+    if not isinstance(result, dict):
+        return result is not None
+    return "error" not in result and result.get("status") not in UNCACHEABLE_STATUSES
+
+
+class ResultCache:
+    """LRU cache of detector results keyed by network identity.
+
+    The identity is (SSID, BSSID, gateway). The gateway comes from the
+    netlink-invalidated route cache. SSID and BSSID come from the last
+    cached get_wifi_info() result, which is refreshed whenever that entry
+    expires. When the identity changes, every entry is dropped. Misses run
+    through single_flight, so concurrent misses share one execution.
+    """
+
+    def __init__(self, ttls=None, max_entries=MAX_ENTRIES, wifi_fn=get_wifi_info):
+        self.wifi_fn = wifi_fn
+        self.ttls = dict(DETECTOR_TTLS, **(ttls or {}))
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # key -> (expires_at, result)
+        self._identity = None
+        self._stats = {"hits": 0, "misses": 0, "bypassed": 0, "evictions": 0, "invalidations": 0}
+
+    def _lookup(self, key, now):
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry[0] <= now:
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return entry
+
+    def _store(self, key, result, ttl, now):
+        self._entries[key] = (now + ttl, result)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self._stats["evictions"] += 1
+
+    def _call(self, detector, identity, args_key, fn, args, kwargs, fresh):
+        key = (detector, identity, args_key)
+        now = time.monotonic()
+        with self._lock:
+            if fresh:
+                self._stats["bypassed"] += 1
+            else:
+                entry = self._lookup(key, now)
+                if entry is not None:
+                    self._stats["hits"] += 1
+                    return entry[1]
+                self._stats["misses"] += 1
+
+        result = single_flight.do((detector, args_key), fn, *args, **kwargs)
+        if _cacheable(detector, result):
+            with self._lock:
+                self._store(key, result, self.ttls.get(detector, DEFAULT_TTL), time.monotonic())
+        return result
+
+    def _gateway(self):
+        route = get_default_route()
+        return route[1] if route else None
+
+    def _note_identity(self, identity):
+        with self._lock:
+            if self._identity is not None and identity != self._identity:
+                # Roamed to another AP or network: nothing cached still applies
+                self._entries.clear()
+                self._stats["invalidations"] += 1
+            self._identity = identity
+
+    def wifi_info(self, fresh=False):
+        """Cached get_wifi_info(); also refreshes the network identity."""
+        gateway = self._gateway()
+        info = self._call("wifi_info", gateway, (), self.wifi_fn, (), {}, fresh)
+        if isinstance(info, dict) and "error" not in info:
+            self._note_identity((info.get("SSID"), (info.get("BSSID") or "").lower() or None, gateway))
+        else:
+            self._note_identity((None, None, gateway))
+        return info
+
+    def identity(self):
+        """Current (ssid, bssid, gateway); re-reads Wi-Fi info if its entry expired."""
+        self.wifi_info()
+        with self._lock:
+            return self._identity
+
+    def call(self, detector, fn, *args, fresh=False, args_key=(), **kwargs):
+        """Return fn(*args, **kwargs), from cache while this network's entry is still valid.
+
+        `args_key` must capture every argument that changes the result.
+        fresh=True skips the lookup but still stores the new result.
+        """
+        return self._call(detector, self.identity(), args_key, fn, args, kwargs, fresh)
+
+    def invalidate(self):
+        with self._lock:
+            self._entries.clear()
+            self._identity = None
+            self._stats["invalidations"] += 1
+
+    def stats(self):
+        with self._lock:
+            ssid, bssid, gateway = self._identity or (None, None, None)
+            return {**self._stats, "entries": len(self._entries), "capacity": self.max_entries,
+                    "identity": {"ssid": ssid, "bssid": bssid, "gateway": gateway}, "ttls": self.ttls}
+
+
+result_cache = ResultCache()
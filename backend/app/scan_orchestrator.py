@@ -0,0 +1,160 @@
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+from app.detect_arp_spoofing import get_arp_verdict
+from app.detect_dns_spoofing import get_dns_verdict
+from app.open_port_scanner import scan_open_ports
+from app.gateway import get_gateway_ip
+from app.detect_rogue_ap import get_rogue_ap_verdict
+from app.threat_level_ai import calculate_threat_score
+from app.lan_sweep import scan_lan
+from app.result_cache import result_cache
+from app.metrics import SCAN_ALL_SECONDS, SCAN_STEP_RESULTS, SCAN_STEP_SECONDS, SCAN_STEP_TIMEOUTS
+
+# Bounded pool shared by every combined scan. A step that overruns its deadline
+# keeps its worker until the underlying call returns, so keep some headroom.
+MAX_WORKERS = 8
+_executor = ThreadPoolExecutor(max_workers=MAX_WORKERS, thread_name_prefix="scan")
+
+# Per-step deadlines in seconds, measured from the moment the scan starts.
+STEP_DEADLINES = {
+    "wifi_info": 5.0,
+    "arp_spoofing": 2.0,
+    "dns_spoofing": 2.0,
+    "rogue_ap": 10.0,
+    "open_ports": 30.0,
+    "lan_hosts": 60.0,
+}
+
+# Status reported for a step that raised, matching the old sequential scan_all
+ERROR_STATUS = {"wifi_info": "error"}
+
+# Steps whose results feed calculate_threat_score
+THREAT_INPUTS = ("arp_spoofing", "dns_spoofing", "rogue_ap", "open_ports")
+
+
+def _scan_gateway_ports(deadline, fresh=False):
+    ip = get_gateway_ip()
+    if not ip:
+        return {"status": "unknown", "message": "No gateway IP"}
+    # Same cache key as GET /scan/open_ports with default arguments
+    ports_scan = result_cache.call("open_ports", scan_open_ports, ip, timeout=deadline,
+                                   fresh=fresh, args_key=(ip, "auto", None))
+    return ports_scan if ports_scan is not None else {"status": "unknown", "message": "scan failed"}
+
+
+def _build_steps(include_lan=False, fresh=False):
+    """Map each step name to a callable taking its deadline in seconds.
+
+    fresh=True bypasses the result cache for the cached steps.
+    """
+    steps = {
+        "wifi_info": lambda deadline: result_cache.wifi_info(fresh=fresh),
+        "arp_spoofing": lambda deadline: get_arp_verdict(),
+        "dns_spoofing": lambda deadline: get_dns_verdict(),
+        "rogue_ap": lambda deadline: get_rogue_ap_verdict(),
+        "open_ports": lambda deadline: _scan_gateway_ports(deadline, fresh),
+    }
+    if include_lan:
+        steps["lan_hosts"] = lambda deadline: result_cache.call("lan", scan_lan, fresh=fresh, args_key=(None, None))
+    return steps
+
+
+def _status_label(result):
+    if isinstance(result, dict):
+        if "status" in result:
+            return str(result["status"])
+        if "error" in result:
+            return "error"
+    return "ok"
+
+
+def _run_step(name, fn, deadline):
+    # Timed to completion even past the deadline, so slow steps show their real latency
+    start = time.perf_counter()
+    try:
+        result = fn(deadline)
+    except Exception as e:
+        result = {"status": ERROR_STATUS.get(name, "unknown"), "message": str(e)}
+    SCAN_STEP_SECONDS.observe(time.perf_counter() - start, name)
+    SCAN_STEP_RESULTS.inc(name, _status_label(result))
+    return result
+
+
+def run_step(name, fresh=False):
+    """Run one detector step on the calling thread, with the usual metrics and error handling."""
+    return _run_step(name, _build_steps(include_lan=name == "lan_hosts", fresh=fresh)[name], STEP_DEADLINES[name])
+
+
+def _timeout_result(name, deadline):
+    return {"status": "timeout", "message": f"{name} did not finish within {deadline:g}s"}
+
+
+def threat_score(results):
+    """calculate_threat_score() over the step results, never raising."""
+    try:
+        # Provide a minimal, shape-agnostic payload
+        threat_input = {
+            "arp_spoofing": results.get("arp_spoofing"),
+            "dns_spoofing": results.get("dns_spoofing"),
+            "rogue_ap": results.get("rogue_ap"),
+            # The scan result dict carries a structured "ports" list
+            "open_ports": results.get("open_ports"),
+            "lan_hosts": results.get("lan_hosts"),
+        }
+        return calculate_threat_score(threat_input)
+    except Exception as e:
+        return {"status": "unknown", "message": str(e)}
+
+
+def iter_scan_results(deadlines=None, include_lan=False, fresh=False):
+    """Run every detector concurrently and yield (name, result) as each finishes.
+
+    Steps that miss their deadline are cancelled (if not yet started) and
+    yielded with a "timeout" status. "threat_score" is yielded as soon as all
+    of its inputs are available, without waiting for unrelated steps.
+    include_lan=True adds the subnet sweep as a "lan_hosts" step and feeds
+    it into the threat score. fresh=True re-runs cached detectors.
+    """
+    limits = dict(STEP_DEADLINES)
+    if deadlines:
+        limits.update(deadlines)
+
+    start = time.monotonic()
+    pending = {}
+    threat_inputs = THREAT_INPUTS + (("lan_hosts",) if include_lan else ())
+    for name, fn in _build_steps(include_lan, fresh).items():
+        future = _executor.submit(_run_step, name, fn, limits[name])
+        pending[future] = name
+
+    results = {}
+    scored = False
+    while pending:
+        now = time.monotonic()
+        # Expire every step whose deadline has passed
+        for future, name in list(pending.items()):
+            if now - start >= limits[name] and not future.done():
+                future.cancel()
+                del pending[future]
+                SCAN_STEP_TIMEOUTS.inc(name)
+                results[name] = _timeout_result(name, limits[name])
+                yield name, results[name]
+
+        if pending:
+            next_deadline = min(limits[name] for name in pending.values())
+            done, _ = wait(pending, timeout=max(0.0, start + next_deadline - time.monotonic()),
+                           return_when=FIRST_COMPLETED)
+            for future in done:
+                name = pending.pop(future)
+                results[name] = future.result()
+                yield name, results[name]
+
+        if not scored and all(name in results for name in threat_inputs):
+            scored = True
+            yield "threat_score", threat_score(results)
+    SCAN_ALL_SECONDS.observe(time.monotonic() - start)
+
+
+def run_all_scans(deadlines=None, include_lan=False, fresh=False):
+    """Run every detector concurrently and return all results in one dict."""
+    return dict(iter_scan_results(deadlines, include_lan, fresh))
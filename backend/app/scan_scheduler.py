@@ -0,0 +1,277 @@
+import json
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from app.metrics import register_collector
+from app.scan_orchestrator import THREAT_INPUTS, run_step, threat_score
+from app.threat_rules import get_rules
+
+# Per detector (fastest, slowest) seconds between runs. A detector starts at its
+# fastest cadence and backs off while its answer stays the same.
+CADENCES = {
+    "wifi_info": (5.0, 60.0),
+    "arp_spoofing": (2.0, 30.0),
+    "dns_spoofing": (2.0, 30.0),
+    "rogue_ap": (15.0, 300.0),
+    "open_ports": (60.0, 1800.0),
+}
+BACKOFF = 1.5
+# Opt-in: set to 1 to scan in the background (it runs nmap and ARP probes
+# periodically) and answer GETs from the snapshot; POST /scan/scheduler/start also works
+ENABLED = os.environ.get("SCAN_SCHEDULER", "0") == "1"
+
+logger = logging.getLogger(__name__)
+
+
+def _dumps(obj):
+    # Same bytes as Flask's jsonify (sorted keys, compact, trailing newline)
+    return (json.dumps(obj, sort_keys=True, separators=(",", ":"), default=str) + "\n").encode()
+
+
+def _status(result):
+    return result.get("status") if isinstance(result, dict) else None
+
+
+def _is_alert(result):
+    # The statuses the threat rules count as a detection ("threat", "warning", ...)
+    status = _status(result)
+    return isinstance(status, str) and status.lower() in get_rules().detected_statuses
+
+
+def _bssid(result):
+    if not isinstance(result, dict):
+        return None
+    return (result.get("BSSID") or "").lower() or None
+
+
+class Snapshot:
+    """One published view of every section. Replaced as a whole, never mutated.
+
+    `sections` maps a detector (and "threat_score") to {"result", "updated_at",
+    "interval", "next_run_at"}; `bodies` holds each section's result, the
+    combined /scan/all result ("all") and the whole snapshot ("snapshot")
+    pre-serialized, so readers only look things up.
+    """
+
+    __slots__ = ("version", "published_at", "sections", "bodies")
+
+    def __init__(self, version, published_at, sections, bodies):
+        self.version = version
+        self.published_at = published_at
+        self.sections = sections
+        self.bodies = bodies
+
+    def complete(self):
+        """True once every /scan/all section has a result."""
+        return "threat_score" in self.sections and all(name in self.sections for name in CADENCES)
+
+    def updated_at(self, name):
+        """When a section (or, for "all", its oldest section) was last refreshed."""
+        if name == "all":
+            return min(section["updated_at"] for section in self.sections.values())
+        return self.sections[name]["updated_at"]
+
+
+EMPTY = Snapshot(0, None, {}, {"all": None,
+                               "snapshot": _dumps({"version": 0, "published_at": None, "sections": {}})})
+
+
+class ScanScheduler:
+    """Runs every detector in the background on an adaptive cadence.
+
+    Each detector reruns once its interval has elapsed. The interval grows
+    by BACKOFF (up to the slowest cadence) while the detector's status stays
+    the same and is not a detection, and drops back to the fastest cadence
+    when its status changes. A failure ("unknown", "error", "timeout") is
+    retried at the fastest cadence once, then backs off like any steady
+    state, so a missing tool or gateway doesn't re-run scans in a loop. When the threat level rises or the BSSID changes,
+    every detector drops to its fastest cadence and runs immediately.
+    Results are published into a new Snapshot that readers pick up with a
+    single attribute read.
+    """
+
+    def __init__(self, cadences=None, step_fn=run_step):
+        self.cadences = dict(cadences or CADENCES)
+        self.step_fn = step_fn
+        self.autostart = ENABLED
+        self.last_error = None
+        self.runs = dict.fromkeys(self.cadences, 0)
+        self.speedups = 0
+        self._snapshot = EMPTY
+        self._intervals = {name: fast for name, (fast, _slow) in self.cadences.items()}
+        self._next_run = dict.fromkeys(self.cadences, 0.0)
+        self._in_flight = set()
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+        self._executor = None
+
+    def snapshot(self):
+        return self._snapshot
+
+    def _run(self):
+        while not self._stop.is_set():
+            now = time.monotonic()
+            with self._lock:
+                due = [name for name, at in self._next_run.items() if at <= now and name not in self._in_flight]
+                self._in_flight.update(due)
+                idle = [at for name, at in self._next_run.items() if name not in self._in_flight]
+            for name in due:
+                self._executor.submit(self._run_detector, name)
+            # Sleep until the next detector is due, or until a publish reschedules things
+            self._wake.wait(max(0.0, min(idle) - time.monotonic()) if idle else None)
+            self._wake.clear()
+
+    def _run_detector(self, name):
+        started = time.time()
+        try:
+            # fresh=True: the scheduler is what refreshes the result cache
+            result = self.step_fn(name, fresh=True)
+        except Exception as e:
+            result = {"status": "unknown", "message": str(e)}
+            self.last_error = str(e)
+        self.publish(name, result, now=started)
+
+    def _reschedule(self, name, previous, result, now):
+        fast, slow = self.cadences[name]
+        status = _status(result)
+        if previous is None or _is_alert(result) or status != _status(previous["result"]):
+            self._intervals[name] = fast
+        else:
+            self._intervals[name] = min(self._intervals[name] * BACKOFF, slow)
+        self._next_run[name] = now + self._intervals[name]
+
+    def _speed_up(self, reason, now):
+        logger.info("⏩ %s: scanning everything at the fastest cadence", reason)
+        self.speedups += 1
+        for name, (fast, _slow) in self.cadences.items():
+            self._intervals[name] = fast
+            self._next_run[name] = now
+
+    def publish(self, name, result, now=None):
+        """Record a detector result and swap in a new snapshot."""
+        now = time.time() if now is None else now
+        mono = time.monotonic()
+        with self._lock:
+            old = self._snapshot
+            sections = dict(old.sections)
+            bodies = dict(old.bodies)
+            previous = sections.get(name)
+            self._in_flight.discard(name)
+            self.runs[name] += 1
+            self._reschedule(name, previous, result, mono)
+
+            if name == "wifi_info" and previous is not None and _bssid(result) != _bssid(previous["result"]):
+                self._speed_up(f"BSSID changed to {_bssid(result)}", mono)
+            sections[name] = {"result": result, "updated_at": now, "interval": self._intervals[name],
+                              "next_run_at": now + (self._next_run[name] - mono)}
+            bodies[name] = _dumps(result)
+
+            if all(step in sections for step in THREAT_INPUTS):
+                score = threat_score({step: sections[step]["result"] for step in THREAT_INPUTS})
+                before = sections.get("threat_score")
+                if before is not None and isinstance(score, dict) and isinstance(before["result"], dict) \
+                        and score.get("score", 0) > before["result"].get("score", 0) \
+                        and score.get("threat_level") != before["result"].get("threat_level"):
+                    self._speed_up(f"Threat level rose to {score.get('threat_level')}", mono)
+                # The score is as fresh as the oldest detector result that went into it
+                sections["threat_score"] = {"result": score, "interval": None, "next_run_at": None,
+                                            "updated_at": min(sections[step]["updated_at"] for step in THREAT_INPUTS)}
+                bodies["threat_score"] = _dumps(score)
+
+            snapshot = Snapshot(old.version + 1, now, sections, bodies)
+            if snapshot.complete():
+                bodies["all"] = _dumps({step: section["result"] for step, section in sections.items()})
+            bodies["snapshot"] = _dumps({"version": snapshot.version, "published_at": now, "sections": sections})
+            self._snapshot = snapshot
+        self._wake.set()
+        return snapshot
+
+    def trigger(self, names=None):
+        """Run the given detectors (all by default) as soon as possible."""
+        with self._lock:
+            for name in names or self.cadences:
+                self._next_run[name] = 0.0
+        self._wake.set()
+
+    def is_running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        """Start the scheduler thread if it is not already running."""
+        self.autostart = True
+        with self._lock:
+            if not self.is_running():
+                self._stop.clear()
+                self._executor = ThreadPoolExecutor(max_workers=len(self.cadences),
+                                                    thread_name_prefix="scheduled-scan")
+                self._thread = threading.Thread(target=self._run, name="scan-scheduler", daemon=True)
+                self._thread.start()
+        return self.health()
+
+    def stop(self):
+        """Stop scheduling; the last snapshot keeps being served."""
+        self.autostart = False
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout=1)
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+        with self._lock:
+            self._in_flight.clear()
+        return self.health()
+
+    def health(self):
+        snapshot, now = self._snapshot, time.monotonic()
+        return {
+            "running": self.is_running(),
+            "version": snapshot.version,
+            "published_at": snapshot.published_at,
+            "detectors": {
+                name: {
+                    "interval": self._intervals[name],
+                    "due_in": round(max(0.0, self._next_run[name] - now), 3),
+                    "running": name in self._in_flight,
+                    "runs": self.runs[name],
+                    "updated_at": snapshot.sections[name]["updated_at"] if name in snapshot.sections else None,
+                }
+                for name in self.cadences
+            },
+            "speedups": self.speedups,
+            "error": self.last_error,
+        }
+
+
+scan_scheduler = ScanScheduler()
+
+
+@register_collector
+def _scheduler_metrics():
+    snapshot, now = scan_scheduler.snapshot(), time.time()
+    return [
+        ("wifi_scan_scheduler_running", "gauge", "1 while the background scan scheduler runs.",
+         [({}, int(scan_scheduler.is_running()))]),
+        ("wifi_scan_scheduler_runs_total", "counter", "Scheduled detector runs.",
+         [({"step": name}, runs) for name, runs in scan_scheduler.runs.items()]),
+        ("wifi_scan_scheduler_interval_seconds", "gauge", "Current cadence of each detector.",
+         [({"step": name}, interval) for name, interval in scan_scheduler._intervals.items()]),
+        ("wifi_scan_snapshot_age_seconds", "gauge", "Seconds since each snapshot section was refreshed.",
+         [({"step": name}, now - section["updated_at"]) for name, section in snapshot.sections.items()]),
+    ]
+
+
+def get_snapshot():
+    """Latest published snapshot, starting the scheduler on first use once it is enabled.
+
+    Returns None unless SCAN_SCHEDULER=1 (or POST /scan/scheduler/start), so callers scan on demand.
+    """
+    if not scan_scheduler.autostart:
+        return None
+    if not scan_scheduler.is_running():
+        scan_scheduler.start()
+    return scan_scheduler.snapshot()
@@ -0,0 +1,63 @@
+import threading
+from concurrent.futures import Future
+
+
+def _detector(key):
+    # Counters are kept per detector, not per key: keys carry request
+    # arguments (ports, CIDRs) and would grow without bound
+    return key[0] if isinstance(key, tuple) and key else key
+
+
+class SingleFlight:
+    """Collapse concurrent calls with the same key into one execution.
+
+    The first caller for a key (the leader) runs the function; anyone who
+    arrives while it is still running waits for and shares its result, or
+    its exception. Nothing is cached: once the call returns, the next caller
+    starts a fresh execution.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._in_flight = {}
+        self._stats = {}
+
+    def do(self, key, fn, *args, **kwargs):
+        with self._lock:
+            stats = self._stats.setdefault(_detector(key), {"calls": 0, "executions": 0, "deduplicated": 0})
+            stats["calls"] += 1
+            future = self._in_flight.get(key)
+            leader = future is None
+            if leader:
+                future = self._in_flight[key] = Future()
+                stats["executions"] += 1
+            else:
+                stats["deduplicated"] += 1
+
+        if not leader:
+            return future.result()
+
+        try:
+            result = fn(*args, **kwargs)
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                del self._in_flight[key]
+
+    def stats(self):
+        """Per-detector call counters (with the number of calls in flight) plus totals."""
+        with self._lock:
+            in_flight = [_detector(key) for key in self._in_flight]
+            per_detector = {str(name): dict(s, in_flight=in_flight.count(name)) for name, s in self._stats.items()}
+        totals = {field: sum(s[field] for s in per_detector.values())
+                  for field in ("calls", "executions", "deduplicated")}
+        return {**totals, "detectors": per_detector}
+
+
+# Shared by the Flask routes and the combined-scan orchestrator
+single_flight = SingleFlight()
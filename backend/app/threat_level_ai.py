@@ -1,15 +1,21 @@
 import re
 
+from app.threat_rules import get_rules
 
-def _is_detected(value) -> bool:
+# Weights, port risk buckets and level thresholds live in threat_rules.json
+_NMAP_OPEN_LINE = re.compile(r"^(\d+)/(tcp|udp)\s+open\b")
+
+
+def _is_detected(value, rules=None) -> bool:
     """Normalize various shapes for detection flags.
     Accepts strings like 'detected'/'warning'/'threat', or dicts with status.
     """
+    statuses = (rules or get_rules()).detected_statuses
     if isinstance(value, dict):
         status = (value.get("status") or "").lower()
-        return status in {"detected", "warning", "threat"}
+        return status in statuses
     if isinstance(value, str):
-        return value.lower() in {"detected", "warning", "threat"}
+        return value.lower() in statuses
     return False
 
 
@@ -17,8 +23,9 @@ def _extract_open_ports(value):
     """Return a list of integer port numbers from different shapes.
     Supports:
     - list[int|str]
-    - dict with key 'ports' list
-    - dict with 'raw' nmap output (best-effort parse)
+    - scan_open_ports() result dict with a 'ports' list of {"port", "state"} dicts
+    - dict with an 'open_ports' list, as in older history entries
+    - dict with 'raw' nmap output from older results (best-effort parse)
     """
     ports = []
     if value is None:
@@ -31,10 +38,17 @@ def _extract_open_ports(value):
             except Exception:
                 continue
         return ports
-    # If dict with 'ports'
     if isinstance(value, dict):
+        # Structured scan_open_ports() result: no text to re-parse
+        if isinstance(value.get("open_ports"), list):
+            return _extract_open_ports(value["open_ports"])
+        # If dict with 'ports'
         if isinstance(value.get("ports"), list):
             for p in value["ports"]:
+                if isinstance(p, dict):
+                    if p.get("state", "open") != "open":
+                        continue
+                    p = p.get("port")
                 try:
                     ports.append(int(p))
                 except Exception:
@@ -44,7 +58,7 @@ def _extract_open_ports(value):
         raw = value.get("raw") or value.get("output") or ""
         if isinstance(raw, str) and raw:
             for line in raw.splitlines():
-                m = re.match(r"^(\d+)/(tcp|udp)\s+open\b", line.strip())
+                m = _NMAP_OPEN_LINE.match(line.strip())
                 if m:
                     try:
                         ports.append(int(m.group(1)))
@@ -53,58 +67,102 @@ def _extract_open_ports(value):
     return ports
 
 
-def calculate_threat_score(scan_results):
-    score = 0
-    reasons = []
+def classify_ports(ports, rules=None):
+    """Risk bucket for a host's open ports, e.g. "high", "medium" or "low"."""
+    rules = rules or get_rules()
+    return rules.bucket_risks[min((rules.bucket_of(p) for p in ports), default=rules.other_bucket)]
 
-    # ARP Spoofing
-    if _is_detected(scan_results.get("arp_spoofing")):
-        score += 40
-        reasons.append("ARP spoofing activity detected.")
 
-    # DNS Spoofing
-    if _is_detected(scan_results.get("dns_spoofing")):
-        score += 30
-        reasons.append("DNS spoofing activity detected.")
+def _risky_lan_hosts(value, rules=None):
+    """IPs of LAN hosts whose summary (or open ports) puts them in the rules' LAN risk bucket.
+    Accepts the /scan/lan result dict or its bare "hosts" list.
+    """
+    rules = rules or get_rules()
+    if isinstance(value, dict):
+        value = value.get("hosts")
+    if not isinstance(value, list):
+        return []
+    risky = []
+    for host in value:
+        if not isinstance(host, dict):
+            continue
+        risk = host.get("risk") or classify_ports(_extract_open_ports(host.get("open_ports")), rules)
+        if risk == rules.lan_risk:
+            risky.append(str(host.get("ip")))
+    return sorted(risky)
 
-    # Open ports
+
+def _findings(scan_results, rules):
+    """Normalize one scan result into (arp, dns, rogue_ap, ports_by_bucket, risky_hosts)."""
+    ports_by_bucket = [[] for _ in rules.bucket_risks]
     open_ports = _extract_open_ports(scan_results.get("open_ports"))
+    if open_ports:
+        table, other = rules.port_bucket, rules.other_bucket
+        # sorted(set) keeps each bucket's ports unique and in order; ports that
+        # no bucket lists land in the last ("other") one
+        for port in sorted(set(open_ports)):
+            ports_by_bucket[table[port] if 0 <= port <= 65535 else other].append(port)
+    return (
+        _is_detected(scan_results.get("arp_spoofing"), rules),
+        _is_detected(scan_results.get("dns_spoofing"), rules),
+        _is_detected(scan_results.get("rogue_ap"), rules),
+        ports_by_bucket,
+        # Other clients on the same L2 segment (optional LAN sweep)
+        _risky_lan_hosts(scan_results.get("lan_hosts"), rules),
+    )
 
-    high_risk = {21, 23}         # FTP & Telnet → sangat bahaya
-    medium_risk = {80, 443, 1025}  # HTTP, HTTPS, RPC → boleh jadi risiko
-    # selain tu kira as "other"
-    high_ports = sorted({p for p in open_ports if p in high_risk})
-    medium_ports = sorted({p for p in open_ports if p in medium_risk})
-    other_ports = sorted({p for p in open_ports if p not in high_risk and p not in medium_risk})
-
-    if high_ports:
-        score += 20 * len(high_ports)
-        reasons.append(f"High-risk open ports: {', '.join(str(p) for p in high_ports)}")
-    if medium_ports:
-        score += 10 * len(medium_ports)
-        reasons.append(f"Medium-risk open ports: {', '.join(str(p) for p in medium_ports)}")
-    if other_ports:
-        score += 5 * len(other_ports)
-        reasons.append(f"Other open ports: {', '.join(str(p) for p in other_ports)}")
-    # Rogue AP
-    if _is_detected(scan_results.get("rogue_ap")):
-        score += 30
-        reasons.append("Possible rogue access point detected.")
 
-    # Final Score Evaluation
-    if score >= 70:
-        level = "High"
-        recommendation = "Avoid using this Wi-Fi for any sensitive activity."
-    elif score >= 40:
-        level = "Medium"
-        recommendation = "Caution advised. Avoid entering passwords or personal info."
-    else:
-        level = "Low"
-        recommendation = "Wi-Fi appears safe to use."
+def _reasons(findings, rules):
+    """Reason strings in a fixed order."""
+    arp, dns, rogue_ap, ports_by_bucket, risky_hosts = findings
+    reasons = []
+    if arp:
+        reasons.append(rules.detection_reasons["arp_spoofing"])
+    if dns:
+        reasons.append(rules.detection_reasons["dns_spoofing"])
+    for bucket, ports in enumerate(ports_by_bucket):
+        if ports:
+            reasons.append(f"{rules.bucket_reasons[bucket]}: {', '.join(map(str, ports))}")
+    if rogue_ap:
+        reasons.append(rules.detection_reasons["rogue_ap"])
+    if risky_hosts:
+        reasons.append(f"{rules.lan_reason}: {', '.join(risky_hosts)}")
+    return reasons
 
+
+def _result(score, level_index, reasons, rules):
+    _, level, recommendation = rules.levels[level_index]
     return {
         "score": score,
         "threat_level": level,
         "reasons": reasons,
         "recommendation": recommendation,
-    }
\ No newline at end of file
+    }
+
+
+def calculate_threat_score(scan_results):
+    return _score(scan_results, get_rules())
+
+
+def _score(scan_results, rules):
+    arp, dns, rogue_ap, ports_by_bucket, risky_hosts = findings = _findings(scan_results, rules)
+    weights = rules.detection_weights
+
+    score = weights["arp_spoofing"] * arp + weights["dns_spoofing"] * dns + weights["rogue_ap"] * rogue_ap
+    for weight, ports in zip(rules.bucket_weights, ports_by_bucket):
+        if ports:
+            score += weight * len(ports)
+    if risky_hosts:
+        score += min(rules.lan_cap, rules.lan_weight * len(risky_hosts))
+
+    # Final Score Evaluation
+    return _result(score, rules.level_index(score), _reasons(findings, rules), rules)
+
+
+def calculate_threat_scores(batch):
+    """Score many scan results at once; same output as calculate_threat_score() per item.
+
+    The rules are looked up once for the whole batch instead of per item.
+    """
+    rules = get_rules()
+    return [_score(item if isinstance(item, dict) else {}, rules) for item in batch]
@@ -0,0 +1,130 @@
+import json
+import logging
+import os
+import threading
+import time
+
+from app.async_port_scanner import parse_ports
+
+DEFAULT_RULES_PATH = os.environ.get(
+    "THREAT_RULES_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), "threat_rules.json"))
+# How often the scoring path may stat() the rules file for changes
+RELOAD_CHECK_INTERVAL = 2.0
+# The detectors threat_level_ai scores; a config without them is rejected
+REQUIRED_DETECTIONS = ("arp_spoofing", "dns_spoofing", "rogue_ap")
+
+logger = logging.getLogger(__name__)
+
+
+class ThreatRules:
+    """Scoring rules compiled from the JSON config into flat lookup tables.
+
+    port_bucket maps every port 0-65535 to the index of its risk bucket
+    (the last index is "other ports"; bucket_weights gives the points), so
+    scoring never touches a set or re-reads the config.
+    """
+
+    def __init__(self, config, source=None):
+        self.source = source
+        self.detected_statuses = frozenset(s.lower() for s in config["detected_statuses"])
+
+        detections = config["detections"]
+        for name in REQUIRED_DETECTIONS:
+            detection = detections.get(name)
+            if not isinstance(detection, dict) or "weight" not in detection \
+                    or not isinstance(detection.get("reason"), str):
+                raise ValueError(f"detections.{name} needs a weight and a reason")
+        self.detection_weights = {name: int(d["weight"]) for name, d in detections.items()}
+        self.detection_reasons = {name: d["reason"] for name, d in detections.items()}
+
+        # Buckets are listed most severe first; a port listed twice keeps its first bucket
+        buckets = config["port_buckets"] + [config["other_ports"]]
+        self.bucket_risks = tuple(b["risk"] for b in buckets)
+        self.bucket_weights = tuple(int(b["weight"]) for b in buckets)
+        self.bucket_reasons = tuple(b["reason"] for b in buckets)
+        self.other_bucket = len(buckets) - 1
+        if self.other_bucket > 254:
+            raise ValueError("too many port buckets")
+        self.port_bucket = bytearray([self.other_bucket]) * 65536
+        for index in range(self.other_bucket - 1, -1, -1):
+            for port in parse_ports(buckets[index]["ports"]):
+                self.port_bucket[port] = index
+
+        lan = config["lan_hosts"]
+        self.lan_risk = lan["risk"]
+        self.lan_weight = int(lan["weight"])
+        self.lan_cap = int(lan["cap"])
+        self.lan_reason = lan["reason"]
+
+        self.levels = tuple(sorted(((int(lv["min_score"]), lv["level"], lv["recommendation"])
+                                    for lv in config["levels"]), reverse=True))
+        if not self.levels or self.levels[-1][0] > 0:
+            raise ValueError("levels must include one with min_score 0")
+        self.thresholds = tuple(threshold for threshold, _, _ in self.levels)
+
+    def bucket_of(self, port):
+        return self.port_bucket[port] if 0 <= port <= 65535 else self.other_bucket
+
+    def level_index(self, score):
+        for index, threshold in enumerate(self.thresholds):
+            if score >= threshold:
+                return index
+        return len(self.thresholds) - 1
+
+
+def load_rules(path=DEFAULT_RULES_PATH):
+    with open(path, encoding="utf-8") as f:
+        return ThreatRules(json.load(f), source=path)
+
+
+_lock = threading.Lock()
+_path = DEFAULT_RULES_PATH
+_rules = load_rules(_path)
+_mtime = os.stat(_path).st_mtime_ns
+_checked_at = time.monotonic()
+_last_error = None
+
+
+def reload_rules(force=False):
+    """Re-read the rules file if it changed (or always with force=True).
+
+    A file that fails to parse or validate leaves the current rules in place.
+    Returns the rules in effect afterwards.
+    """
+    global _rules, _mtime, _last_error
+    with _lock:
+        try:
+            mtime = os.stat(_path).st_mtime_ns
+            if not force and mtime == _mtime:
+                return _rules
+            # Remember this version even if it is broken, so it is not retried until edited again
+            _mtime = mtime
+            _rules = load_rules(_path)
+            _last_error = None
+            logger.info("🔁 Threat rules loaded from %s", _path)
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            _last_error = str(e)
+            logger.warning("⚠️ Keeping previous threat rules: %s", e)
+        return _rules
+
+
+def get_rules():
+    """Current compiled rules; checks the file for edits at most every RELOAD_CHECK_INTERVAL."""
+    global _checked_at
+    now = time.monotonic()
+    if now - _checked_at >= RELOAD_CHECK_INTERVAL:
+        _checked_at = now
+        return reload_rules()
+    return _rules
+
+
+def rules_status():
+    rules = _rules
+    return {
+        "path": _path,
+        "loaded_mtime_ns": _mtime,
+        "error": _last_error,
+        "detections": rules.detection_weights,
+        "port_buckets": [{"risk": r, "weight": w} for r, w in zip(rules.bucket_risks, rules.bucket_weights)],
+        "levels": [{"min_score": s, "level": lv} for s, lv, _ in rules.levels],
+    }
@@ -0,0 +1,190 @@
+"""End-to-end endpoint latency and throughput on recorded fixtures.
+
+Run from backend/:  python -m benchmarks.bench_e2e [--clients 1,8,32] [--requests 50]
+                                                   [--server both|test|wsgi] [--fresh]
+Runs the real create_app() with commands answered from
+benchmarks/fixtures/e2e/commands.json and the sniffers fed from its
+capture.pcap (regenerate with benchmarks.make_e2e_fixtures), so no Wi-Fi
+hardware or root is needed. Each endpoint is driven by N concurrent clients,
+through the Flask test client and through a threaded WSGI server over
+loopback HTTP, and p50/p99 latency and throughput are reported.
+Results are steady state (caches warm) unless --fresh bypasses the caches.
+"""
+import argparse
+import http.client
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+
+from werkzeug.serving import WSGIRequestHandler, make_server
+
+from app import create_app, history_store
+from app.bssid_store import BSSIDStore
+from app.capture import FIXTURE_CAPTURE, ReplaySource, set_packet_source
+from app.commands import FixtureRunner, set_runner
+from app.detect_rogue_ap import rogue_ap_monitor
+
+FIXTURE_DIR = os.path.join(os.path.dirname(__file__), "fixtures", "e2e")
+
+THREAT_BODY = json.dumps({"arp_spoofing": {"status": "safe"}, "dns_spoofing": "safe",
+                          "rogue_ap": {"status": "warning"}, "open_ports": ["21", "80", "443"]})
+ENDPOINTS = [
+    ("GET", "/scan/wifi", None),
+    ("GET", "/scan/arp", None),
+    # Active probe and subnet sweep: answered by ReplaySource.srp() from the capture
+    ("GET", "/scan/arp?active=1", None),
+    ("GET", "/scan/lan", None),
+    ("GET", "/scan/dns", None),
+    ("GET", "/scan/rogue_ap", None),
+    ("GET", "/scan/open_ports", None),
+    ("GET", "/scan/all", None),
+    ("POST", "/scan/threat_score", THREAT_BODY),
+    ("GET", "/history?limit=50", None),
+    ("GET", "/metrics", None),
+]
+# Endpoints that take ?fresh=1
+CACHED = {"/scan/wifi", "/scan/arp?active=1", "/scan/lan", "/scan/open_ports", "/scan/all"}
+
+
+class QuietHandler(WSGIRequestHandler):
+    def log_request(self, *args, **kwargs):
+        pass
+
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(round(pct / 100.0 * (len(sorted_values) - 1))))]
+
+
+def test_client_request(app):
+    local = threading.local()
+
+    def request(method, path, body):
+        if not hasattr(local, "client"):
+            local.client = app.test_client()
+        response = local.client.open(path, method=method, data=body, content_type="application/json")
+        response.get_data()
+        return response.status_code
+
+    return request
+
+
+def check_probes(app):
+    """Problems with the active ARP and LAN sweep answers; both must come from the fixtures."""
+    client, problems = app.test_client(), []
+    # A verdict on the gateway's MAC, and a sweep that found hosts
+    for path, answered in (("/scan/arp?active=1", lambda r: r.get("status") in ("safe", "threat")),
+                           ("/scan/lan", lambda r: r.get("status") in ("ok", "warning") and r.get("hosts"))):
+        result = client.get(path).get_json()
+        if not answered(result):
+            problems.append(f"{path}: {result.get('message') or result}")
+    return problems
+
+
+def http_request(port):
+    def request(method, path, body):
+        conn = http.client.HTTPConnection("127.0.0.1", port, timeout=120)
+        try:
+            conn.request(method, path, body=body, headers={"Content-Type": "application/json"})
+            response = conn.getresponse()
+            response.read()
+            return response.status
+        finally:
+            conn.close()
+
+    return request
+
+
+def drive(request, method, path, body, clients, per_client):
+    """Run `clients` threads each sending `per_client` requests; return (latencies, errors, wall)."""
+    latencies, errors = [], []
+    lock = threading.Lock()
+    barrier = threading.Barrier(clients + 1)
+
+    def client():
+        mine, failed = [], 0
+        barrier.wait()
+        for _ in range(per_client):
+            start = time.perf_counter()
+            try:
+                status = request(method, path, body)
+            except OSError:
+                status = None
+            mine.append(time.perf_counter() - start)
+            failed += status is None or status >= 500
+        with lock:
+            latencies.extend(mine)
+            errors.append(failed)
+
+    threads = [threading.Thread(target=client) for _ in range(clients)]
+    for t in threads:
+        t.start()
+    barrier.wait()
+    start = time.perf_counter()
+    for t in threads:
+        t.join()
+    return sorted(latencies), sum(errors), time.perf_counter() - start
+
+
+def report(label, request, clients_list, per_client, fresh):
+    print(f"\n{label}")
+    print(f"  {'endpoint':<26} {'clients':>7} {'p50 ms':>9} {'p99 ms':>9} {'req/s':>9} {'errors':>6}")
+    for method, path, body in ENDPOINTS:
+        if fresh and path in CACHED:
+            path += ("&" if "?" in path else "?") + "fresh=1"
+        for clients in clients_list:
+            latencies, errors, wall = drive(request, method, path, body, clients, per_client)
+            print(f"  {method[0] + ' ' + path:<26} {clients:>7} {percentile(latencies, 50) * 1000:>9.2f} "
+                  f"{percentile(latencies, 99) * 1000:>9.2f} {len(latencies) / wall:>9.1f} {errors:>6}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--clients", default="1,8,32", help="comma-separated concurrency levels")
+    parser.add_argument("--requests", type=int, default=50, help="requests per client")
+    parser.add_argument("--server", choices=("both", "test", "wsgi"), default="both")
+    parser.add_argument("--fresh", action="store_true", help="bypass the result caches")
+    parser.add_argument("--fixtures", default=FIXTURE_DIR)
+    args = parser.parse_args()
+    clients_list = [int(c) for c in args.clients.split(",")]
+
+    set_runner(FixtureRunner.from_file(os.path.join(args.fixtures, "commands.json")))
+    set_packet_source(ReplaySource(os.path.join(args.fixtures, FIXTURE_CAPTURE)))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        history_store._store = history_store.HistoryStore(os.path.join(tmp, "history.db"))
+        rogue_ap_monitor._store = BSSIDStore(os.path.join(tmp, "bssid.db"))
+        app = create_app()
+
+        # Warm up: starts the monitors, fills the caches and the history
+        warm = test_client_request(app)
+        for method, path, body in ENDPOINTS:
+            warm(method, path, body)
+        time.sleep(1.0)
+        # Otherwise the probe rows would time the failure path
+        problems = check_probes(app)
+        if problems:
+            print("fixtures do not answer the probes:\n  " + "\n  ".join(problems), file=sys.stderr)
+            return 1
+
+        if args.server in ("both", "test"):
+            report("Flask test client (in-process)", test_client_request(app), clients_list, args.requests, args.fresh)
+        if args.server in ("both", "wsgi"):
+            server = make_server("127.0.0.1", 0, app, threaded=True, request_handler=QuietHandler)
+            thread = threading.Thread(target=server.serve_forever, daemon=True)
+            thread.start()
+            try:
+                report(f"threaded WSGI server, http://127.0.0.1:{server.port}", http_request(server.port),
+                       clients_list, args.requests, args.fresh)
+            finally:
+                server.shutdown()
+        history_store._store.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
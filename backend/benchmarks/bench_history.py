@@ -0,0 +1,80 @@
+"""Measure batched history writes and keyset vs OFFSET pagination.
+
+Run from backend/:  python -m benchmarks.bench_history [rows]
+Uses a throwaway database in a temp directory.
+"""
+import os
+import sys
+import tempfile
+import time
+
+from app.history_store import HistoryStore, _INSERT, _row_for
+
+SSIDS = [f"Cafe {i}" for i in range(20)]
+
+
+def synthetic_result(i):
+    return {
+        "wifi_info": {"SSID": SSIDS[i % len(SSIDS)], "BSSID": "02:00:00:00:%02x:%02x" % (i % 20, i % 7)},
+        "arp_spoofing": {"status": "safe"},
+        "dns_spoofing": {"status": "safe"},
+        "rogue_ap": {"status": "safe"},
+        "open_ports": {"status": "ok", "open_ports": ["53", "80"]},
+        "threat_score": {"score": 15, "threat_level": "Low", "reasons": []},
+    }
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    page = 50
+    with tempfile.TemporaryDirectory() as tmp:
+        store = HistoryStore(os.path.join(tmp, "history.db"))
+
+        start = time.perf_counter()
+        for i in range(rows):
+            store.append(synthetic_result(i), now=1_700_000_000 + i)
+        store.flush()
+        elapsed = time.perf_counter() - start
+        print(f"append+flush  {rows / elapsed:>10,.0f} scans/sec  ({store.stats()['batches']} transactions)")
+
+        # Baseline: one commit per scan, as a synchronous insert in the request would do
+        single = HistoryStore(os.path.join(tmp, "single.db"))
+        sample = min(rows, 5000)
+        start = time.perf_counter()
+        for i in range(sample):
+            single._conn.execute(_INSERT, _row_for(synthetic_result(i), 1_700_000_000 + i))
+        single_s = time.perf_counter() - start
+        print(f"commit per scan {sample / single_s:>8,.0f} scans/sec")
+        single.close()
+
+        # Walk to the last page both ways
+        depth = rows // page - 1
+        start = time.perf_counter()
+        cursor = None
+        for _ in range(depth):
+            cursor = store.query(limit=page, cursor=cursor)["next_cursor"]
+        keyset_last = store.query(limit=page, cursor=cursor)
+        keyset_s = time.perf_counter() - start
+
+        conn = store._conn
+        start = time.perf_counter()
+        for n in range(depth + 1):
+            offset_last = conn.execute("SELECT id FROM scans ORDER BY ts DESC, id DESC LIMIT ? OFFSET ?",
+                                       (page, n * page)).fetchall()
+        offset_s = time.perf_counter() - start
+
+        same = [item["id"] for item in keyset_last["items"]] == [r[0] for r in offset_last]
+        print(f"page through {depth + 1:,} pages of {page}:")
+        print(f"  keyset cursor  {keyset_s * 1000:10.1f} ms  ({keyset_s / (depth + 1) * 1e6:7.0f} us/page)")
+        print(f"  LIMIT/OFFSET   {offset_s * 1000:10.1f} ms  ({offset_s / (depth + 1) * 1e6:7.0f} us/page)")
+
+        start = time.perf_counter()
+        filtered = store.query(limit=page, ssid="Cafe 7")
+        print(f"  ssid filter    {(time.perf_counter() - start) * 1e6:10.0f} us  ({len(filtered['items'])} items)")
+        print(f"last pages identical: {same}")
+        store.close()
+    return 0 if same else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
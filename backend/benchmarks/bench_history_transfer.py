@@ -0,0 +1,92 @@
+"""Measure gzip NDJSON export/import throughput and peak memory.
+
+Run from backend/:  python -m benchmarks.bench_history_transfer [rows]
+Exports a synthetic history through the Flask endpoint, imports it into a
+second store, imports it again to check idempotency, and reports peak
+Python heap use (tracemalloc, in a separate untimed run) for each phase.
+"""
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from app import create_app, history_store
+from app.history_store import HistoryStore
+from app.ndjson_stream import iter_lines
+from benchmarks.bench_history import synthetic_result
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - start
+
+
+def peak_heap(fn):
+    # tracemalloc slows allocation-heavy code several times over, so never time a traced run
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    with tempfile.TemporaryDirectory() as tmp:
+        source = HistoryStore(os.path.join(tmp, "source.db"))
+        for i in range(rows):
+            source.append(synthetic_result(i), now=1_700_000_000 + i)
+        source.flush()
+
+        history_store._store = source
+        client = create_app().test_client()
+        export_path = os.path.join(tmp, "export.ndjson.gz")
+
+        def export():
+            response = client.get("/history/export", buffered=False)
+            size = 0
+            with open(export_path, "wb") as f:
+                for chunk in response.response:
+                    f.write(chunk)
+                    size += len(chunk)
+            return size
+
+        size, export_s = timed(export)
+        export_peak = peak_heap(export)
+        print(f"export   {rows / export_s:>10,.0f} records/sec  {size / rows:6.1f} B/record gz  "
+              f"peak heap {export_peak / 1e6:6.1f} MB")
+
+        projected = client.get("/history/export?fields=timestamp,ssid,threat_score&gzip=0").get_data()
+        first_line = projected.split(b"\n", 1)[0]
+        print(f"projected export: {len(projected) / rows:.1f} B/record, first line {first_line!r}")
+
+        def do_import(store):
+            history_store._store = store
+            with open(export_path, "rb") as f:
+                return client.post("/history/import", data=f, content_type="application/gzip").get_json()
+
+        target = HistoryStore(os.path.join(tmp, "target.db"))
+        summary, import_s = timed(lambda: do_import(target))
+        print(f"import   {rows / import_s:>10,.0f} records/sec  inserted {summary['inserted']:,}")
+        again, reimport_s = timed(lambda: do_import(target))
+        print(f"re-import {rows / reimport_s:>9,.0f} records/sec  inserted {again['inserted']:,}, "
+              f"duplicates {again['duplicates']:,}")
+        scratch = HistoryStore(os.path.join(tmp, "scratch.db"))
+
+        def direct_import():
+            # Bypasses the test client, which keeps its own copy of the request body
+            with open(export_path, "rb") as f:
+                return scratch.import_records(iter_lines(f))
+
+        print(f"peak heap: export {export_peak / 1e6:.1f} MB, import {peak_heap(direct_import) / 1e6:.1f} MB")
+
+        ok = summary["inserted"] == rows and again["inserted"] == 0 and target.count() == rows
+        for store in (source, target, scratch):
+            store.close()
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,89 @@
+"""Measure what logging costs the thread that logs.
+
+Run from backend/:  python -m benchmarks.bench_logging [delay_ms]
+Output goes to a sink that blocks for `delay_ms` per write (default 0.2),
+standing in for a slow terminal or a full stdout pipe. Compares the old
+print-headers-and-body request hook with the queue-based pipeline at the
+default INFO level and at DEBUG, then the per-packet sampled logger.
+"""
+import contextlib
+import io
+import logging
+import sys
+import time
+
+from app import create_app
+from app.log_setup import SampledLogger, configure_logging, flush_logging
+
+
+class SlowSink(io.TextIOBase):
+    def __init__(self, delay):
+        self.delay = delay
+        self.writes = 0
+
+    def write(self, s):
+        self.writes += 1
+        time.sleep(self.delay)
+        return len(s)
+
+
+def per_request(client, count, body):
+    start = time.perf_counter()
+    for _ in range(count):
+        client.post("/scan/threat_score", json=body)
+    return (time.perf_counter() - start) / count
+
+
+def main():
+    delay = (float(sys.argv[1]) if len(sys.argv) > 1 else 0.2) / 1000
+    sink = SlowSink(delay)
+    configure_logging(level="INFO", stream=sink)
+    body = {"arp_spoofing": {"status": "safe"}, "open_ports": ["22", "80"]}
+    count = 500
+
+    app = create_app()
+    client = app.test_client()
+    per_request(client, 50, body)  # warm up
+    new_info = per_request(client, count, body)
+    configure_logging(level="DEBUG")
+    new_debug = per_request(client, count, body)
+    configure_logging(level="INFO")
+    flush_logging()
+
+    old_app = create_app()
+
+    @old_app.before_request
+    def print_request():
+        # What log_request_info used to do on every request
+        from flask import request
+        print("👉 Headers:", dict(request.headers))
+        print("👉 Body:", request.get_data())
+
+    with contextlib.redirect_stdout(sink):
+        old = per_request(old_app.test_client(), count, body)
+
+    print(f"sink delay {delay * 1000:.1f} ms/write, POST /scan/threat_score, mean latency:")
+    print(f"  print headers + body       {old * 1e6:9.0f} µs")
+    print(f"  queue logging, INFO        {new_info * 1e6:9.0f} µs")
+    print(f"  queue logging, DEBUG       {new_debug * 1e6:9.0f} µs  (headers logged, body off)")
+
+    packets = 200_000
+    logger = logging.getLogger("app.bench")
+    sampled = SampledLogger(logger, every=1000)
+    for level in ("INFO", "DEBUG"):
+        configure_logging(level=level)
+        start = time.perf_counter()
+        for i in range(packets):
+            sampled.log("DNS response %s -> %s", "example.com", i)
+        per_call = (time.perf_counter() - start) / packets
+        print(f"sampled per-packet log, {level:<5}  {per_call * 1e9:9.0f} ns/call")
+    configure_logging(level="DEBUG")
+    start = time.perf_counter()
+    for i in range(packets // 10):
+        logger.debug("DNS response %s -> %s", "example.com", i)
+    print(f"unsampled queued log, DEBUG  {(time.perf_counter() - start) / (packets // 10) * 1e9:9.0f} ns/call")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,54 @@
+"""Measure the hot-path cost of the metrics instrumentation and of a scrape.
+
+Run from backend/:  python -m benchmarks.bench_metrics [calls]
+Times Counter.inc, Histogram.observe and Histogram.time() against an empty
+loop, then renders /metrics after populating every metric with a few series.
+"""
+import sys
+import time
+
+from app import create_app
+from app.metrics import Counter, Histogram, render_metrics
+
+
+def per_call(fn, calls):
+    start = time.perf_counter()
+    for _ in range(calls):
+        fn()
+    return (time.perf_counter() - start) / calls
+
+
+def main():
+    calls = int(sys.argv[1]) if len(sys.argv) > 1 else 500_000
+    counter = Counter("bench_events_total", "Benchmark counter.", ("kind",))
+    histogram = Histogram("bench_seconds", "Benchmark histogram.", ("kind",))
+
+    def timed_block():
+        with histogram.time("block"):
+            pass
+
+    baseline = per_call(lambda: None, calls)
+    rows = [
+        ("Counter.inc", per_call(lambda: counter.inc("a"), calls)),
+        ("Histogram.observe", per_call(lambda: histogram.observe(0.02, "a"), calls)),
+        ("Histogram.time() block", per_call(timed_block, calls)),
+    ]
+    for name, seconds in rows:
+        print(f"{name:<24} {(seconds - baseline) * 1e9:8.0f} ns/call")
+
+    client = create_app().test_client()
+    for i in range(200):
+        counter.inc(f"kind{i % 20}")
+        histogram.observe(i / 100, f"kind{i % 20}")
+        client.post("/scan/threat_score", json={"open_ports": ["22"]})
+    start = time.perf_counter()
+    body = client.get("/metrics").get_data()
+    print(f"GET /metrics              {(time.perf_counter() - start) * 1000:8.2f} ms, "
+          f"{len(body.splitlines()):,} lines, {len(body):,} bytes")
+    render_s = per_call(render_metrics, 200)
+    print(f"render_metrics()          {render_s * 1000:8.2f} ms")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
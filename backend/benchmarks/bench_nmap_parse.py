@@ -0,0 +1,98 @@
+"""Compare nmap text scraping with incremental XML parsing of the same scan.
+
+Run from backend/:  python -m benchmarks.bench_nmap_parse [ports]
+Builds a synthetic nmap run over `ports` ports (about a tenth of them open)
+in both the normal and -oX formats, then times each ingestion path end to
+end, including the threat scorer's re-parse, and reports the JSON payload size
+(LEGACY_OPEN_PORTS=0 leaves out the deprecated "open_ports" field).
+"""
+import json
+import random
+import re
+import sys
+import time
+
+from app.async_port_scanner import port_result
+from app.open_port_scanner import iter_nmap_xml_ports
+from app.threat_level_ai import _extract_open_ports
+
+SERVICES = ["ssh", "http", "https", "telnet", "ftp", "microsoft-ds", "unknown"]
+
+
+def synthetic_scan(count, seed=3):
+    """Ports nmap lists individually; like nmap, the dominant closed state is only summarised."""
+    rng = random.Random(seed)
+    ports = []
+    for port in range(1, count + 1):
+        roll = rng.random()
+        if roll < 0.1:
+            ports.append((port, "open", rng.choice(SERVICES)))
+        elif roll < 0.12:
+            ports.append((port, "filtered", rng.choice(SERVICES)))
+    return ports
+
+
+def as_text(ports):
+    lines = ["Starting Nmap 7.94 ( https://nmap.org )", "Nmap scan report for 192.0.2.1",
+             "Host is up (0.0010s latency).", "Not shown: 57000 closed tcp ports (conn-refused)",
+             "PORT      STATE    SERVICE"]
+    lines += [f"{f'{p}/tcp':<9} {state:<8} {service}" for p, state, service in ports]
+    lines.append("Nmap done: 1 IP address (1 host up) scanned in 1.23 seconds")
+    return "\n".join(lines) + "\n"
+
+
+def as_xml(ports):
+    out = ['<?xml version="1.0" encoding="UTF-8"?>\n<nmaprun scanner="nmap" args="nmap -sT -oX - 192.0.2.1">\n'
+           '<host><status state="up" reason="conn-refused"/><address addr="192.0.2.1" addrtype="ipv4"/>\n<ports>\n'
+           '<extraports state="closed" count="57000"><extrareasons reason="conn-refused" count="57000"/></extraports>\n']
+    for p, state, service in ports:
+        out.append(f'<port protocol="tcp" portid="{p}"><state state="{state}" reason="syn-ack" reason_ttl="0"/>'
+                   f'<service name="{service}" method="table" conf="3"/></port>\n')
+    out.append('</ports>\n</host>\n<runstats><finished time="0" elapsed="1.23"/></runstats>\n</nmaprun>\n')
+    return "".join(out).encode()
+
+
+def text_path(text):
+    """Old shape: regex over the text, raw kept in the response, scorer parses raw again."""
+    result = {"status": "ok", "open_ports": re.findall(r"(\d+)/tcp\s+open", text), "raw": text}
+    _extract_open_ports({"raw": result["raw"]})
+    return result
+
+
+def xml_path(data, chunk=64 * 1024):
+    chunks = (data[i:i + chunk] for i in range(0, len(data), chunk))
+    found = [p for p in iter_nmap_xml_ports(chunks) if p["state"] == "open"]
+    result = port_result(found, "nmap", time.monotonic())
+    _extract_open_ports(result)
+    return result
+
+
+def timed(fn, arg, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = fn(arg)
+    return result, (time.perf_counter() - start) / repeat
+
+
+def compare(count, repeat=5):
+    ports = synthetic_scan(count)
+    text, xml = as_text(ports), as_xml(ports)
+    old, old_s = timed(text_path, text, repeat)
+    new, new_s = timed(xml_path, xml, repeat)
+
+    print(f"{count:,} ports scanned, {len(new['ports']):,} open")
+    print(f"  text + raw   {old_s * 1000:8.2f} ms   payload {len(json.dumps(old)):>10,} bytes")
+    print(f"  xml stream   {new_s * 1000:8.2f} ms   payload {len(json.dumps(new)):>10,} bytes")
+    return _extract_open_ports(old) == _extract_open_ports(new)
+
+
+def main():
+    # Default: an nmap -F sized scan of the gateway, then a full-range sweep
+    counts = [int(sys.argv[1])] if len(sys.argv) > 1 else [100, 65535]
+    same = all([compare(count) for count in counts])
+    print(f"open ports identical: {same}")
+    return 0 if same else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
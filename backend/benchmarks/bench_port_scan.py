@@ -0,0 +1,61 @@
+"""Benchmark the asyncio connect scanner (and nmap, if installed) on loopback.
+
+Run from backend/:  python -m benchmarks.bench_port_scan [listeners] [port-range]
+Opens `listeners` TCP listeners on 127.0.0.1 inside the scanned range and
+checks that every engine finds exactly those ports.
+"""
+import socket
+import sys
+import time
+
+from app.async_port_scanner import parse_ports
+from app.open_port_scanner import find_nmap, scan_open_ports
+
+
+def open_listeners(count, ports):
+    socks = []
+    for port in ports:
+        if len(socks) == count:
+            break
+        s = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        try:
+            s.bind(("127.0.0.1", port))
+        except OSError:
+            s.close()
+            continue
+        s.listen(128)
+        socks.append(s)
+    return socks
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    spec = sys.argv[2] if len(sys.argv) > 2 else "20000-22000"
+    ports = parse_ports(spec)
+    # Spread listeners across the range
+    step = max(1, len(ports) // count)
+    listeners = open_listeners(count, ports[::step])
+    expected = {str(s.getsockname()[1]) for s in listeners}
+
+    engines = ["native"] + (["nmap"] if find_nmap() else [])
+    failures = 0
+    try:
+        for engine in engines:
+            start = time.perf_counter()
+            result = scan_open_ports("127.0.0.1", engine=engine, ports=spec)
+            elapsed = time.perf_counter() - start
+            found = set(result.get("open_ports", []))
+            # Other local services may listen in the range too; ours must all be found
+            ok = result.get("status") == "ok" and expected <= found
+            failures += not ok
+            print(f"{engine:>7}: {len(ports)} ports in {elapsed:.3f}s "
+                  f"({len(ports) / elapsed:,.0f} ports/sec), found {len(found & expected)}/{len(expected)}"
+                  f"{'' if ok else '  FAILED: ' + str(result.get('message', ''))}")
+    finally:
+        for s in listeners:
+            s.close()
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,35 @@
+"""Replay the bundled captures through the detectors and check the alerts.
+
+Run from backend/:  python -m benchmarks.bench_replay [--fast-dns]
+Exits non-zero if any capture produces a different number of alerts than
+recorded in captures/expected.json.
+"""
+import json
+import os
+import sys
+
+from app.replay import replay_pcap
+
+CAPTURE_DIR = os.path.join(os.path.dirname(__file__), "captures")
+
+
+def main():
+    fast_dns = "--fast-dns" in sys.argv
+    with open(os.path.join(CAPTURE_DIR, "expected.json")) as f:
+        expected = json.load(f)
+
+    failures = 0
+    print(f"{'capture':<20}{'packets':>9}{'pkt/s':>12}{'p50 us':>10}{'p99 us':>10}  alerts (dns/arp)")
+    for name, want in sorted(expected.items()):
+        report = replay_pcap(os.path.join(CAPTURE_DIR, name), fast_dns=fast_dns)
+        got = {k: len(v) for k, v in report["alerts"].items()}
+        ok = got == want["alerts"] and report["packets"] == want["packets"]
+        failures += not ok
+        print(f"{name:<20}{report['packets']:>9}{report['packets_per_sec']:>12,.0f}"
+              f"{report['latency_us']['p50']:>10.1f}{report['latency_us']['p99']:>10.1f}"
+              f"  {got['dns']}/{got['arp']}{'' if ok else '  MISMATCH, expected ' + str(want['alerts'])}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
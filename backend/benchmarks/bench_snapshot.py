@@ -0,0 +1,86 @@
+"""Snapshot reads vs. on-demand scans, and the scheduler's publish cost.
+
+Run from backend/:  python -m benchmarks.bench_snapshot [--clients 1,8,32] [--requests 200]
+Uses the recorded fixtures in benchmarks/fixtures/e2e (see bench_e2e).
+"snapshot" is the background scheduler serving its published results;
+"on demand" is the same endpoint with the scheduler stopped, i.e. the
+result cache in front of the detectors. Also times publish() for one
+detector result, which is what each scheduled run adds.
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+from app import create_app, history_store
+from app.bssid_store import BSSIDStore
+from app.capture import FIXTURE_CAPTURE, ReplaySource, set_packet_source
+from app.commands import FixtureRunner, set_runner
+from app.detect_rogue_ap import rogue_ap_monitor
+from app.scan_scheduler import ScanScheduler, scan_scheduler
+from benchmarks.bench_e2e import FIXTURE_DIR, drive, percentile, test_client_request
+
+ENDPOINTS = ["/scan/wifi", "/scan/open_ports", "/scan/all"]
+
+
+def report(label, request, clients_list, per_client):
+    print(f"\n{label}")
+    print(f"  {'endpoint':<20} {'clients':>7} {'p50 ms':>8} {'p99 ms':>8} {'req/s':>9}")
+    for path in ENDPOINTS:
+        for clients in clients_list:
+            latencies, _errors, wall = drive(request, "GET", path, None, clients, per_client)
+            print(f"  {path:<20} {clients:>7} {percentile(latencies, 50) * 1000:>8.3f} "
+                  f"{percentile(latencies, 99) * 1000:>8.3f} {len(latencies) / wall:>9.0f}")
+
+
+def bench_publish(snapshot, rounds=2000):
+    """Mean publish() time for one detector, on a copy of the live snapshot's results."""
+    scheduler = ScanScheduler(step_fn=None)
+    for name, section in snapshot.sections.items():
+        if name in scheduler.cadences:
+            scheduler.publish(name, section["result"])
+    results = {name: snapshot.sections[name]["result"] for name in scheduler.cadences}
+    for name in ("arp_spoofing", "open_ports"):
+        start = time.perf_counter()
+        for _ in range(rounds):
+            scheduler.publish(name, results[name])
+        print(f"  publish({name}) {(time.perf_counter() - start) / rounds * 1e6:>10.1f} µs")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--clients", default="1,8,32", help="comma-separated concurrency levels")
+    parser.add_argument("--requests", type=int, default=200, help="requests per client")
+    parser.add_argument("--fixtures", default=FIXTURE_DIR)
+    args = parser.parse_args()
+    clients_list = [int(c) for c in args.clients.split(",")]
+
+    set_runner(FixtureRunner.from_file(os.path.join(args.fixtures, "commands.json")))
+    set_packet_source(ReplaySource(os.path.join(args.fixtures, FIXTURE_CAPTURE)))
+    with tempfile.TemporaryDirectory() as tmp:
+        history_store._store = history_store.HistoryStore(os.path.join(tmp, "history.db"))
+        rogue_ap_monitor._store = BSSIDStore(os.path.join(tmp, "bssid.db"))
+        app = create_app()
+        request = test_client_request(app)
+
+        scan_scheduler.start()
+        deadline = time.monotonic() + 30
+        while not scan_scheduler.snapshot().complete() and time.monotonic() < deadline:
+            time.sleep(0.1)
+        report("snapshot (scheduler running)", request, clients_list, args.requests)
+        snapshot = scan_scheduler.snapshot()
+
+        scan_scheduler.stop()
+        for path in ENDPOINTS:
+            request("GET", path, None)
+        report("on demand (scheduler stopped, result cache warm)", request, clients_list, args.requests)
+
+        print("\npublish cost")
+        bench_publish(snapshot)
+        history_store._store.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,147 @@
+"""Single process vs. capture daemon + N HTTP worker processes, on recorded fixtures.
+
+Run from backend/:  python -m benchmarks.bench_split [--workers 4] [--clients 32] [--requests 50]
+Starts every server as a subprocess with WIFI_SCAN_FIXTURES pointing at
+benchmarks/fixtures/e2e (no root or Wi-Fi needed) and a throwaway history
+database. The split run has one capture daemon and N threaded WSGI workers
+on their own ports, with clients spread round-robin over the workers; the
+baseline is one threaded WSGI process serving everything. Scaling past one
+core only shows on a multi-core machine.
+"""
+import argparse
+import itertools
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import http.client
+
+from benchmarks.bench_e2e import FIXTURE_DIR, THREAT_BODY, QuietHandler, drive, http_request, percentile
+
+ENDPOINTS = [
+    ("GET", "/scan/wifi", None),
+    ("GET", "/scan/all", None),
+    ("POST", "/scan/threat_score", THREAT_BODY),
+    ("GET", "/history?limit=50", None),
+]
+
+
+def serve(role, port, socket_path, db_dir):
+    """Subprocess entry point: run one daemon, worker or single-process server."""
+    from werkzeug.serving import make_server
+
+    from app import create_app, history_store
+    from app.bssid_store import BSSIDStore
+    from app.detect_rogue_ap import rogue_ap_monitor
+
+    rogue_ap_monitor._store = BSSIDStore(os.path.join(db_dir, "bssid.db"))
+    if role == "daemon":
+        # Like python -m app.capture_daemon: the history is the workers' to write
+        from app.capture_daemon import CaptureDaemon
+        CaptureDaemon(socket_path, create_app(record_history=False)).serve_forever()
+    else:
+        history_store._store = history_store.HistoryStore(os.path.join(db_dir, "history.db"))
+        if role == "worker":
+            os.environ["SCAN_DAEMON_SOCKET"] = socket_path
+        make_server("127.0.0.1", port, create_app(), threaded=True, request_handler=QuietHandler).serve_forever()
+
+
+def spawn(role, port, socket_path, db_dir, fixtures):
+    env = dict(os.environ, WIFI_SCAN_FIXTURES=fixtures, LOG_LEVEL="ERROR")
+    env.pop("SCAN_DAEMON_SOCKET", None)
+    return subprocess.Popen([sys.executable, "-m", "benchmarks.bench_split", "--serve", role,
+                             "--port", str(port), "--socket", socket_path, "--db-dir", db_dir], env=env)
+
+
+def wait_ready(port, timeout=30.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            conn = http.client.HTTPConnection("127.0.0.1", port, timeout=60)
+            conn.request("GET", "/scan/wifi")
+            if conn.getresponse().status == 200:
+                return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError(f"server on port {port} did not come up")
+
+
+def round_robin(ports):
+    requests = [http_request(port) for port in ports]
+    counter = itertools.count()
+    lock = threading.Lock()
+
+    def request(method, path, body):
+        with lock:
+            i = next(counter)
+        return requests[i % len(requests)](method, path, body)
+
+    return request
+
+
+def report(label, request, clients, per_client):
+    print(f"\n{label}")
+    print(f"  {'endpoint':<26} {'clients':>7} {'p50 ms':>9} {'p99 ms':>9} {'req/s':>9} {'errors':>6}")
+    for method, path, body in ENDPOINTS:
+        latencies, errors, wall = drive(request, method, path, body, clients, per_client)
+        print(f"  {method[0] + ' ' + path:<26} {clients:>7} {percentile(latencies, 50) * 1000:>9.2f} "
+              f"{percentile(latencies, 99) * 1000:>9.2f} {len(latencies) / wall:>9.1f} {errors:>6}")
+
+
+def run(label, procs, ports, args):
+    try:
+        for port in ports:
+            wait_ready(port)
+        # Warm the caches and the monitors before timing
+        warm = round_robin(ports)
+        for method, path, body in ENDPOINTS:
+            warm(method, path, body)
+        time.sleep(1.0)
+        report(label, round_robin(ports), args.clients, args.requests)
+    finally:
+        for proc in procs:
+            proc.terminate()
+        for proc in procs:
+            proc.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--clients", type=int, default=32)
+    parser.add_argument("--requests", type=int, default=50, help="requests per client")
+    parser.add_argument("--base-port", type=int, default=5601)
+    parser.add_argument("--fixtures", default=FIXTURE_DIR)
+    parser.add_argument("--serve", choices=("daemon", "worker", "single"), help=argparse.SUPPRESS)
+    parser.add_argument("--port", type=int, help=argparse.SUPPRESS)
+    parser.add_argument("--socket", help=argparse.SUPPRESS)
+    parser.add_argument("--db-dir", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.serve:
+        serve(args.serve, args.port, args.socket, args.db_dir)
+        return 0
+
+    fixtures = os.path.abspath(args.fixtures)
+    with tempfile.TemporaryDirectory() as tmp:
+        socket_path = os.path.join(tmp, "daemon.sock")
+        port = args.base_port
+
+        single_dir = os.path.join(tmp, "single")
+        os.mkdir(single_dir)
+        run("single process, threaded WSGI", [spawn("single", port, socket_path, single_dir, fixtures)],
+            [port], args)
+
+        daemon = spawn("daemon", 0, socket_path, tmp, fixtures)
+        deadline = time.monotonic() + 30
+        while not os.path.exists(socket_path) and time.monotonic() < deadline:
+            time.sleep(0.1)
+        ports = [port + 1 + i for i in range(args.workers)]
+        workers = [spawn("worker", p, socket_path, tmp, fixtures) for p in ports]
+        run(f"capture daemon + {args.workers} worker process(es)", workers + [daemon], ports, args)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
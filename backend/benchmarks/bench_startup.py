@@ -0,0 +1,77 @@
+"""Backend cold-start latency: imports, create_app() and the first scapy use.
+
+Run from backend/:  python -m benchmarks.bench_startup [--runs 7]
+Every measurement is a fresh interpreter (median of --runs). "first
+probe" is what the first ARP/DNS scan pays before touching the network:
+loading the layers and building an ARP who-has, with and without the
+background warm-up, after a short idle gap like the one between a worker
+booting and its first request.
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+from benchmarks.bench_e2e import FIXTURE_DIR
+
+CASES = [
+    ("import scapy.all (for reference)", "import scapy.all", {}),
+    ("import scapy l2 + dns layers", "import scapy.layers.l2, scapy.layers.dns", {}),
+    ("import app", "import app", {}),
+    ("import app + create_app()", "import app; app.create_app()", {"SCAPY_WARMUP": "0"}),
+    ("first probe, no warm-up", "{first_probe}", {"SCAPY_WARMUP": "0"}),
+    ("first probe, warm-up", "{first_probe}", {"SCAPY_WARMUP": "1"}),
+]
+
+# Times only the probe, after the app has been idle for `idle` seconds
+FIRST_PROBE = """
+import time, app
+from app import lazy_scapy
+app.create_app()
+time.sleep({idle})
+t0 = time.perf_counter()
+lazy_scapy.load_layers()
+lazy_scapy.Ether(dst="ff:ff:ff:ff:ff:ff") / lazy_scapy.ARP(pdst="192.0.2.1")
+print(time.perf_counter() - t0)
+"""
+
+TIMED = """
+import time
+t0 = time.perf_counter()
+{code}
+print(time.perf_counter() - t0)
+"""
+
+
+def measure(code, env, runs):
+    samples = []
+    for _ in range(runs):
+        out = subprocess.run([sys.executable, "-c", code], env=env, check=True,
+                             capture_output=True, text=True).stdout
+        samples.append(float(out.strip().splitlines()[-1]))
+    return statistics.median(samples), min(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=7)
+    parser.add_argument("--idle", type=float, default=0.5, help="seconds between start-up and the first scan")
+    parser.add_argument("--fixtures", default=FIXTURE_DIR)
+    args = parser.parse_args()
+
+    base_env = dict(os.environ, WIFI_SCAN_FIXTURES=os.path.abspath(args.fixtures), LOG_LEVEL="ERROR")
+    base_env.pop("SCAN_DAEMON_SOCKET", None)
+    print(f"{'case':<36} {'median ms':>10} {'min ms':>8}")
+    for label, code, env in CASES:
+        if code == "{first_probe}":
+            code = FIRST_PROBE.format(idle=args.idle)
+        else:
+            code = TIMED.format(code=code)
+        median, best = measure(code, dict(base_env, **env), args.runs)
+        print(f"{label:<36} {median * 1000:>10.1f} {best * 1000:>8.1f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,77 @@
+"""Compare per-item and batch threat scoring on synthetic scan archives.
+
+Run from backend/:  python -m benchmarks.bench_threat_score [items]
+Measures the library functions and the HTTP endpoints (one POST per item
+versus one /scan/threat_score/batch POST). Every batch result is checked
+against calculate_threat_score() for the same item.
+"""
+import random
+import sys
+import time
+
+from app import create_app
+from app.threat_level_ai import calculate_threat_score, calculate_threat_scores
+
+STATUSES = ["safe", "warning", "threat", "unknown", "detected"]
+PORTS = [21, 22, 23, 53, 80, 443, 1025, 3389, 8080]
+
+
+def synthetic_results(count, seed=7):
+    """Scan results in every shape the scorer accepts (dicts, strings, lists, nmap text)."""
+    rng = random.Random(seed)
+    items = []
+    for _ in range(count):
+        ports = rng.sample(PORTS, rng.randrange(0, 4))
+        shape = rng.randrange(3)
+        if shape == 0:
+            open_ports = ports
+        elif shape == 1:
+            open_ports = {"ports": [str(p) for p in ports]}
+        else:
+            open_ports = {"raw": "".join(f"{p}/tcp open  svc\n" for p in ports)}
+        item = {
+            "arp_spoofing": {"status": rng.choice(STATUSES)},
+            "dns_spoofing": rng.choice(STATUSES),
+            "rogue_ap": {"status": rng.choice(STATUSES)},
+            "open_ports": open_ports,
+        }
+        if rng.random() < 0.3:
+            item["lan_hosts"] = {"hosts": [{"ip": f"10.0.0.{i}", "open_ports": rng.sample(PORTS, 2)}
+                                           for i in range(rng.randrange(0, 5))]}
+        items.append(item)
+    return items
+
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - start
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    items = synthetic_results(count)
+
+    single, single_s = timed(lambda batch: [calculate_threat_score(item) for item in batch], items)
+    batch, batch_s = timed(calculate_threat_scores, items)
+    mismatches = sum(a != b for a, b in zip(single, batch)) + abs(len(single) - len(batch))
+
+    print(f"{count:,} items")
+    print(f"calculate_threat_score   {count / single_s:>12,.0f} items/sec")
+    print(f"calculate_threat_scores  {count / batch_s:>12,.0f} items/sec  ({single_s / batch_s:.2f}x)")
+
+    # The HTTP per-item path is slow enough that a sample is representative
+    client = create_app().test_client()
+    sample = items[:min(count, 2000)]
+    _, http_single_s = timed(lambda batch: [client.post("/scan/threat_score", json=item) for item in batch], sample)
+    response, http_batch_s = timed(lambda batch: client.post("/scan/threat_score/batch", json=batch), items)
+    mismatches += sum(a != b for a, b in zip(single, response.get_json()["results"]))
+    per_post, per_batch = len(sample) / http_single_s, count / http_batch_s
+    print(f"HTTP, one POST per item  {per_post:>12,.0f} items/sec")
+    print(f"HTTP, one batch POST     {per_batch:>12,.0f} items/sec  ({per_batch / per_post:.0f}x)")
+    print(f"mismatches: {mismatches}")
+    return 1 if mismatches else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
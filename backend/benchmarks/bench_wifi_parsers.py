@@ -0,0 +1,91 @@
+"""Measure lines/sec of every Wi-Fi scan-output parser on the bundled fixtures.
+
+Run from backend/:  python -m benchmarks.bench_wifi_parsers [repeat]
+Also checks each parser recovers every access point in its fixture, and
+times the old column-aligned nmcli regex as a baseline.
+"""
+import json
+import os
+import re
+import sys
+import time
+
+from app.detect_rogue_ap import (
+    _parse_linux_iw,
+    _parse_linux_iwlist,
+    _parse_linux_nmcli_terse,
+    _parse_macos_airport,
+    _parse_macos_system_profiler,
+    _parse_windows_netsh,
+)
+
+FIXTURE_DIR = os.path.join(os.path.dirname(__file__), "fixtures", "wifi")
+
+PARSERS = [
+    ("nmcli -t", _parse_linux_nmcli_terse, "nmcli_terse.txt"),
+    ("iw scan dump", _parse_linux_iw, "iw_scan_dump.txt"),
+    ("iwlist scan", _parse_linux_iwlist, "iwlist_scan.txt"),
+    ("netsh", _parse_windows_netsh, "netsh_networks.txt"),
+    ("airport -s", _parse_macos_airport, "airport_s.txt"),
+    ("system_profiler", _parse_macos_system_profiler, "system_profiler.txt"),
+]
+
+
+def legacy_nmcli(output):
+    """The previous human-readable nmcli parser: one uncompiled regex per line."""
+    networks = {}
+    for line in output.splitlines()[1:]:
+        m = re.match(r"([0-9A-Fa-f:]{17})\s+(\*?\s*)?(\S.+?)\s", line)
+        if m:
+            networks.setdefault(m.group(3).strip(), set()).add(m.group(1))
+    return [{"ssid": ssid, "bssid": b} for ssid, bs in networks.items() for b in bs]
+
+
+def legacy_nmcli_fixture(aps_output):
+    """Render the terse fixture as the column-aligned table the old parser expected."""
+    rows = ["BSSID              SSID                             CHAN  SIGNAL  SECURITY"]
+    for line in aps_output.splitlines():
+        bssid = line[:22].replace("\\", "")
+        rest = line[23:].replace("\\:", "\0").split(":")
+        ssid = rest[0].replace("\0", ":")
+        rows.append(f"{bssid}  {ssid:<32} {rest[1]:<5} {rest[2]:<7} {rest[3]}")
+    return "\n".join(rows) + "\n"
+
+
+def bench(fn, text, repeat):
+    lines = text.count("\n") * repeat
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = fn(text)
+    elapsed = time.perf_counter() - start
+    return result, lines / elapsed
+
+
+def main():
+    repeat = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    with open(os.path.join(FIXTURE_DIR, "expected.json")) as f:
+        expected = json.load(f)
+    want_aps, want_ssids = expected["access_points"], expected["ssids"]
+
+    failures = 0
+    print(f"{'parser':<18}{'lines/sec':>14}{'APs':>7}{'SSIDs':>7}")
+    for name, fn, fixture in PARSERS:
+        with open(os.path.join(FIXTURE_DIR, fixture)) as f:
+            text = f.read()
+        aps, rate = bench(fn, text, repeat)
+        ssids = len({ap["ssid"] for ap in aps})
+        ok = len(aps) == want_aps and ssids == want_ssids
+        failures += not ok
+        print(f"{name:<18}{rate:>14,.0f}{len(aps):>7}{ssids:>7}"
+              f"{'' if ok else f'  MISMATCH, expected {want_aps} APs / {want_ssids} SSIDs'}")
+
+    with open(os.path.join(FIXTURE_DIR, "nmcli_terse.txt")) as f:
+        table = legacy_nmcli_fixture(f.read())
+    aps, rate = bench(legacy_nmcli, table, repeat)
+    ssids = len({ap["ssid"] for ap in aps})
+    print(f"{'nmcli (legacy)':<18}{rate:>14,.0f}{len(aps):>7}{ssids:>7}  baseline (SSIDs cut at first space)")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,111 @@
+"""Regenerate the synthetic captures in benchmarks/captures/.
+
+Run from backend/:  python -m benchmarks.make_captures
+"""
+import json
+import os
+import random
+
+from scapy.all import ARP, DNS, DNSQR, DNSRR, Ether, IP, UDP, wrpcap, wrpcapng
+
+CAPTURE_DIR = os.path.join(os.path.dirname(__file__), "captures")
+
+CLIENT_MAC = "02:00:00:00:00:10"
+GATEWAY_MAC = "02:00:00:00:00:01"
+ATTACKER_MAC = "02:00:00:00:66:66"
+GATEWAY_IP = "192.168.1.1"
+CLIENT_IP = "192.168.1.10"
+
+
+def _dns_reply(ts, domain, ip, ttl=300):
+    pkt = Ether(src=GATEWAY_MAC, dst=CLIENT_MAC) / IP(src=GATEWAY_IP, dst=CLIENT_IP) / \
+        UDP(sport=53, dport=50000) / DNS(id=1, qr=1, qd=DNSQR(qname=domain), an=DNSRR(rrname=domain, rdata=ip, ttl=ttl))
+    pkt.time = ts
+    return pkt
+
+
+def _arp_reply(ts, ip, mac, dst_ip=CLIENT_IP, dst_mac=CLIENT_MAC):
+    pkt = Ether(src=mac, dst=dst_mac) / ARP(op=2, psrc=ip, hwsrc=mac, pdst=dst_ip, hwdst=dst_mac)
+    pkt.time = ts
+    return pkt
+
+
+def _gratuitous_arp(ts, ip, mac):
+    pkt = Ether(src=mac, dst="ff:ff:ff:ff:ff:ff") / ARP(op=1, psrc=ip, hwsrc=mac, pdst=ip)
+    pkt.time = ts
+    return pkt
+
+
+def _normal_dns(rng, start, count, domains=200):
+    """Stable answers; every domain keeps the single IP it was first given."""
+    answers = {f"site{i}.example.com": f"10.1.{i // 250}.{i % 250 + 1}" for i in range(domains)}
+    names = list(answers)
+    return [_dns_reply(start + n * 0.01, d, answers[d]) for n, d in
+            ((n, rng.choice(names)) for n in range(count))]
+
+
+def dns_clean(rng):
+    pkts = _normal_dns(rng, 1_700_000_000.0, 2000)
+    # A CDN that legitimately rotates once its 60 s TTL (clamped to 300 s) has expired
+    pkts.append(_dns_reply(1_700_000_000.0, "cdn.example.net", "10.9.0.1", ttl=60))
+    pkts.append(_dns_reply(1_700_000_400.0, "cdn.example.net", "10.9.0.2", ttl=60))
+    return pkts, {"dns": 0, "arp": 0}
+
+
+def dns_spoof(rng):
+    pkts = _normal_dns(rng, 1_700_000_000.0, 2000)
+    # Poisoned answers for domains the client has already resolved
+    for i, n in enumerate((500, 1000, 1500)):
+        domain = pkts[n - 1][DNSQR].qname.decode().strip(".")
+        pkts.insert(n, _dns_reply(float(pkts[n - 1].time) + 0.001, domain, f"203.0.113.{i + 1}"))
+    return pkts, {"dns": 3, "arp": 0}
+
+
+def arp_spoof(rng):
+    start = 1_700_000_000.0
+    hosts = {f"192.168.1.{i}": f"02:00:00:00:01:{i:02x}" for i in range(20, 60)}
+    hosts[GATEWAY_IP] = GATEWAY_MAC
+    pkts = []
+    for n in range(1500):
+        ip = rng.choice(list(hosts))
+        pkts.append(_arp_reply(start + n * 0.01, ip, hosts[ip]))
+    # Attacker claims the gateway, then a second host; each conflict is one alert
+    pkts.insert(600, _gratuitous_arp(start + 6.005, GATEWAY_IP, ATTACKER_MAC))
+    pkts.insert(900, _arp_reply(start + 9.005, "192.168.1.20", ATTACKER_MAC))
+    pkts.sort(key=lambda p: float(p.time))
+    expected = sum(1 for _ in _conflicts(pkts))
+    return pkts, {"dns": 0, "arp": expected}
+
+
+def _conflicts(pkts):
+    seen = {}
+    for p in pkts:
+        arp = p[ARP]
+        if arp.psrc in seen and seen[arp.psrc] != arp.hwsrc:
+            yield arp.psrc
+        seen[arp.psrc] = arp.hwsrc
+
+
+CAPTURES = {
+    "dns_clean.pcap": dns_clean,
+    "dns_spoof.pcapng": dns_spoof,
+    "arp_spoof.pcap": arp_spoof,
+}
+
+
+def main():
+    os.makedirs(CAPTURE_DIR, exist_ok=True)
+    expected = {}
+    for name, build in CAPTURES.items():
+        pkts, alerts = build(random.Random(name))
+        path = os.path.join(CAPTURE_DIR, name)
+        (wrpcapng if name.endswith(".pcapng") else wrpcap)(path, pkts)
+        expected[name] = {"packets": len(pkts), "alerts": alerts}
+        print(f"wrote {path} ({len(pkts)} packets)")
+    with open(os.path.join(CAPTURE_DIR, "expected.json"), "w") as f:
+        json.dump(expected, f, indent=2, sort_keys=True)
+        f.write("\n")
+
+
+if __name__ == "__main__":
+    main()
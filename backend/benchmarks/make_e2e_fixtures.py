@@ -0,0 +1,73 @@
+"""Regenerate the recorded command outputs and capture in benchmarks/fixtures/e2e/.
+
+Run from backend/:  python -m benchmarks.make_e2e_fixtures
+Point WIFI_SCAN_FIXTURES at the directory to run the whole backend on them:
+commands.json answers iwconfig, nmcli and nmap and the /proc/net/route and
+/proc/net/arp reads (see app.commands.FixtureRunner), and capture.pcap feeds
+the ARP and DNS sniffers and answers ARP probes (see app.capture.ReplaySource).
+"""
+import json
+import os
+
+from scapy.all import rdpcap, wrpcap
+
+from benchmarks.bench_nmap_parse import as_xml, synthetic_scan
+
+FIXTURE_DIR = os.path.join(os.path.dirname(__file__), "fixtures", "e2e")
+CAPTURE_DIR = os.path.join(os.path.dirname(__file__), "captures")
+
+IWCONFIG = """wlan0     IEEE 802.11  ESSID:"Cafe Guest"
+          Mode:Managed  Frequency:2.437 GHz  Access Point: 02:00:00:00:00:01
+          Bit Rate=72.2 Mb/s   Tx-Power=22 dBm
+          Retry short limit:7   RTS thr:off   Fragment thr:off
+          Power Management:on
+          Link Quality=58/70  Signal level=-52 dBm
+          Rx invalid nwid:0  Rx invalid crypt:0  Rx invalid frag:0
+
+lo        no wireless extensions.
+"""
+
+# Default route via 192.168.1.1 on 192.168.1.0/24, the network in capture.pcap
+# (the kernel writes addresses as little-endian hex)
+PROC_NET_ROUTE = """Iface\tDestination\tGateway \tFlags\tRefCnt\tUse\tMetric\tMask\t\tMTU\tWindow\tIRTT
+wlan0\t00000000\t0101A8C0\t0003\t0\t0\t600\t00000000\t0\t0\t0
+wlan0\t0001A8C0\t00000000\t0001\t0\t0\t600\t00FFFFFF\t0\t0\t0
+"""
+
+PROC_NET_ARP = """IP address       HW type     Flags       HW address            Mask     Device
+192.168.1.1      0x1         0x2         02:00:00:00:00:01     *        wlan0
+"""
+
+# Typical run times on a laptop, replayed as delays so latency numbers stay meaningful
+COMMANDS = {
+    "iwconfig": {"file": "iwconfig.txt", "delay": 0.01},
+    "nmcli -t -f * dev wifi list": {"file": "../wifi/nmcli_terse.txt", "delay": 0.3},
+    "nmap -sT * -oX - *": {"file": "nmap_gateway.xml", "delay": 1.5},
+    "/proc/net/route": {"file": "proc_net_route.txt"},
+    "/proc/net/arp": {"file": "proc_net_arp.txt"},
+}
+
+
+def main():
+    os.makedirs(FIXTURE_DIR, exist_ok=True)
+    with open(os.path.join(FIXTURE_DIR, "iwconfig.txt"), "w", newline="\n") as f:
+        f.write(IWCONFIG)
+    for name, text in (("proc_net_route.txt", PROC_NET_ROUTE), ("proc_net_arp.txt", PROC_NET_ARP)):
+        with open(os.path.join(FIXTURE_DIR, name), "w", newline="\n") as f:
+            f.write(text)
+    with open(os.path.join(FIXTURE_DIR, "nmap_gateway.xml"), "wb") as f:
+        # An nmap -F run: the 100 most common ports
+        f.write(as_xml(synthetic_scan(100)))
+    with open(os.path.join(FIXTURE_DIR, "commands.json"), "w") as f:
+        json.dump(COMMANDS, f, indent=2)
+        f.write("\n")
+
+    packets = list(rdpcap(os.path.join(CAPTURE_DIR, "dns_clean.pcap")))
+    packets += rdpcap(os.path.join(CAPTURE_DIR, "arp_spoof.pcap"))
+    packets.sort(key=lambda p: float(p.time))
+    wrpcap(os.path.join(FIXTURE_DIR, "capture.pcap"), packets)
+    print(f"wrote {len(COMMANDS)} recorded commands/files and {len(packets)} packets to {FIXTURE_DIR}")
+
+
+if __name__ == "__main__":
+    main()
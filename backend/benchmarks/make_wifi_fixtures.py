@@ -0,0 +1,140 @@
+"""Regenerate the Wi-Fi scan-output fixtures in benchmarks/fixtures/wifi/.
+
+Run from backend/:  python -m benchmarks.make_wifi_fixtures [aps]
+Each file describes the same synthetic stadium-sized set of access points in
+one tool's output format; expected.json records how many each should parse.
+"""
+import json
+import os
+import random
+import sys
+
+FIXTURE_DIR = os.path.join(os.path.dirname(__file__), "fixtures", "wifi")
+
+SECURITY = ["WPA2", "WPA1 WPA2", "WPA3", "", "WPA2 802.1X"]
+
+
+def synthetic_aps(count, seed=42):
+    rng = random.Random(seed)
+    aps = []
+    for i in range(count):
+        # Mix of plain names, names with spaces and names with ':' (breaks naive nmcli parsing)
+        ssid = rng.choice([f"Stadium WiFi {i // 8}", f"Vendor:{i // 8}", f"AP_{i // 8}", f"Guest {i // 8} 5G"])
+        aps.append({
+            "ssid": ssid,
+            "bssid": "02:%02x:%02x:%02x:%02x:%02x" % (i >> 24 & 255, i >> 16 & 255, i >> 8 & 255, i & 255, rng.randrange(256)),
+            "rssi": rng.randrange(-95, -30),
+            "channel": rng.choice([1, 6, 11, 36, 44, 149]),
+            "security": rng.choice(SECURITY),
+        })
+    return aps
+
+
+def _freq(ch):
+    return 2407 + 5 * ch if ch <= 13 else 5000 + 5 * ch
+
+
+def nmcli_terse(aps):
+    def esc(v):
+        return str(v).replace("\\", "\\\\").replace(":", "\\:")
+    return "".join(f"{esc(a['bssid'].upper())}:{esc(a['ssid'])}:{a['channel']}:{2 * (a['rssi'] + 100)}:{esc(a['security'])}\n"
+                   for a in aps)
+
+
+def iw_scan_dump(aps):
+    out = []
+    for a in aps:
+        out.append(f"BSS {a['bssid']}(on wlan0)\n"
+                   f"\tTSF: 123456789 usec (0d, 00:02:03)\n"
+                   f"\tfreq: {_freq(a['channel'])}\n"
+                   f"\tbeacon interval: 100 TUs\n"
+                   f"\tcapability: ESS {'Privacy ' if a['security'] else ''}ShortSlotTime (0x0411)\n"
+                   f"\tsignal: {a['rssi']}.00 dBm\n"
+                   f"\tlast seen: 120 ms ago\n"
+                   f"\tSSID: {a['ssid']}\n"
+                   f"\tSupported rates: 1.0* 2.0* 5.5* 11.0* 6.0 9.0 12.0 18.0 \n"
+                   f"\tDS Parameter set: channel {a['channel']}\n"
+                   + ("\tRSN:\t * Version: 1\n\t\t * Group cipher: CCMP\n" if "WPA2" in a["security"] or "WPA3" in a["security"] else ""))
+    return "".join(out)
+
+
+def iwlist_scan(aps):
+    out = ["wlan0     Scan completed :\n"]
+    for i, a in enumerate(aps, 1):
+        out.append(f"          Cell {i:02d} - Address: {a['bssid'].upper()}\n"
+                   f"                    Channel:{a['channel']}\n"
+                   f"                    Frequency:{_freq(a['channel']) / 1000:.3f} GHz (Channel {a['channel']})\n"
+                   f"                    Quality=50/70  Signal level={a['rssi']} dBm  \n"
+                   f"                    Encryption key:{'on' if a['security'] else 'off'}\n"
+                   f"                    ESSID:\"{a['ssid']}\"\n"
+                   f"                    Mode:Master\n"
+                   + ("                    IE: IEEE 802.11i/WPA2 Version 1\n" if a["security"] else ""))
+    return "".join(out)
+
+
+def netsh(aps):
+    out = ["\nInterface name : Wi-Fi\nThere are %d networks currently visible.\n\n" % len(aps)]
+    by_ssid = {}
+    for a in aps:
+        by_ssid.setdefault(a["ssid"], []).append(a)
+    for n, (ssid, group) in enumerate(by_ssid.items(), 1):
+        out.append(f"SSID {n} : {ssid}\n    Network type            : Infrastructure\n"
+                   f"    Authentication          : {group[0]['security'] or 'Open'}\n"
+                   f"    Encryption              : CCMP\n")
+        for m, a in enumerate(group, 1):
+            out.append(f"    BSSID {m}                 : {a['bssid']}\n"
+                       f"         Signal             : {2 * (a['rssi'] + 100)}%\n"
+                       f"         Radio type         : 802.11ac\n"
+                       f"         Channel            : {a['channel']}\n"
+                       f"         Basic rates (Mbps) : 6 12 24\n")
+        out.append("\n")
+    return "".join(out)
+
+
+def airport(aps):
+    out = ["                            SSID BSSID             RSSI CHANNEL HT CC SECURITY (auth/unicast/group)\n"]
+    for a in aps:
+        out.append(f"{a['ssid']:>32} {a['bssid']} {a['rssi']} {a['channel']:<7} Y  US {a['security'] or 'NONE'}\n")
+    return "".join(out)
+
+
+def system_profiler(aps):
+    out = ["Wi-Fi:\n\n      Software Versions:\n          CoreWLAN: 16.0 (1657)\n      Interfaces:\n        en0:\n"
+           "          Card Type: Wi-Fi  (0x14E4, 0x4387)\n          Status: Connected\n"
+           "          Other Local Wi-Fi Networks:\n"]
+    for a in aps:
+        out.append(f"            {a['ssid']}:\n"
+                   f"              PHY Mode: 802.11ac\n"
+                   f"              BSSID: {a['bssid']}\n"
+                   f"              Channel: {a['channel']} (5GHz, 80MHz)\n"
+                   f"              Network Type: Infrastructure\n"
+                   f"              Security: {a['security'] or 'None'}\n"
+                   f"              Signal / Noise: {a['rssi']} dBm / -93 dBm\n")
+    return "".join(out)
+
+
+FORMATS = {
+    "nmcli_terse.txt": nmcli_terse,
+    "iw_scan_dump.txt": iw_scan_dump,
+    "iwlist_scan.txt": iwlist_scan,
+    "netsh_networks.txt": netsh,
+    "airport_s.txt": airport,
+    "system_profiler.txt": system_profiler,
+}
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 300
+    aps = synthetic_aps(count)
+    os.makedirs(FIXTURE_DIR, exist_ok=True)
+    for name, render in FORMATS.items():
+        with open(os.path.join(FIXTURE_DIR, name), "w", newline="\n") as f:
+            f.write(render(aps))
+    with open(os.path.join(FIXTURE_DIR, "expected.json"), "w") as f:
+        json.dump({"access_points": count, "ssids": len({a["ssid"] for a in aps})}, f, indent=2)
+        f.write("\n")
+    print(f"wrote {len(FORMATS)} fixtures with {count} access points to {FIXTURE_DIR}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,7 @@
 from app import create_app
 
+# Production: gunicorn -w 4 -b 0.0.0.0:5001 run:app, with SCAN_DAEMON_SOCKET set to
+# let unprivileged workers forward scans to app.capture_daemon running as root
 app = create_app()
 
 if __name__ == '__main__':
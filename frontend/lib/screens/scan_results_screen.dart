@@ -162,39 +162,33 @@ class ScanResultsScreen extends StatelessWidget {
     return _isDnsDetected() ? 'Detected' : 'Not Detected';
   }
 
-bool _areOpenPortsDetected() {
+List<String> _openPorts() {
   final portsData = scanResults['open_ports'];
 
+  // Scan result object: {"status", "ports": [{"port": 22, "service": "ssh", ...}, ...]}
   if (portsData is Map) {
-    final raw = portsData['raw'] ?? '';
-    final regex = RegExp(r'(\d+)/tcp\s+open');
-    return regex.hasMatch(raw); // true kalau ada at least satu open port
+    final ports = portsData['ports'] ?? portsData['open_ports'];
+    return ports is List
+        ? ports.map((p) => (p is Map ? p['port'] : p).toString()).toList()
+        : [];
   }
 
   if (portsData is List) {
-    return portsData.isNotEmpty;
+    return portsData.map((p) => p.toString()).toList();
   }
 
-  return false;
+  return [];
 }
 
-String _getOpenPortsStatus() {
-  final portsData = scanResults['open_ports'];
+bool _areOpenPortsDetected() {
+  return _openPorts().isNotEmpty; // true kalau ada at least satu open port
+}
 
-  if (portsData is Map) {
-    final raw = portsData['raw'] ?? '';
-    final regex = RegExp(r'(\d+)/tcp\s+open');
-    final matches = regex.allMatches(raw);
-
-    if (matches.isNotEmpty) {
-      // Open ports
-      final openPorts = matches.map((m) => m.group(1)).join(', ');
-      return 'Detected ($openPorts)';
-    }
-  }
+String _getOpenPortsStatus() {
+  final openPorts = _openPorts();
 
-  if (portsData is List && portsData.isNotEmpty) {
-    return 'Detected (${portsData.join(", ")})';
+  if (openPorts.isNotEmpty) {
+    return 'Detected (${openPorts.join(", ")})';
   }
 
   return 'Not Detected';
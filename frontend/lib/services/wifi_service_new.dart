@@ -33,6 +33,51 @@ class WiFiService {
     }
   }
 
+  // Streaming combined scan (backend: /scan/all/stream).
+  // Emits (step, result) pairs as each detector finishes; 'threat_score' comes last.
+  static Stream<MapEntry<String, dynamic>> scanNetworkStream() async* {
+    final client = http.Client();
+    try {
+      final request = http.Request('GET', Uri.parse('$baseUrl/scan/all/stream'));
+      final response = await client.send(request);
+      if (response.statusCode != 200) {
+        throw Exception('Failed to scan network: ${response.statusCode}');
+      }
+
+      final lines = response.stream
+          .transform(utf8.decoder)
+          .transform(const LineSplitter());
+      await for (final line in lines) {
+        if (line.trim().isEmpty) continue;
+        final event = json.decode(line) as Map<String, dynamic>;
+        yield MapEntry(event['step'] as String, event['result']);
+      }
+    } finally {
+      client.close();
+    }
+  }
+
+  // One page of server-side scan history (backend: /history), newest first.
+  // Pass the returned 'next_cursor' back as [cursor] to load the next page;
+  // it is null on the last page.
+  static Future<Map<String, dynamic>> fetchHistory({
+    String? cursor,
+    int limit = 20,
+    String? ssid,
+  }) async {
+    final params = <String, String>{'limit': '$limit'};
+    if (cursor != null) params['cursor'] = cursor;
+    if (ssid != null) params['ssid'] = ssid;
+
+    final response = await http.get(
+      Uri.parse('$baseUrl/history').replace(queryParameters: params),
+    );
+    if (response.statusCode != 200) {
+      throw Exception('Failed to load history: ${response.statusCode}');
+    }
+    return json.decode(response.body) as Map<String, dynamic>;
+  }
+
   // Calculate threat score based on scan results
   static Future<ThreatScore> calculateThreatScore(
     Map<String, dynamic> scanData,